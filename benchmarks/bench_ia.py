@@ -0,0 +1,183 @@
+"""
+End-to-end benchmark of the AI stage against the mock Ollama server.
+
+Drives run_ia() on stored internships.json fixtures and reports wall time,
+prompt sizes, retries and the time spent outside Ollama calls (client-side
+overhead: prompt building, parsing, local scoring, file IO).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ia
+    python -m benchmarks.bench_ia --fixtures "outputs/*/internships.json" --repeat 3
+    python -m benchmarks.bench_ia --fail-rate 0.3 --failure-mode garbage --json bench.json
+    python -m benchmarks.bench_ia --fail-rate 0.3 --failure-mode hang --request-timeout 2
+    python -m benchmarks.bench_ia --profiles 8 --token-rate 200   # batch mode, 8 candidates
+    python -m benchmarks.bench_ia --profiles 8 --token-rate 200 --backends 2   # spread over 2 servers
+"""
+import os
+import io
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.c_ia import ollama_client, local_features, company_prestige, prompt_templates, prompt_budget
+from utils.c_ia.ia_launcher import run_ia, run_ia_batch
+from utils.c_ia.mock_ollama import start_mock_server
+
+BENCH_DATE = "bench"
+
+
+def _prepare_workdir(fixture_path: str, profiles: int = 0) -> str:
+    """Create a throw-away working directory laid out like the repository."""
+    workdir = tempfile.mkdtemp(prefix="jobot_bench_")
+    os.makedirs(os.path.join(workdir, "inputs", "profiles"))
+    os.makedirs(os.path.join(workdir, "outputs", f"data[{BENCH_DATE}]", "pdf"))
+    shutil.copy(os.path.join(REPO_ROOT, "inputs", "cv.json"), os.path.join(workdir, "inputs", "cv.json"))
+    shutil.copy(fixture_path, os.path.join(workdir, "outputs", f"data[{BENCH_DATE}]", "internships.json"))
+    # Batch mode: candidates share the CV but not their targets
+    cities = ["lyon", "paris", "montpellier", "bordeaux", "lille", "nantes", "toulouse", "marseille"]
+    for number in range(profiles):
+        with open(os.path.join(workdir, "inputs", "profiles", f"candidate_{number + 1}.json"), "w",
+                  encoding="utf-8") as f:
+            json.dump({"cv": os.path.join("inputs", "cv.json"),
+                       "targets": {"cities": {cities[number % len(cities)]: 5.0}}}, f)
+    return workdir
+
+
+def _reset_caches():
+    """Forget in-process caches so every run starts cold, like a fresh main.py."""
+    local_features._feature_cache = None
+    local_features._distance_beyond_targets.cache_clear()
+    company_prestige._tier_cache = None
+    company_prestige.lookup_tier.cache_clear()
+    prompt_templates._compiled.clear()
+    prompt_templates._disk_cache = None
+    # Token counts and fitted offer contents
+    prompt_budget._offer_tokens.cache_clear()
+    prompt_budget.fit_content.cache_clear()
+
+
+def run_once(fixture_path: str, server_urls: list, verbose: bool = False, warm: bool = False,
+             profiles: int = 0) -> dict:
+    """Run the AI stage once on a fixture (batch mode with `profiles` candidates) and return its measurements."""
+    if not warm:
+        _reset_caches()
+    workdir = _prepare_workdir(fixture_path, profiles)
+    previous_cwd = os.getcwd()
+    ollama_client.set_backends(server_urls)
+    ollama_client.CALL_STATS.clear()
+
+    output = io.StringIO()
+    os.chdir(workdir)
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if verbose else output):
+            if profiles:
+                run_ia_batch(BENCH_DATE)
+            else:
+                run_ia(BENCH_DATE)
+        wall = time.perf_counter() - start
+        if profiles:
+            candidates_dir = glob.escape(os.path.join("outputs", f"data[{BENCH_DATE}]", "candidates"))
+            completed = len(glob.glob(os.path.join(candidates_dir, "*", "match.json"))) == profiles
+        else:
+            completed = os.path.exists(os.path.join("outputs", f"data[{BENCH_DATE}]", "match.json"))
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    calls = list(ollama_client.CALL_STATS)
+    # Summed per call: in batch mode calls overlap and this can exceed the wall time
+    ollama_time = sum(c["elapsed"] or 0 for c in calls)
+    with open(fixture_path, "r", encoding="utf-8") as f:
+        offers = len(json.load(f))
+
+    return {
+        "fixture": fixture_path,
+        "offers": offers,
+        "completed": completed,
+        "wall_s": round(wall, 3),
+        "ollama_s": round(ollama_time, 3),
+        "overhead_s": round(max(0.0, wall - ollama_time), 3),
+        "calls": len(calls),
+        "retries": sum(max(0, c["attempts"] - 1) for c in calls),
+        "prompt_chars": [c["prompt_chars"] for c in calls],
+        "ttft_s": [round(c["ttft"], 3) if c["ttft"] is not None else None for c in calls],
+    }
+
+
+def _print_report(results: list):
+    print(f"\n{'fixture':<45} {'offers':>6} {'ok':>3} {'wall':>8} {'ollama':>8} "
+          f"{'overhead':>9} {'calls':>5} {'retry':>5}  prompt chars")
+    for r in results:
+        name = os.path.basename(os.path.dirname(r["fixture"]))[-45:]
+        print(f"{name:<45} {r['offers']:>6} {'y' if r['completed'] else 'n':>3} {r['wall_s']:>7.2f}s "
+              f"{r['ollama_s']:>7.2f}s {r['overhead_s']:>8.3f}s {r['calls']:>5} {r['retries']:>5}  "
+              f"{r['prompt_chars']}")
+
+    total_wall = sum(r["wall_s"] for r in results)
+    total_overhead = sum(r["overhead_s"] for r in results)
+    print(f"\n[BENCH] {len(results)} runs — wall {total_wall:.2f}s, client overhead {total_overhead:.3f}s, "
+          f"{sum(r['retries'] for r in results)} retries, "
+          f"{sum(not r['completed'] for r in results)} incomplete runs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run_ia against a mock Ollama server")
+    parser.add_argument("--fixtures", default=os.path.join(REPO_ROOT, "outputs", "*", "internships.json"))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--ttft-per-1k-chars", type=float, default=0.0)
+    parser.add_argument("--token-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--failure-mode", choices=["http500", "drop", "garbage", "hang"], default="http500")
+    parser.add_argument("--request-timeout", type=float, default=10.0,
+                        help="Client timeout in seconds (a hung request fails after it)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", type=int, default=1, help="Number of mock Ollama servers")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the results to this file")
+    parser.add_argument("--profiles", type=int, default=0, help="Batch mode with this many candidate profiles")
+    parser.add_argument("--warm", action="store_true", help="Keep in-process caches between runs")
+    parser.add_argument("--verbose", action="store_true", help="Show run_ia output")
+    args = parser.parse_args()
+
+    fixtures = [args.fixtures] if os.path.isfile(args.fixtures) else sorted(glob.glob(args.fixtures))
+    if not fixtures:
+        print(f"[BENCH] No fixture matches {args.fixtures}")
+        sys.exit(1)
+
+    # No real backoff against the mock, retries are counted instead
+    ollama_client.RETRY_DELAY = 0
+    ollama_client.REQUEST_TIMEOUT = args.request_timeout
+    servers = [start_mock_server(
+        ttft=args.ttft, ttft_per_1k_chars=args.ttft_per_1k_chars, token_rate=args.token_rate,
+        latency=args.latency, fail_rate=args.fail_rate, failure_mode=args.failure_mode, seed=args.seed + number,
+    ) for number in range(max(1, args.backends))]
+    urls = [server.url for server in servers]
+    print(f"[BENCH] Mock Ollama on {', '.join(urls)} — {len(fixtures)} fixtures × {args.repeat}")
+
+    results = []
+    for fixture in fixtures:
+        for _ in range(args.repeat):
+            results.append(run_once(fixture, urls, args.verbose, args.warm, args.profiles))
+
+    for server in servers:
+        server.shutdown()
+    _print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        print(f"[BENCH] Results → {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
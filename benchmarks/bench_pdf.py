@@ -0,0 +1,94 @@
+"""
+Benchmark of the PDF stage: per-document render time of CVs and cover
+letters, with a fresh CVRenderer per document (styles, photo and blocks
+rebuilt every time, as before the renderer existed) versus one renderer
+shared by the whole run.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pdf
+    python -m benchmarks.bench_pdf --match "outputs/data[...]/match.json" --repeat 10 --photo inputs/photo.jpeg
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.d_files_gen.pdf_generator import CVRenderer
+from utils.d_files_gen.pdf_assets import prepare_photo
+
+
+def _latest_match() -> str | None:
+    matches = sorted(glob.glob(os.path.join(glob.escape(os.path.join(REPO_ROOT, "outputs")), "*", "match.json")))
+    return matches[-1] if matches else None
+
+
+def _documents(cv_data: dict, matches: list) -> list:
+    """(kind, match, selected experiences, is_supply_chain) for every document to render."""
+    documents = []
+    for number, match in enumerate(matches):
+        skill_indexes = set(match.get("skills", []))
+        selected = [exp for exp in cv_data.get("experiences", []) if exp.get("index") in skill_indexes]
+        # Alternate offer types so both headers and skill blocks are exercised
+        is_supply_chain = number % 2 == 0
+        documents.append(("cv", match, selected, is_supply_chain))
+        documents.append(("letter", match, selected, is_supply_chain))
+    return documents
+
+
+def run(cv_data: dict, matches: list, photo_path: str | None, repeat: int, shared: bool) -> dict:
+    """Render every document `repeat` times; returns per-kind render times in ms."""
+    documents = _documents(cv_data, matches)
+    times = {"cv": [], "letter": []}
+    renderer = CVRenderer(cv_data, photo_path) if shared else None
+    with tempfile.TemporaryDirectory(prefix="jobot_bench_pdf_") as output_dir:
+        for _ in range(repeat):
+            for number, (kind, match, selected, is_supply_chain) in enumerate(documents):
+                output_path = os.path.join(output_dir, f"{kind}_{number}.pdf")
+                start = time.perf_counter()
+                current = renderer or CVRenderer(cv_data, photo_path)
+                if kind == "cv":
+                    current.render_cv(output_path, selected, is_supply_chain)
+                else:
+                    current.render_cover_letter(output_path, match, is_supply_chain, "2026-01-01 00:00:00")
+                times[kind].append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CV / cover letter rendering")
+    parser.add_argument("--cv", default=os.path.join(REPO_ROOT, "inputs", "cv.json"))
+    parser.add_argument("--match", default=None, help="match.json to render (default: latest run)")
+    parser.add_argument("--photo", default=os.path.join(REPO_ROOT, "inputs", "photo.jpeg"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    match_path = args.match or _latest_match()
+    if not match_path or not os.path.exists(match_path):
+        print("[BENCH] No match.json found — pass --match")
+        sys.exit(1)
+    with open(args.cv, "r", encoding="utf-8") as f:
+        cv_data = json.load(f)
+    with open(match_path, "r", encoding="utf-8") as f:
+        matches = json.load(f).get("match", [])
+    # Resampled like the PDF stage does
+    photo_path = prepare_photo(args.photo) if os.path.exists(args.photo) else None
+    print(f"[BENCH] {len(matches)} matches × {args.repeat} from {match_path} "
+          f"({'with' if photo_path else 'without'} photo)")
+
+    print(f"\n{'mode':<28} {'kind':<7} {'docs':>5} {'median':>9} {'mean':>9} {'first':>9}")
+    for label, shared in (("fresh renderer per document", False), ("shared renderer", True)):
+        times = run(cv_data, matches, photo_path, args.repeat, shared)
+        for kind, values in times.items():
+            print(f"{label:<28} {kind:<7} {len(values):>5} {statistics.median(values):>7.1f}ms "
+                  f"{statistics.mean(values):>7.1f}ms {values[0]:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
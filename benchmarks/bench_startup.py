@@ -0,0 +1,96 @@
+"""
+Benchmark of the CLI startup: import time of main.py and of the module each
+stage starts from, measured with `python -X importtime` in fresh
+interpreters. Fails (exit code 1) when main.py goes over its import budget
+or when a module loads the heavy dependencies of another stage (e.g. the PDF
+stage importing Scrapy or requests).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 10 --budget-ms 80
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that are slow to import, and who needs them
+HEAVY = {"scrapy", "twisted", "playwright", "scrapy_playwright", "requests", "reportlab", "PIL", "tokenizers"}
+# Module each command starts from → heavy packages it may load
+ENTRIES = {
+    "main": set(),
+    "utils.b_scraper.launcher": {"scrapy", "twisted", "playwright", "scrapy_playwright", "PIL"},
+    "utils.c_ia.ia_launcher": {"requests"},
+    "utils.c_ia.offer_tags": set(),
+    "utils.d_files_gen.files_gen_launcher": {"reportlab", "PIL"},
+}
+
+
+def measure_import(module: str) -> tuple[float, set] | str:
+    """(cumulative import time in ms, top-level packages loaded), or the error of a failed import."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return result.stderr.strip().splitlines()[-1]
+    cumulative = None
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue  # header line
+        packages.add(name.strip().split(".")[0])
+        if name.strip() == module:
+            cumulative = int(cumulative_us) / 1000
+    return cumulative, packages
+
+
+def measure_cli(repeat: int) -> float:
+    """Median wall time in ms of `python main.py --help`, interpreter startup included."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--help"], cwd=REPO_ROOT, capture_output=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the CLI and of each stage")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="Import budget of main.py")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"[BENCH] Import times (median of {args.repeat} fresh interpreters)")
+    for module, allowed in ENTRIES.items():
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        if isinstance(runs[0], str):
+            print(f"  {module:40s} skipped: {runs[0]}")
+            continue
+        milliseconds = statistics.median(run[0] for run in runs)
+        loaded = sorted(runs[0][1] & HEAVY)
+        print(f"  {module:40s} {milliseconds:7.1f} ms   heavy: {', '.join(loaded) or '-'}")
+        unexpected = set(loaded) - allowed
+        if unexpected:
+            failures.append(f"{module} imports {', '.join(sorted(unexpected))}")
+        if module == "main" and milliseconds > args.budget_ms:
+            failures.append(f"main imports in {milliseconds:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    print(f"\n[BENCH] python main.py --help: {measure_cli(args.repeat):.0f} ms (interpreter startup included)")
+
+    if failures:
+        print("\n[BENCH] FAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("[BENCH] OK: within budget, no stage loads another stage's dependencies")
+
+
+if __name__ == "__main__":
+    main()
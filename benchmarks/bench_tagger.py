@@ -0,0 +1,93 @@
+"""
+Benchmark of the tag stage matcher: time to tag a run's offers as the
+vocabulary grows, for the Aho-Corasick KeywordMatcher and for one regular
+expression per keyword (one scan of the text per keyword). The matcher
+should stay roughly flat while the per-keyword scan grows with the
+vocabulary.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_tagger
+    python -m benchmarks.bench_tagger --fixtures "outputs/*/internships.json" --sizes 100 1000 10000
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.text import normalize_text
+from utils.c_ia.offer_tags import KeywordMatcher, build_vocabulary
+
+# The per-keyword scan gets slow: skip it above this vocabulary size
+REGEX_MAX_TERMS = 1000
+
+
+def _vocabulary(size: int, cv_data: dict, seed: int = 0) -> list:
+    """The real vocabulary padded with made-up one- and two-word terms up to `size`."""
+    terms = list(build_vocabulary([cv_data]))
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    while len(terms) < size:
+        words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(rng.randint(1, 2))]
+        terms.append(" ".join(words))
+    return terms[:max(size, 1)]
+
+
+def _regex_counts(patterns: list, texts: list) -> int:
+    return sum(len(pattern.findall(text)) for text in texts for pattern in patterns)
+
+
+def _matcher_counts(matcher: KeywordMatcher, texts: list) -> int:
+    return sum(sum(matcher.count(text).values()) for text in texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", default=os.path.join("outputs", "*", "internships.json"),
+                        help="glob of internships.json files to tag")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="vocabulary sizes to measure")
+    parser.add_argument("--cv", default=os.path.join("inputs", "cv.json"))
+    args = parser.parse_args()
+
+    texts = []
+    for path in sorted(glob.glob(args.fixtures)):
+        with open(path, "r", encoding="utf-8") as f:
+            texts += [normalize_text(offer.get("content", "")) for offer in json.load(f)]
+    if not texts:
+        print(f"[BENCH] No offers found in {args.fixtures}")
+        sys.exit(1)
+    with open(args.cv, "r", encoding="utf-8") as f:
+        cv_data = json.load(f)
+    print(f"[BENCH] {len(texts)} offers, {sum(map(len, texts)) / 1000:.0f}k characters")
+    print(f"  {'terms':>7s} {'build':>9s} {'matcher':>9s} {'regex':>9s} {'hits':>7s}")
+
+    for size in args.sizes:
+        terms = _vocabulary(size, cv_data)
+        start = time.perf_counter()
+        matcher = KeywordMatcher(terms)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hits = _matcher_counts(matcher, texts)
+        matched = time.perf_counter() - start
+
+        regex = "-"
+        if size <= REGEX_MAX_TERMS:
+            patterns = [re.compile(rf"(?<!\w){re.escape(term)}(?!\w)") for term in terms]
+            start = time.perf_counter()
+            regex_hits = _regex_counts(patterns, texts)
+            regex = f"{time.perf_counter() - start:.3f}s"
+            if regex_hits != hits:
+                print(f"  [WARN] {size} terms: the matcher found {hits} hits, the regular expressions {regex_hits}")
+        print(f"  {len(terms):>7d} {build:>8.3f}s {matched:>8.3f}s {regex:>9s} {hits:>7d}")
+
+
+if __name__ == "__main__":
+    main()
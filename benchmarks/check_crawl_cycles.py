@@ -0,0 +1,63 @@
+"""
+Check of the crawl worker's cycles: two jobs crawling the same search in
+one worker process must both export their offers, and so must a daemon
+cycle re-scraping an offer past SEEN_TTL_DAYS. The pipeline drops the
+duplicates of a cycle (one offer found by two searches), never the offers
+an earlier cycle exported. Runs the real spider and pipeline on made-up
+items, without a browser. Exit code 1 on failure.
+
+Usage (from the repository root):
+    python -m benchmarks.check_crawl_cycles
+"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from scrapy.exceptions import DropItem
+from utils.b_scraper.job_scraper.pipelines import JobScraperPipeline
+from utils.b_scraper.job_scraper.spiders.job_teaser_spider import JobteaserSpider
+
+SEARCH = "https://www.jobteaser.com/fr/job-offers?q=data"
+
+
+def _offer(number: int) -> dict:
+    return {"URL": f"https://www.jobteaser.com/fr/job-offers/{number}", "name": f"Stage {number}",
+            "company": "Company", "location": "Lyon", "content": "Missions", "search": SEARCH}
+
+
+def _cycle(spider, pipeline, offers: list) -> tuple[int, int]:
+    """(exported, dropped) items of one crawl cycle."""
+    spider.start_cycle()
+    spider.search_counts[SEARCH] = {"duplicates": 0}
+    exported = dropped = 0
+    for offer in offers:
+        try:
+            pipeline.process_item(dict(offer), spider)
+            exported += 1
+        except DropItem:
+            dropped += 1
+    return exported, dropped
+
+
+def main():
+    spider = JobteaserSpider(daemon=True)
+    pipeline = JobScraperPipeline()
+    offers = [_offer(number) for number in range(5)]
+
+    first = _cycle(spider, pipeline, offers + offers[:2])
+    second = _cycle(spider, pipeline, offers)
+    # The daemon no longer lists offer 0 as seen: its TTL is over
+    expired = _cycle(spider, pipeline, offers[:1])
+    print(f"[CHECK] job 1: {first[0]} exported, {first[1]} duplicates dropped")
+    print(f"[CHECK] job 2 (same search): {second[0]} exported, {second[1]} dropped")
+    print(f"[CHECK] offer past its TTL: {expired[0]} exported, {expired[1]} dropped")
+    if first != (5, 2) or second != (5, 0) or expired != (1, 0):
+        print("[CHECK] FAILED: a cycle must export every offer it scrapes, once")
+        sys.exit(1)
+    print("[CHECK] OK")
+
+
+if __name__ == "__main__":
+    main()
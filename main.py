@@ -1,20 +1,149 @@
-from utils.a_init.init import init
-from utils.b_scraper.launcher import run_scraper
-from utils.c_ia.ia_launcher import run_ia
-from utils.d_files_gen.files_gen_launcher import run_pdf_generation
-def main():
-    #creation of direction folder 
-    date = init()
+import sys
+import argparse
+from utils.pipeline import STAGES, BATCH_STAGES, batch_mode, find_run, plan_stages, run_pipeline
 
-    #run the scraper
-    run_scraper(date)
+# Commands: "run" (the default) chains every stage, "scrape", "tag", "score",
+# "match", "pdf" and "batch" run a single stage of a run, "compare" diffs the
+# perf.json of two runs and "serve" starts the HTTP job service. Nothing heavy
+# is imported at startup: each stage loads Scrapy, requests or ReportLab when
+# it starts.
 
-    #run qwen
-    run_ia(date)
+STAGE_HELP = {
+    "scrape": "scrape the offers into a new run (or again into RUN)",
+    "tag": "tag the offers of a run with the domain keywords and CV skills they mention",
+    "score": "score the offers of a run",
+    "match": "pick the best offers of a run and write their cover letters",
+    "pdf": "generate the CV and cover letter PDFs of a run",
+    "batch": "score and match the offers of a run for every candidate profile",
+}
+COMMANDS = ["run"] + list(STAGE_HELP) + ["compare", "serve"]
 
-    #run pdf gen
-    run_pdf_generation(date)
 
-if __name__ == "__main__":    
+def build_parser() -> tuple[argparse.ArgumentParser, dict]:
+    parser = argparse.ArgumentParser(description="Scrape internships, score them with Qwen and generate the PDFs",
+                                     epilog='without a command, options are passed to "run"')
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers = {}
+
+    run = subparsers["run"] = commands.add_parser("run", help="run every stage (default)")
+    run.add_argument("--resume", metavar="RUN",
+                     help='existing run to continue: its date, its "data[...]" folder or "last"')
+    run.add_argument("--from-stage", choices=sorted(set(STAGES + BATCH_STAGES)),
+                     help="with --resume, run again from this stage even if it is up to date")
+    run.add_argument("--export", choices=["zip", "merged"],
+                     help="with --resume, bundle the run's applications into one ZIP "
+                          "(merged: one CV + cover letter PDF per offer) instead of running stages")
+    run.add_argument("--daemon", action="store_true",
+                     help="keep running: a new run every --interval minutes, scraping only new offers")
+    run.add_argument("--interval", type=float, default=None, metavar="MIN",
+                     help="with --daemon, minutes between two cycle starts (default 60)")
+    run.add_argument("--jitter", type=float, default=None, metavar="MIN",
+                     help="with --daemon, random extra delay of up to MIN minutes (default 10)")
+    run.add_argument("--cycles", type=int, default=None,
+                     help="with --daemon, stop after this many cycles")
+
+    for stage, help_text in STAGE_HELP.items():
+        sub = subparsers[stage] = commands.add_parser(stage, help=help_text)
+        if stage == "scrape":
+            sub.add_argument("run", nargs="?", metavar="RUN", help="existing run to scrape again")
+        else:
+            sub.add_argument("run", nargs="?", default="last", metavar="RUN",
+                             help='its date, its "data[...]" folder or "last" (default)')
+    for sub in list(subparsers.values()):
+        sub.add_argument("--profile", action="store_true",
+                         help="also run each stage under cProfile (profile_<stage>.prof in the run folder)")
+
+    compare = subparsers["compare"] = commands.add_parser("compare", help="compare the stage and call times of two runs")
+    compare.add_argument("run_a", metavar="RUN_A", help='reference run: its date, its "data[...]" folder or "last"')
+    compare.add_argument("run_b", metavar="RUN_B", nargs="?", default="last", help='run to compare (default: "last")')
+
+    serve = subparsers["serve"] = commands.add_parser("serve", help="serve the HTTP API that queues and runs jobs")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    return parser, subparsers
+
+
+def run_command(parser: argparse.ArgumentParser, args) -> bool:
+    stages = BATCH_STAGES if batch_mode() else STAGES
+    if args.from_stage and not args.resume:
+        parser.error("--from-stage needs --resume")
+    if args.from_stage and args.from_stage not in stages:
+        parser.error(f"--from-stage must be one of {stages} in this mode")
+    if args.export and not args.resume:
+        parser.error("--export needs --resume")
+    if args.daemon and args.resume:
+        parser.error("--daemon cannot be combined with --resume")
+    if not args.daemon and (args.interval is not None or args.jitter is not None or args.cycles is not None):
+        parser.error("--interval, --jitter and --cycles need --daemon")
+
+    if args.daemon:
+        from utils.daemon import run_daemon, INTERVAL_MIN, JITTER_MIN
+        interval = INTERVAL_MIN if args.interval is None else args.interval
+        jitter = JITTER_MIN if args.jitter is None else args.jitter
+        return run_daemon(interval, jitter, args.cycles)
+
+    if args.resume:
+        #reuse the stages of an existing run that are still valid
+        date = find_run(args.resume)
+        if date is None:
+            parser.error(f"no run found for {args.resume!r}")
+        if args.export:
+            from utils.d_files_gen.export import export_applications
+            return export_applications(date, merged=args.export == "merged")
+        first_stage = plan_stages(date, stages, args.from_stage)
+    else:
+        #creation of direction folder
+        from utils.a_init.init import init
+        date = init()
+        first_stage = 0
+
+    #scraper → qwen → pdf gen, each stage recorded in the run manifest
+    return run_pipeline(date, first_stage, stages)
+
+
+def stage_command(parser: argparse.ArgumentParser, args) -> bool:
+    """Run one stage, even if it is up to date, on the outputs of the earlier stages of the run."""
+    stages = BATCH_STAGES if batch_mode() else STAGES
+    if args.command not in stages:
+        parser.error(f"no {args.command} stage in this mode (stages: {', '.join(stages)})")
+    if args.run is None:
+        from utils.a_init.init import init
+        date = init()
+    else:
+        date = find_run(args.run)
+        if date is None:
+            parser.error(f"no run found for {args.run!r}")
+    return run_pipeline(date, 0, [args.command])
+
+
+def compare_command(parser: argparse.ArgumentParser, args) -> bool:
+    from utils.tracing import compare_runs
+    dates = []
+    for name in (args.run_a, args.run_b):
+        date = find_run(name)
+        if date is None:
+            parser.error(f"no run found for {name!r}")
+        dates.append(date)
+    return compare_runs(*dates)
+
+
+def serve_command(parser: argparse.ArgumentParser, args) -> bool:
+    from utils.g_service.server import run_server
+    return run_server(args.host, args.port)
+
+
+def main(argv: list | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    # "python main.py [--resume ...]" is "python main.py run [--resume ...]"
+    if not argv or argv[0] not in COMMANDS + ["-h", "--help"]:
+        argv = ["run"] + argv
+    parser, subparsers = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "profile", False):
+        from utils.tracing import set_profiling
+        set_profiling(True)
+    command = {"run": run_command, "compare": compare_command, "serve": serve_command}.get(args.command, stage_command)
+    sys.exit(0 if command(subparsers[args.command], args) else 1)
+
+if __name__ == "__main__":
     main()
-    
@@ -0,0 +1,68 @@
+import os
+import json
+from utils.text import normalize_text
+from utils.c_ia.offer_tags import KeywordMatcher, KEYWORDS_PATH, TITLE_WEIGHT
+
+# Listing-card pre-filter of the spider: the title, company, location and
+# contract type shown on a search result card are checked against the rules
+# of card_filter.json before the offer page is rendered, so that a CDI, a
+# sales job or an offer abroad never costs a Playwright render. Each card
+# also gets a relevance score (domain keyword hits, title hits weighted) that
+# decides which cards are rendered first within a search's crawl budget.
+# Exclusion keywords never drop a card whose title has a domain keyword
+# ("Data Analyst Marketing" stays). A rule only applies to the field the card
+# selectors found (a missing field never drops a card); the relevance falls
+# back to the whole text of the card.
+
+CARD_FILTER_PATH = os.path.join("utils", "b_scraper", "card_filter.json")
+
+
+class CardFilter:
+    def __init__(self, rules: dict, keywords_path: str = KEYWORDS_PATH):
+        self.selectors = rules.get("selectors", {})
+        self.min_relevance = rules.get("min_relevance", 0)
+        self.matchers = {
+            name: KeywordMatcher({normalize_text(term) for term in rules.get(name, [])})
+            for name in ("contract_include", "contract_exclude", "title_exclude", "location_exclude")
+        }
+        with open(keywords_path, "r", encoding="utf-8") as f:
+            domains = json.load(f)
+        self.relevance = KeywordMatcher({normalize_text(term) for terms in domains.values() for term in terms})
+
+    def _hits(self, name: str, text: str) -> bool:
+        return bool(self.matchers[name].count(text))
+
+    def check(self, card: dict) -> tuple[str | None, int]:
+        """
+        (reason to skip the card or None, relevance) of a card:
+        {"title", "company", "location", "contract", "text"}, any may be empty.
+        """
+        text = normalize_text(card.get("text", ""))
+        title = normalize_text(card.get("title", ""))
+        contract = normalize_text(card.get("contract", ""))
+        location = normalize_text(card.get("location", ""))
+
+        title_hits = sum(self.relevance.count(title).values())
+        # The card text includes the title
+        relevance = (TITLE_WEIGHT - 1) * title_hits + sum(self.relevance.count(text or title).values())
+
+        if self._hits("contract_exclude", contract) and not self._hits("contract_include", f"{contract} {title}"):
+            return "contract", relevance
+        if not title_hits and self._hits("title_exclude", title):
+            return "field", relevance
+        if self._hits("location_exclude", location):
+            return "location", relevance
+        if relevance < self.min_relevance:
+            return "relevance", relevance
+        return None, relevance
+
+
+def load_card_filter(path: str = CARD_FILTER_PATH) -> CardFilter | None:
+    """The card filter of `path`; None if it is missing or disabled."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    if not rules.get("enabled", True):
+        return None
+    return CardFilter(rules)
@@ -9,6 +9,7 @@ import scrapy
 class JobScraperItem(scrapy.Item):
     # define the fields for your item here like:
     # name = scrapy.Field()
+    id = scrapy.Field()
     URL = scrapy.Field()
     name = scrapy.Field()
     company = scrapy.Field()
@@ -7,6 +7,7 @@
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 from scrapy.exceptions import DropItem
+from utils.offer_ids import offer_id
 
 class JobScraperPipeline:
     def process_item(self, item, spider):
@@ -33,5 +34,13 @@ class JobScraperPipeline:
 
         if adapter.get('URL') and not adapter.get('URL').startswith("http"):
             adapter['URL'] = spider.starts_urls[0] + adapter['URL']
-        
+
+        # Stable ID carried by every later stage
+        adapter['id'] = offer_id(adapter.asdict())
+        # Per crawl, or per cycle of the crawl worker (spider.start_cycle)
+        if adapter['id'] in spider.exported_ids:
+            spider.count_search(adapter.get('search'), "duplicates")
+            raise DropItem("Duplicate offer %s" % adapter['id'])
+        spider.exported_ids.add(adapter['id'])
+
         return item
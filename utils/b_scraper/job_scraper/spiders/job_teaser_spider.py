@@ -1,23 +1,55 @@
 import scrapy
-import os
 from scrapy_playwright.page import PageMethod
+from utils.tracing import record
+from utils.b_scraper.search_stats import read_links, LINKS_PATH
+from utils.b_scraper.card_filter import load_card_filter
 
 class JobteaserSpider(scrapy.Spider):
     name = "jobteaser"
 
-    async def start(self):
-        # Locate the links.txt file
-        links_file = os.path.join('utils/b_scraper', 'links.txt')
+    def __init__(self, *args, daemon=False, links=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Daemon mode: the spider stays open, each cycle is started by the crawl worker
+        self.daemon = daemon
+        # Search URLs (or crawl plan entries, see search_stats.plan_crawl) instead of links.txt
+        self.links = links
+        # Offer URLs already scraped by earlier cycles (skipped), and the ones scraped by this one
+        self.seen_urls = set()
+        self.new_urls = []
+        # Offer IDs exported by this crawl or cycle (same offer found by several searches)
+        self.exported_ids = set()
+        # Per search URL: offer cards listed, already seen, filtered, followed, over its budget, duplicates
+        self.search_counts = {}
+        # Rules that skip irrelevant cards before their page is rendered (card_filter.json)
+        self.card_filter = load_card_filter()
 
-        if not os.path.exists(links_file):
-            self.logger.error(f"links.txt NOT FOUND at {links_file}")
+    async def start(self):
+        if self.daemon:
             return
+        for request in self.search_requests(self.links):
+            yield request
 
-        # 2. Read the file and yield a request for each URL
-        with open(links_file, 'r') as f:
-            urls = [line.strip() for line in f if line.strip()]
+    def start_cycle(self, seen=()):
+        """Forget the previous cycle of the crawl worker; `seen` offer URLs are skipped."""
+        self.seen_urls = set(seen)
+        self.new_urls = []
+        self.search_counts = {}
+        self.exported_ids = set()
 
-        for url in urls:
+    def search_requests(self, urls=None):
+        if urls is None:
+            urls = read_links()
+            if urls is None:
+                self.logger.error(f"links.txt NOT FOUND at {LINKS_PATH}")
+                return
+
+        for entry in urls:
+            # A plain URL, or a plan entry: {"url", "max_offers", "priority"}
+            if isinstance(entry, str):
+                entry = {"url": entry}
+            url = entry["url"]
+            self.search_counts[url] = {"cards": 0, "already_seen": 0, "filtered": 0, "followed": 0,
+                                       "over_budget": 0, "duplicates": 0}
             self.logger.info(f"Starting scrape for: {url}")
             yield scrapy.Request(
                 url,
@@ -26,13 +58,52 @@ class JobteaserSpider(scrapy.Spider):
                     "playwright_page_methods": [
                         PageMethod("wait_for_selector", "a.JobAdCard_link__LMtBN"),
                     ],
+                    "search": url,
+                    "max_offers": entry.get("max_offers"),
                 },
+                # High-yield searches are rendered first
+                priority=entry.get("priority", 0),
                 callback=self.parse
             )
 
+    def count_search(self, url, key):
+        if url in self.search_counts:
+            self.search_counts[url][key] += 1
+
     def parse(self, response):
+        # Playwright navigation + wait_for_selector, timed by Scrapy
+        record("search page", "call", response.meta.get("download_latency", 0.0), url=response.url)
+        search = response.meta.get("search", response.url)
+        max_offers = response.meta.get("max_offers")
+        candidates = []
         offers = response.css('a.JobAdCard_link__LMtBN')
         for offer in offers:
+            self.count_search(search, "cards")
+            if response.urljoin(offer.attrib.get('href', '')) in self.seen_urls:
+                # Scraped by an earlier cycle: don't render its page again
+                self.crawler.stats.inc_value('jobot/offers_already_seen')
+                self.count_search(search, "already_seen")
+                continue
+            relevance = 0
+            if self.card_filter is not None:
+                card = self.card_fields(offer)
+                reason, relevance = self.card_filter.check(card)
+                if reason is not None:
+                    # The card alone shows the offer is irrelevant: no render
+                    self.logger.debug(f"Card skipped ({reason}): {card['title']}")
+                    self.crawler.stats.inc_value(f'jobot/cards_filtered/{reason}')
+                    self.count_search(search, "filtered")
+                    continue
+            candidates.append((relevance, offer))
+
+        # Most relevant cards first, then newest first (the listing order)
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        for followed, (_, offer) in enumerate(candidates):
+            if max_offers is not None and followed >= max_offers:
+                # Over this search's share of the crawl budget
+                self.count_search(search, "over_budget")
+                continue
+            self.count_search(search, "followed")
             yield response.follow(
                 offer, 
                 callback=self.parse_details,
@@ -41,10 +112,29 @@ class JobteaserSpider(scrapy.Spider):
                     "playwright_page_methods": [
                         PageMethod("wait_for_selector", 'article[data-testid="jobad-DetailView__Description"]'),
                     ],
-                }
+                    "search": search,
+                },
+                priority=response.request.priority,
             )
 
+    def card_fields(self, link):
+        """Title, company, location, contract type and whole text of the listing card of `link`."""
+        selectors = self.card_filter.selectors
+        cards = link.xpath(selectors["card"]) if selectors.get("card") else []
+        # The link itself when the card is not found around it
+        card = cards[0] if cards else link
+        fields = {}
+        for name in ("title", "company", "location", "contract"):
+            if selectors.get(name):
+                fields[name] = " ".join(text.strip() for text in card.css(selectors[name]).getall() if text.strip())
+        if not fields.get("title"):
+            fields["title"] = " ".join(text.strip() for text in link.css("::text").getall() if text.strip())
+        fields["text"] = " ".join(text.strip() for text in card.css("::text").getall() if text.strip())
+        return fields
+
     def parse_details(self, response):
+        self.new_urls.append(response.request.url)
+        record("offer page", "call", response.meta.get("download_latency", 0.0), url=response.url)
         # Data extraction using the stable data-testid selectors from your HTML file
         description_parts = response.css('article[data-testid="jobad-DetailView__Description"] ::text').getall()
         clean_content = " ".join([text.strip() for text in description_parts if text.strip()])
@@ -54,5 +144,6 @@ class JobteaserSpider(scrapy.Spider):
             'name': response.css('h1[data-testid="jobad-DetailView__Heading__title"]::text').get(default='').strip(),
             'company': response.css('h2[data-testid="jobad-DetailView__Heading__company_name"]::text').get(default='').strip(),
             'location': response.css('p[data-testid="jobad-DetailView__CandidacyDetails__Locations"]::text').get(default='').strip(),
-            'content': clean_content
+            'content': clean_content,
+            'search': response.meta.get("search"),
         }
\ No newline at end of file
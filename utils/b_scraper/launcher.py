@@ -2,6 +2,7 @@ import os
 from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
 from utils.b_scraper.job_scraper.spiders.job_teaser_spider import JobteaserSpider
+from utils.b_scraper.search_stats import read_links, plan_crawl, record_crawl, crawl_summary
 
 def run_scraper(date):
     #Tell Scrapy where the settings are relative to your main.py
@@ -22,7 +23,14 @@ def run_scraper(date):
         }
     })
 
+    # Crawl effort per search from the yield of the earlier runs
+    links = read_links()
+    plan = plan_crawl(links) if links else None
+
     process = CrawlerProcess(settings)
-    process.crawl(JobteaserSpider)
+    crawler = process.create_crawler(JobteaserSpider)
+    process.crawl(crawler, links=plan)
     process.start()
+    record_crawl(date, crawler.spider.search_counts)
+    print(f"  [INFO] {crawl_summary(crawler.spider.search_counts)}")
    
\ No newline at end of file
@@ -0,0 +1,220 @@
+import os
+import json
+import datetime
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+# Crawl yield of each search URL of links.txt, kept across runs in
+# outputs/cache/search_stats.json. The scrape stage records per search: the
+# offer cards listed, those already seen, skipped by the card filter,
+# followed or left over budget, the offers it brought and how many were new
+# or duplicates of another search. The score stage adds the average and best
+# LLM (skills) score of those offers and how many reached the top of
+# scoring.json. plan_crawl() turns this into the next crawl plan: high-yield
+# searches go first and may render more offer pages; searches whose offers
+# never score well get fewer pages and are only crawled every few runs.
+# Browser time goes where the good offers are.
+
+STATS_PATH = os.path.join("outputs", "cache", "search_stats.json")
+LINKS_PATH = os.path.join("utils", "b_scraper", "links.txt")
+
+# Offer pages rendered per run, shared between the searches (0 = no limit)
+CRAWL_BUDGET = int(os.environ.get("JOBOT_CRAWL_BUDGET", "60"))
+# Offer pages a crawled search gets at least
+MIN_OFFERS = 5
+# Searches under this share of the best yield are skipped some runs: up to
+# MAX_SKIPPED_RUNS in a row for a search without yield
+SKIP_BELOW = 0.25
+MAX_SKIPPED_RUNS = 3
+# Offers in the first TOP_N of scoring.json count as good
+TOP_N = 10
+# New offers count this much of a good offer in the yield
+NEW_OFFER_WEIGHT = 0.1
+# Weight of a run in the yield drops by this factor per newer run
+DECAY = 0.7
+# Runs kept per search
+HISTORY = 10
+
+_lock = threading.Lock()
+
+
+def read_links(path: str = LINKS_PATH) -> list | None:
+    """Search URLs of links.txt; None if it is missing."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def search_label(url: str) -> str:
+    """Short name of a search URL for the logs: its query, else its path."""
+    query = parse_qs(urlsplit(url).query).get("q")
+    return f"q={query[0]}" if query else urlsplit(url).path
+
+
+def load_stats() -> dict:
+    if not os.path.exists(STATS_PATH):
+        return {}
+    try:
+        with open(STATS_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"  [WARN] Ignoring unreadable search stats: {STATS_PATH}")
+        return {}
+
+
+def _save_stats(stats: dict):
+    os.makedirs(os.path.dirname(STATS_PATH), exist_ok=True)
+    with open(STATS_PATH + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    os.replace(STATS_PATH + ".tmp", STATS_PATH)
+
+
+# ═══════════════════════════════════════════════════════════════
+#  YIELD AND PLAN
+# ═══════════════════════════════════════════════════════════════
+
+def search_yield(entry: dict | None) -> float | None:
+    """
+    Good offers (plus a little for new ones) per crawl, recent runs weighing
+    more; None until a crawl of the search has been scored.
+    """
+    if not entry:
+        return None
+    scored = [run for _, run in sorted(entry["runs"].items(), reverse=True) if "top_offers" in run]
+    if not scored:
+        return None
+    weights = [DECAY ** age for age in range(len(scored))]
+    total = sum(weight * (run["top_offers"] + NEW_OFFER_WEIGHT * run.get("new", 0))
+                for weight, run in zip(weights, scored))
+    return total / sum(weights)
+
+
+def plan_crawl(links: list, budget: int = CRAWL_BUDGET) -> list:
+    """
+    [{"url", "max_offers", "priority"}] of the searches to crawl this run,
+    best first. Searches never scored are explored with the best share;
+    the others share `budget` offer pages by yield, and low-yield ones are
+    skipped for up to MAX_SKIPPED_RUNS runs in a row. Records the skips.
+    """
+    with _lock:
+        stats = load_stats()
+        yields = {url: search_yield(stats.get(url)) for url in links}
+        best = max([value for value in yields.values() if value is not None] or [0.0])
+        # Unknown searches get the best share; without any yield, all are equal
+        shares = {url: 1.0 if value is None or not best else value / best for url, value in yields.items()}
+
+        plan, skipped = [], []
+        for url in links:
+            wait = round(max(0.0, 1 - shares[url] / SKIP_BELOW) * MAX_SKIPPED_RUNS)
+            if stats.get(url, {}).get("skipped", 0) < wait:
+                skipped.append(url)
+            else:
+                plan.append(url)
+        if not plan:
+            # Never skip everything: crawl the search skipped the longest
+            url = max(skipped, key=lambda url: (stats[url]["skipped"], shares[url]))
+            skipped.remove(url)
+            plan.append(url)
+
+        for url in links:
+            entry = stats.setdefault(url, {"skipped": 0, "runs": {}})
+            entry["skipped"] = entry["skipped"] + 1 if url in skipped else 0
+        _save_stats(stats)
+
+    total_share = sum(shares[url] for url in plan)
+    entries = []
+    for url in sorted(plan, key=lambda url: shares[url], reverse=True):
+        max_offers = None
+        if budget:
+            max_offers = max(MIN_OFFERS, round(budget * shares[url] / total_share))
+        entries.append({"url": url, "max_offers": max_offers, "priority": round(100 * shares[url])})
+        value = "not scored yet" if yields[url] is None else f"yield {yields[url]:.1f}"
+        print(f"  [INFO] Search {search_label(url)}: up to {max_offers or 'all'} offers ({value})")
+    for url in skipped:
+        print(f"  [INFO] Search {search_label(url)}: skipped this run (yield {yields[url]:.1f})")
+    return entries
+
+
+# ═══════════════════════════════════════════════════════════════
+#  FEEDBACK
+# ═══════════════════════════════════════════════════════════════
+
+def _run_offers(date: str) -> dict:
+    """{search URL: [offer IDs]} of a run's internships.json."""
+    path = os.path.join("outputs", f"data[{date}]", "internships.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        offers = json.load(f)
+    by_search = {}
+    for offer in offers:
+        if offer.get("search") and offer.get("id"):
+            by_search.setdefault(offer["search"], []).append(offer["id"])
+    return by_search
+
+
+def crawl_summary(counts: dict) -> str:
+    """One line on where the offer cards of a crawl went."""
+    total = {key: sum(search.get(key, 0) for search in counts.values())
+             for key in ("cards", "already_seen", "filtered", "over_budget", "followed")}
+    return (f"{total['cards']} offer cards: {total['followed']} pages rendered, {total['filtered']} skipped by the "
+            f"card filter, {total['already_seen']} already seen, {total['over_budget']} over budget")
+
+
+def record_crawl(date: str, counts: dict):
+    """
+    Record a run's crawl: `counts` is the spider's {search URL: {"cards",
+    "already_seen", "filtered", "followed", "over_budget", "duplicates"}}.
+    An offer is new if no earlier run of the search brought it.
+    """
+    offers = _run_offers(date)
+    with _lock:
+        stats = load_stats()
+        for url, search_counts in counts.items():
+            entry = stats.setdefault(url, {"skipped": 0, "runs": {}})
+            ids = offers.get(url, [])
+            known = {offer for run_date, run in entry["runs"].items() if run_date != date for offer in run["ids"]}
+            entry["runs"][date] = {
+                **search_counts,
+                "offers": len(ids),
+                "new": sum(offer not in known for offer in ids),
+                "ids": ids,
+                "crawled": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            for old in sorted(entry["runs"])[:-HISTORY]:
+                del entry["runs"][old]
+        _save_stats(stats)
+
+
+def record_scores(date: str, scoring_paths: list):
+    """
+    Add a run's scores to the crawl stats of its searches: average and best
+    LLM score of their offers, and how many reached the TOP_N of a scoring
+    (the best candidate counts in batch mode).
+    """
+    offers = _run_offers(date)
+    skills, top = {}, set()
+    for path in scoring_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            scoring = json.load(f)["scoring"]
+        for rank, entry in enumerate(scoring):
+            if rank < TOP_N:
+                top.add(entry["id"])
+            score = entry.get("details", {}).get("skills")
+            if score is not None:
+                skills[entry["id"]] = max(score, skills.get(entry["id"], score))
+
+    with _lock:
+        stats = load_stats()
+        for url, entry in stats.items():
+            run = entry["runs"].get(date)
+            if run is None:
+                continue
+            # A search that brought nothing new this run scores 0
+            ids = offers.get(url, [])
+            scores = [skills[offer] for offer in ids if offer in skills]
+            run["avg_score"] = round(sum(scores) / len(scores), 1) if scores else None
+            run["top_score"] = max(scores, default=None)
+            run["top_offers"] = sum(offer in top for offer in ids)
+        _save_stats(stats)
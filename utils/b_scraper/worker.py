@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import time
+import threading
+
+# Crawl worker for the daemon mode (python -m utils.b_scraper.worker).
+# CrawlerProcess cannot be started twice in one process, so the worker runs
+# ONE crawler that never closes: its spider waits idle between cycles and the
+# Playwright browser stays open. Commands come as JSON lines on stdin:
+#   {"cmd": "crawl", "output": "outputs/data[...]/internships.json", "seen": [url, ...],
+#    "links": [search url or crawl plan entry, ...] (optional, default: links.txt)}
+#   {"cmd": "stop"}
+# and every reply is one JSON line on stdout ("ready", "done", "error").
+
+os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'utils.b_scraper.job_scraper.settings')
+
+from scrapy.utils.reactor import install_reactor
+install_reactor("twisted.internet.asyncioreactor.AsyncioSelectorReactor")
+
+from twisted.internet import reactor
+from scrapy import signals
+from scrapy.crawler import CrawlerRunner
+from scrapy.exceptions import DontCloseSpider
+from scrapy.utils.log import configure_logging
+from scrapy.utils.project import get_project_settings
+from utils.b_scraper.job_scraper.spiders.job_teaser_spider import JobteaserSpider
+
+
+class CrawlWorker:
+    def __init__(self, replies):
+        self.replies = replies
+        settings = get_project_settings()
+        configure_logging(settings)
+        self.runner = CrawlerRunner(settings)
+        self.crawler = self.runner.create_crawler(JobteaserSpider)
+        self.crawler.signals.connect(self.item_scraped, signal=signals.item_scraped)
+        self.crawler.signals.connect(self.spider_idle, signal=signals.spider_idle)
+        self.cycle = None
+        self.stopping = False
+
+    def reply(self, event: str, **fields):
+        self.replies.write(json.dumps({"event": event, **fields}) + "\n")
+        self.replies.flush()
+
+    # ─── Reactor thread ──────────────────────────────────────────
+
+    def run(self):
+        done = self.runner.crawl(self.crawler, daemon=True)
+        done.addBoth(lambda _: reactor.stop())
+        reactor.callWhenRunning(self.reply, "ready")
+        threading.Thread(target=self.read_commands, daemon=True).start()
+        reactor.run()
+
+    def start_cycle(self, output: str, seen: list, links: list | None = None):
+        if self.cycle is not None:
+            self.reply("error", message="a crawl is already running")
+            return
+        spider = self.crawler.spider
+        # Duplicates are dropped within this cycle only: an offer scraped by an
+        # earlier job or past its TTL in seen_offers.json is exported again
+        spider.start_cycle(seen)
+        self.cycle = {"output": output, "items": [], "start": time.time(),
+                      "skipped": self.crawler.stats.get_value("jobot/offers_already_seen", 0)}
+        for request in spider.search_requests(links):
+            self.crawler.engine.crawl(request)
+
+    def item_scraped(self, item, response, spider):
+        if self.cycle is not None:
+            self.cycle["items"].append(dict(item))
+
+    def spider_idle(self, spider):
+        if self.cycle is not None:
+            self.finish_cycle(spider)
+        if not self.stopping:
+            raise DontCloseSpider
+
+    def finish_cycle(self, spider):
+        cycle, self.cycle = self.cycle, None
+        # Same file as the FEEDS export of a one-shot crawl
+        with open(cycle["output"], "w", encoding="utf-8") as f:
+            json.dump(cycle["items"], f, ensure_ascii=False, indent=4)
+        skipped = self.crawler.stats.get_value("jobot/offers_already_seen", 0) - cycle["skipped"]
+        self.reply("done", offers=len(cycle["items"]), skipped=skipped, new_urls=spider.new_urls,
+                   searches=spider.search_counts, seconds=round(time.time() - cycle["start"], 1))
+
+    def stop(self):
+        self.stopping = True
+        self.crawler.stop()
+
+    # ─── Command thread ──────────────────────────────────────────
+
+    def read_commands(self):
+        for line in sys.stdin:
+            try:
+                command = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if command.get("cmd") == "crawl":
+                reactor.callFromThread(self.start_cycle, command["output"], command.get("seen", []),
+                                       command.get("links"))
+            elif command.get("cmd") == "stop":
+                break
+        # stdin closed (the daemon exited) or stop requested
+        reactor.callFromThread(self.stop)
+
+
+def main():
+    # Keep stdout for replies only: anything else printing there (Scrapy,
+    # the Playwright driver) goes to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    CrawlWorker(replies).run()
+
+
+if __name__ == "__main__":
+    main()
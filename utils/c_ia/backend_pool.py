@@ -0,0 +1,138 @@
+import time
+import threading
+import requests
+
+# Ollama servers behind query_ollama() (OLLAMA_BACKENDS, comma-separated URLs;
+# default OLLAMA_HOST). Each request goes to the healthy backend with the
+# fewest requests in flight, preferring the backends that already hold the
+# model in memory (affinity): a model stays warm where it runs instead of
+# being loaded on every box. A backend that fails is marked down and the
+# request moves on to another one at once; a down backend is checked again
+# (GET /api/ps, which also lists the models it holds) once its cooldown is
+# over. With a single backend this is the old behaviour: wait, then retry it.
+# A backend that answers 404 for a model has not pulled it: requests for that
+# model skip it for a cooldown, the others still go there.
+
+HEALTH_TIMEOUT = 3
+# Seconds a failed backend is left alone before its next health check
+HEALTH_COOLDOWN = 30
+# A backend holding the model is still chosen with this many more requests in flight than a cold one
+AFFINITY_SLOTS = 2
+
+
+class Backend:
+    def __init__(self, url: str):
+        self.url = url.strip().rstrip("/")
+        self.outstanding = 0
+        self.healthy = True
+        # When a down backend gets its next health check
+        self.retry_at = 0.0
+        # Models it holds in memory (from /api/ps and the requests it served)
+        self.models = set()
+        # {model: time until which it is taken as not pulled here}
+        self.missing = {}
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def generate_url(self) -> str:
+        return f"{self.url}/api/generate"
+
+    def status(self) -> dict:
+        return {"url": self.url, "healthy": self.healthy, "outstanding": self.outstanding,
+                "models": sorted(self.models), "missing": sorted(self.missing),
+                "requests": self.requests, "failures": self.failures}
+
+    def serves(self, model: str, now: float) -> bool:
+        """False while `model` is taken as not pulled on this backend."""
+        return self.missing.get(model, 0.0) <= now
+
+
+class BackendPool:
+    def __init__(self, urls: list, cooldown: float = HEALTH_COOLDOWN):
+        if not urls:
+            raise ValueError("no Ollama backend")
+        self.backends = [Backend(url) for url in urls]
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def check(self, backend: Backend) -> bool:
+        """Health check: is the backend up, and which models does it hold?"""
+        try:
+            response = requests.get(f"{backend.url}/api/ps", timeout=HEALTH_TIMEOUT)
+            response.raise_for_status()
+            models = {model.get("name") or model.get("model") for model in response.json().get("models", [])}
+        except (requests.exceptions.RequestException, ValueError):
+            with self.lock:
+                backend.healthy = False
+                backend.retry_at = time.time() + self.cooldown
+            return False
+        with self.lock:
+            backend.healthy = True
+            backend.models = models
+        return True
+
+    def check_all(self):
+        for backend in self.backends:
+            self.check(backend)
+
+    def acquire(self, model: str, exclude: list = ()) -> Backend:
+        """
+        Backend for one request of `model`, counted as in flight until
+        release(). Skips the `exclude`d backends (already failed for this
+        request) and those without the model unless no other is left; when
+        every backend is down, the one due for a health check first is tried
+        anyway.
+        """
+        now = time.time()
+        for backend in self.backends:
+            if not backend.healthy and backend.retry_at <= now and backend not in exclude:
+                self.check(backend)
+        with self.lock:
+            candidates = [b for b in self.backends if b.healthy and b not in exclude and b.serves(model, now)]
+            if candidates:
+                backend = min(candidates, key=lambda b: (
+                    b.outstanding - (AFFINITY_SLOTS if model in b.models else 0), b.requests))
+            else:
+                left = [b for b in self.backends if b not in exclude] or self.backends
+                backend = min(left, key=lambda b: b.retry_at)
+            backend.outstanding += 1
+            backend.requests += 1
+        return backend
+
+    def release(self, backend: Backend, model: str | None = None):
+        """End of a request; `model` if it succeeded (the backend now holds it)."""
+        with self.lock:
+            backend.outstanding -= 1
+            if model:
+                backend.models.add(model)
+
+    def mark_loaded(self, backend: Backend, model: str):
+        with self.lock:
+            backend.models.add(model)
+
+    def mark_missing(self, backend: Backend, model: str):
+        """The backend answered 404 for `model`: it has not pulled it."""
+        with self.lock:
+            backend.models.discard(model)
+            backend.missing[model] = time.time() + self.cooldown
+
+    def mark_failed(self, backend: Backend):
+        with self.lock:
+            backend.failures += 1
+            backend.healthy = False
+            backend.retry_at = time.time() + self.cooldown
+
+    def has_other(self, exclude: list, model: str | None = None) -> bool:
+        """Is a backend outside `exclude` (with `model`) up or due for a health check?"""
+        now = time.time()
+        with self.lock:
+            return any(b not in exclude and (b.healthy or b.retry_at <= now) and (not model or b.serves(model, now))
+                       for b in self.backends)
+
+    def status(self) -> list:
+        with self.lock:
+            return [backend.status() for backend in self.backends]
@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from utils.c_ia.company_prestige import normalize_company
+from utils.c_ia.prompt_budget import count_tokens, split_sections, _truncate_to_tokens
+
+# Cross-offer boilerplate stripping: sentences of the "about us", diversity
+# and benefits blocks that recur in several offers of the same employer are
+# removed from each offer before prompt building, and kept once as a
+# per-company summary. Missions, profile and dates are never touched: the
+# requirements a firm repeats in all its postings still reach the scoring
+# prompt. Sentence counts are remembered across runs, so a company seen with
+# one offer today is still cleaned using yesterday's crawl.
+
+BOILERPLATE_STORE_PATH = os.path.join("outputs", "cache", "boilerplate.json")
+
+# A sentence is boilerplate when found in at least this many distinct offers
+MIN_OFFERS = 2
+# Shorter sentences ("Missions :", "Profil") are never stripped
+MIN_SENTENCE_CHARS = 40
+# Size of the per-company summary put once in the match prompt
+SUMMARY_TOKENS = 120
+# Offers remembered per company in the store (oldest are forgotten)
+MAX_OFFERS_PER_COMPANY = 200
+# Sections of split_sections() whose recurring sentences are stripped
+STRIPPED_SECTIONS = ("company", "benefits")
+
+_store_lock = threading.Lock()
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+(?=[^a-zà-ÿ\s])")
+
+
+def split_sentences(content: str) -> list:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(content or "") if s.strip()]
+
+
+def _fingerprint(sentence: str) -> str:
+    normalized = re.sub(r"\W+", " ", sentence.lower()).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_store() -> dict:
+    if not os.path.exists(BOILERPLATE_STORE_PATH):
+        return {}
+    try:
+        with open(BOILERPLATE_STORE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"  [WARN] Ignoring unreadable boilerplate store: {BOILERPLATE_STORE_PATH}")
+        return {}
+
+
+def _save_store(store: dict):
+    os.makedirs(os.path.dirname(BOILERPLATE_STORE_PATH), exist_ok=True)
+    with open(BOILERPLATE_STORE_PATH + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(store, f)
+    os.replace(BOILERPLATE_STORE_PATH + ".tmp", BOILERPLATE_STORE_PATH)
+
+
+def _strippable_sentences(content: str) -> list:
+    """Sentences of the about-us, diversity and benefits blocks of an offer."""
+    return [sentence for name, _, text in split_sections(content) if name in STRIPPED_SECTIONS
+            for sentence in split_sentences(text)]
+
+
+def _update_store(store: dict, company: str, offers: list):
+    """Record the sentence fingerprints of offers not seen before for this company."""
+    entry = store.setdefault(company, {"offers": {}})
+    for offer in offers:
+        if offer["id"] in entry["offers"]:
+            continue
+        fingerprints = {
+            _fingerprint(s) for s in _strippable_sentences(offer.get("content", ""))
+            if len(s) >= MIN_SENTENCE_CHARS
+        }
+        entry["offers"][offer["id"]] = sorted(fingerprints)
+
+    # Forget the oldest offers (dicts keep insertion order)
+    overflow = len(entry["offers"]) - MAX_OFFERS_PER_COMPANY
+    for offer_id in list(entry["offers"])[:max(0, overflow)]:
+        del entry["offers"][offer_id]
+
+
+def _recurring_fingerprints(entry: dict) -> set:
+    counts = {}
+    for fingerprints in entry["offers"].values():
+        for fingerprint in fingerprints:
+            counts[fingerprint] = counts.get(fingerprint, 0) + 1
+    return {fingerprint for fingerprint, count in counts.items() if count >= MIN_OFFERS}
+
+
+def strip_boilerplate(offers: list) -> tuple[dict, dict, dict]:
+    """
+    Remove recurring employer sentences from the about-us, diversity and
+    benefits blocks of every offer.
+    Returns ({id: cleaned offer copy}, {company: summary}, report).
+    """
+    by_company = {}
+    for offer in offers:
+        by_company.setdefault(normalize_company(offer.get("company", "")), []).append(offer)
+
+    # Concurrent runs (HTTP service, daemon and CLI) merge into the latest store
+    with _store_lock:
+        store = _load_store()
+        recurring_by_company = {}
+        for company, company_offers in by_company.items():
+            if company:
+                _update_store(store, company, company_offers)
+                recurring_by_company[company] = _recurring_fingerprints(store[company])
+        _save_store(store)
+
+    cleaned = {}
+    summaries = {}
+    tokens_before = 0
+    tokens_after = 0
+    for company, company_offers in by_company.items():
+        recurring = recurring_by_company.get(company, set())
+
+        summary_sentences = []
+        for offer in company_offers:
+            kept = []
+            for name, _, text in split_sections(offer.get("content", "")):
+                if name not in STRIPPED_SECTIONS:
+                    kept.append(text)
+                    continue
+                for sentence in split_sentences(text):
+                    if len(sentence) >= MIN_SENTENCE_CHARS and _fingerprint(sentence) in recurring:
+                        if sentence not in summary_sentences:
+                            summary_sentences.append(sentence)
+                    else:
+                        kept.append(sentence)
+            content = " ".join(kept)
+            cleaned[offer["id"]] = {**offer, "content": content}
+            tokens_before += count_tokens(offer.get("content", ""))
+            tokens_after += count_tokens(content)
+
+        if summary_sentences:
+            display_name = company_offers[0].get("company", company)
+            summaries[display_name] = _truncate_to_tokens(" ".join(summary_sentences), SUMMARY_TOKENS)
+
+    report = {
+        "offers": len(offers),
+        "companies_with_boilerplate": len(summaries),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
+    return cleaned, summaries, report
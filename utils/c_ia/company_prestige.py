@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import difflib
+import threading
+import unicodedata
+from functools import lru_cache
+
+# Company prestige (20 pts) from a versioned local table. Companies missing
+# from the table are tiered once by the LLM and stored in the on-disk cache.
+
+TIERS_TABLE_PATH = os.path.join(os.path.dirname(__file__), "data", "company_tiers.json")
+TIER_CACHE_PATH = os.path.join("outputs", "cache", "company_tiers.json")
+
+PRESTIGE_MAX_POINTS = 20
+FUZZY_CUTOFF = 0.88
+
+# Words that do not identify a company: legal forms, countries, "group"...
+_NOISE_WORDS = {
+    "sa", "sas", "sasu", "sarl", "se", "inc", "ltd", "llc", "plc", "gmbh", "ag", "nv", "bv",
+    "group", "groupe", "the", "company", "co", "corp", "corporation", "holding", "holdings",
+    "international", "france", "french", "europe", "emea", "global", "services",
+}
+_LINK_WORDS = {"de", "du", "des", "of"}
+
+
+def normalize_company(name: str) -> str:
+    """Normalize a company name: no accents, no punctuation, no legal/geo suffixes."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    words = text.split()
+
+    while len(words) > 1 and words[0] in _NOISE_WORDS:
+        words.pop(0)
+    # Trailing noise goes, unless it is part of the name ("Banque de France")
+    while len(words) > 1 and words[-1] in _NOISE_WORDS and words[-2] not in _LINK_WORDS:
+        words.pop()
+        if len(words) > 1 and words[-1] in ("en", "in"):
+            words.pop()
+    return " ".join(words)
+
+
+@lru_cache(maxsize=1)
+def _load_table() -> dict:
+    with open(TIERS_TABLE_PATH, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    # Keys are stored normalized so lookups are plain dict hits
+    table["companies"] = {normalize_company(k): v for k, v in table["companies"].items()}
+    table["aliases"] = {normalize_company(k): normalize_company(v) for k, v in table["aliases"].items()}
+    return table
+
+
+def table_version() -> int:
+    return _load_table()["version"]
+
+
+_tier_cache: dict | None = None
+_save_lock = threading.Lock()
+
+
+def _get_tier_cache() -> dict:
+    """Load the on-disk tier decisions; table-derived ones are dropped when the table changes."""
+    global _tier_cache
+    if _tier_cache is None:
+        _tier_cache = {}
+        if os.path.exists(TIER_CACHE_PATH):
+            try:
+                with open(TIER_CACHE_PATH, "r", encoding="utf-8") as f:
+                    entries = json.load(f).get("companies", {})
+            except (OSError, json.JSONDecodeError):
+                print(f"  [WARN] Ignoring unreadable tier cache: {TIER_CACHE_PATH}")
+                entries = {}
+            version = table_version()
+            _tier_cache = {
+                key: entry for key, entry in entries.items()
+                if entry.get("source") == "llm" or entry.get("table_version") == version
+            }
+    return _tier_cache
+
+
+def save_tier_cache():
+    """Write the tier decisions back to disk."""
+    if _tier_cache is None:
+        return
+    os.makedirs(os.path.dirname(TIER_CACHE_PATH), exist_ok=True)
+    # Stages of concurrent runs (HTTP service) can save at the same time
+    with _save_lock:
+        with open(TIER_CACHE_PATH + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"table_version": table_version(), "companies": dict(_tier_cache)}, f,
+                      ensure_ascii=False, indent=2)
+        os.replace(TIER_CACHE_PATH + ".tmp", TIER_CACHE_PATH)
+
+
+def _resolve_in_table(key: str) -> str | None:
+    table = _load_table()
+    companies = table["companies"]
+    key = table["aliases"].get(key, key)
+    if key in companies:
+        return companies[key]
+
+    # Subsidiaries and divisions: "credit agricole cib", "capgemini engineering".
+    # Canonical names only: aliases such as "total" or "sg" would also match
+    # "Total Recall" or "SG Conseil", so they have to be the whole name.
+    words = key.split()
+    for end in range(len(words) - 1, 0, -1):
+        prefix = " ".join(words[:end])
+        if prefix in companies:
+            return companies[prefix]
+
+    close = difflib.get_close_matches(key, list(companies) + list(table["aliases"]), n=1, cutoff=FUZZY_CUTOFF)
+    if close:
+        return companies.get(table["aliases"].get(close[0], close[0]))
+    return None
+
+
+@lru_cache(maxsize=1024)
+def lookup_tier(company: str) -> str | None:
+    """Return the tier of a company ("top", "large", "mid", "small") or None if unknown."""
+    key = normalize_company(company)
+    if not key:
+        return None
+    cache = _get_tier_cache()
+    if key in cache:
+        return cache[key]["tier"]
+
+    tier = _resolve_in_table(key)
+    if tier is not None:
+        cache[key] = {"tier": tier, "source": "table", "table_version": table_version()}
+    return tier
+
+
+def prestige_points(company: str) -> int | None:
+    """Prestige points of a company, or None when its tier is unknown."""
+    tier = lookup_tier(company)
+    if tier is None:
+        return None
+    return _load_table()["tiers"].get(tier)
+
+
+def unknown_companies(companies: list) -> list:
+    """Companies (deduplicated, original spelling) with no known tier."""
+    seen = set()
+    unknown = []
+    for company in companies:
+        key = normalize_company(company)
+        if key and key not in seen and lookup_tier(company) is None:
+            seen.add(key)
+            unknown.append(company)
+    return unknown
+
+
+def record_llm_tiers(tiers: dict):
+    """Store LLM-derived tiers ({company: tier}) so they are never asked again."""
+    valid = _load_table()["tiers"]
+    cache = _get_tier_cache()
+    for company, tier in tiers.items():
+        if tier in valid:
+            cache[normalize_company(company)] = {"tier": tier, "source": "llm"}
+    lookup_tier.cache_clear()
+    save_tier_cache()
@@ -1,142 +1,473 @@
 import os
+import re
 import json
-from utils.c_ia.ollama_client import query_ollama
-from utils.c_ia.prompt_builder import build_scoring_prompt, build_match_prompt
+import glob
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.offer_ids import index_offers
+from utils.tracing import span, traced
+from utils.threads import in_context
+from utils.c_ia.ollama_client import query_ollama, get_pool, NUM_CTX, NUM_PREDICT
+from utils.c_ia.prompt_budget import pack_offers, scoring_predict_tokens, budget_report
+from utils.c_ia.prompt_builder import (
+    build_scoring_prompt, build_match_prompt, build_prestige_prompt, scoring_prefix, scoring_static_tokens,
+)
+from utils.c_ia.local_features import extract_features, save_feature_cache, score_features, DEFAULT_TARGETS
+from utils.c_ia.boilerplate import strip_boilerplate
+from utils.c_ia.offer_tags import load_tags, matched_skills
+from utils.c_ia.company_prestige import unknown_companies, record_llm_tiers, prestige_points, save_tier_cache
+from utils.c_ia.schemas import (
+    scoring_schema, match_schema, prestige_schema,
+    validate_scoring, validate_match, validate_prestige, parse_json_response,
+)
 
+# Follow-up calls allowed for items missing from a model answer
+MAX_REPAIR_ROUNDS = 2
+# Matched CV skills listed per offer in the scoring prompt
+PROMPT_SKILLS = 8
 
-def run_ia(date: str):
+DEFAULT_CV_PATH = os.path.join("inputs", "cv.json")
+# One JSON file per candidate for batch mode: {"cv": path or CV dict, "user_prompt": ..., "targets": ...}
+PROFILES_DIR = os.path.join("inputs", "profiles")
+# Candidates processed at the same time in batch mode per Ollama backend, so
+# that several requests are always queued on each server (match OLLAMA_NUM_PARALLEL)
+BATCH_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4"))
+
+# What the AI should focus on
+DEFAULT_USER_PROMPT = (
+    "Je suis Hugo MANIPOUD, étudiant en 5ème année d'école d'ingénieur à l'ECAM Lyon. "
+    "Je cherche un stage de fin d'études de 4 à 6 mois à partir de juin 2026, "
+    "dans le domaine de la Data (Data Analyst, Data Engineer, Data Science) "
+    "OU de la Supply Chain (planification, logistique, gestion des stocks, prévision de la demande). "
+    "Je maîtrise Python, Excel avancé, pandas, numpy, matplotlib, seaborn, scikitlearn, "
+    "et j'ai une expérience en supply chain (stage chez Arrow, stage chez Amazon). "
+    "Je suis basé à Lyon mais mobile en France. "
+    "Privilégier les offres qui matchent mes compétences data ET/OU supply chain."
+)
+
+
+def run_ia(date: str, cv_path: str = DEFAULT_CV_PATH, user_prompt: str = DEFAULT_USER_PROMPT,
+           targets: dict = DEFAULT_TARGETS) -> bool:
     """
-    Main entry point for the IA module.
-    1. Load CV and scraped internships
-    2. Send scoring prompt to Ollama → get all scores
+    Main entry point for the IA module: scoring stage, then match stage.
+    1. Load the CV and scraped internships, strip employer boilerplate,
+       extract candidate-independent features and prestige (see load_corpus)
+    2. Compute location / level / period points for this candidate,
+       send scoring prompt to Ollama for skills only → merge into final scores
     3. Extract top 5
     4. Send match prompt to Ollama → get detailed match + cover letters
     5. Save both JSON files to outputs/data[{date}]/
     """
+    return run_scoring(date, cv_path, user_prompt, targets) and run_match(date, cv_path, user_prompt)
+
+
+def run_scoring(date: str, cv_path: str = DEFAULT_CV_PATH, user_prompt: str = DEFAULT_USER_PROMPT,
+                targets: dict = DEFAULT_TARGETS) -> bool:
+    """Scoring stage: score every offer and write outputs/data[{date}]/scoring.json."""
 
     print("=" * 60)
-    print("[C_IA] Starting AI analysis...")
+    print("[C_IA] Starting AI scoring...")
     print("=" * 60)
 
-    # ─── 1. Load input data ──────────────────────────────────────
-    cv_path = os.path.join("inputs", "cv.json")
-    internships_path = os.path.join("outputs", f"data[{date}]", "internships.json")
+    cv_data = _load_cv(cv_path)
+    if cv_data is None:
+        return False
+    corpus = load_corpus(date)
+    if corpus is None:
+        return False
+
+    return score_candidate(corpus, cv_data, user_prompt, targets, os.path.join("outputs", f"data[{date}]")) is not None
+
+
+def run_match(date: str, cv_path: str = DEFAULT_CV_PATH, user_prompt: str = DEFAULT_USER_PROMPT) -> bool:
+    """Match stage: cover letters for the top offers of an existing scoring.json."""
+
+    print("=" * 60)
+    print("[C_IA] Starting AI match...")
+    print("=" * 60)
+
+    output_dir = os.path.join("outputs", f"data[{date}]")
+    scoring_path = os.path.join(output_dir, "scoring.json")
+    if not os.path.exists(scoring_path):
+        print(f"  [ERROR] Scoring file not found: {scoring_path}")
+        return False
+    with open(scoring_path, "r", encoding="utf-8") as f:
+        scoring_list = json.load(f).get("scoring", [])
+    if any("id" not in offer for offer in scoring_list):
+        print(f"  [ERROR] {scoring_path} has no offer IDs (older format) — run the scoring stage again")
+        return False
+
+    cv_data = _load_cv(cv_path)
+    if cv_data is None:
+        return False
+    corpus = load_corpus(date, with_scoring_inputs=False)
+    if corpus is None:
+        return False
+
+    if not match_candidate(corpus, cv_data, user_prompt, scoring_list, output_dir):
+        return False
+    print("\n" + "=" * 60)
+    print("[C_IA] AI analysis complete!")
+    print("=" * 60)
+    return True
+
+
+def run_ia_batch(date: str, profiles_dir: str = PROFILES_DIR, parallel: int | None = None) -> bool:
+    """
+    Score every candidate profile of `profiles_dir` against the same scraped corpus.
+    Offer-side work is done once; candidates run concurrently so their
+    Ollama requests are scheduled together.
+    Outputs go into outputs/data[{date}]/candidates/<profile name>/
+    """
+
+    print("=" * 60)
+    print("[C_IA] Starting batch AI analysis...")
+    print("=" * 60)
+
+    profiles = load_profiles(profiles_dir)
+    if not profiles:
+        print(f"  [ERROR] No candidate profile found in {profiles_dir}")
+        return False
+    print(f"  [INFO] Loaded {len(profiles)} candidate profiles from {profiles_dir}")
+
+    corpus = load_corpus(date)
+    if corpus is None:
+        return False
+
+    candidates_dir = os.path.join("outputs", f"data[{date}]", "candidates")
+    if parallel is None:
+        parallel = BATCH_PARALLEL * len(get_pool())
+    done, failed = [], []
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        futures = {
+            pool.submit(in_context(run_candidate), corpus, profile["cv"], profile["user_prompt"], profile["targets"],
+                        os.path.join(candidates_dir, profile["name"]), profile["name"]): profile["name"]
+            for profile in profiles
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"  [ERROR] [{name}] {e}")
+                ok = False
+            (done if ok else failed).append(name)
+
+    print("\n" + "=" * 60)
+    print(f"[C_IA] Batch AI analysis complete: {len(done)} candidates done, {len(failed)} failed")
+    if failed:
+        print(f"  [WARN] Failed candidates: {sorted(failed)}")
+    print("=" * 60)
+    return not failed
+
 
+# ═══════════════════════════════════════════════════════════════
+#  INPUTS
+# ═══════════════════════════════════════════════════════════════
+
+def _load_cv(cv_path: str) -> dict | None:
     if not os.path.exists(cv_path):
         print(f"  [ERROR] CV file not found: {cv_path}")
-        return
+        return None
+    with open(cv_path, "r", encoding="utf-8") as f:
+        cv_data = json.load(f)
+    print(f"  [INFO] Loaded CV from {cv_path}")
+    return cv_data
+
+
+def warm_up_prefix(cv_path: str = DEFAULT_CV_PATH, user_prompt: str = DEFAULT_USER_PROMPT) -> str:
+    """Static start of this candidate's scoring prompts, to evaluate while the scraper runs."""
+    if not os.path.exists(cv_path):
+        return ""
+    with open(cv_path, "r", encoding="utf-8") as f:
+        return scoring_prefix(json.load(f), user_prompt)
+
+
+def load_profiles(profiles_dir: str = PROFILES_DIR) -> list:
+    """
+    Read the candidate profiles of `profiles_dir`, sorted by file name.
+    A relative "cv" path is looked up from the working directory, then from `profiles_dir`.
+    """
+    profiles = []
+    for path in sorted(glob.glob(os.path.join(profiles_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        name = re.sub(r"[^\w-]+", "_", os.path.splitext(os.path.basename(path))[0])
+
+        cv = profile.get("cv", DEFAULT_CV_PATH)
+        if isinstance(cv, str):
+            if not os.path.exists(cv) and os.path.exists(os.path.join(profiles_dir, cv)):
+                cv = os.path.join(profiles_dir, cv)
+            cv = _load_cv(cv)
+        if cv is None:
+            print(f"  [WARN] Skipping profile {path}: no CV")
+            continue
+
+        profiles.append({
+            "name": name,
+            "cv": cv,
+            "user_prompt": profile.get("user_prompt", DEFAULT_USER_PROMPT),
+            "targets": {**DEFAULT_TARGETS, **profile.get("targets", {})},
+        })
+    return profiles
+
+
+@traced("load corpus")
+def load_corpus(date: str, with_scoring_inputs: bool = True) -> dict | None:
+    """
+    Load the scraped internships and do all the work that does not depend
+    on the candidate: boilerplate stripping, feature extraction and prestige.
+    Features, prestige and tags are only needed for scoring (`with_scoring_inputs`).
+    """
+    internships_path = os.path.join("outputs", f"data[{date}]", "internships.json")
     if not os.path.exists(internships_path):
         print(f"  [ERROR] Internships file not found: {internships_path}")
-        return
+        return None
 
-    with open(cv_path, "r", encoding="utf-8") as f:
-        cv_data = json.load(f)
     with open(internships_path, "r", encoding="utf-8") as f:
         internships_data = json.load(f)
+    offers_by_id = index_offers(internships_data)
+    print(f"  [INFO] Loaded {len(internships_data)} internships ({len(offers_by_id)} unique) from {internships_path}")
+    if not offers_by_id:
+        print("  [WARN] No internships to analyse. Skipping AI stage.")
+        return None
 
-    print(f"  [INFO] Loaded CV from {cv_path}")
-    print(f"  [INFO] Loaded {len(internships_data)} internships from {internships_path}")
-
-    # ─── 2. User prompt (what the AI should focus on) ────────────
-    user_prompt = (
-        "Je suis Hugo MANIPOUD, étudiant en 5ème année d'école d'ingénieur à l'ECAM Lyon. "
-        "Je cherche un stage de fin d'études de 4 à 6 mois à partir de juin 2026, "
-        "dans le domaine de la Data (Data Analyst, Data Engineer, Data Science) "
-        "OU de la Supply Chain (planification, logistique, gestion des stocks, prévision de la demande). "
-        "Je maîtrise Python, Excel avancé, pandas, numpy, matplotlib, seaborn, scikitlearn, "
-        "et j'ai une expérience en supply chain (stage chez Arrow, stage chez Amazon). "
-        "Je suis basé à Lyon mais mobile en France. "
-        "Privilégier les offres qui matchent mes compétences data ET/OU supply chain."
-    )
+    # Recurring "about us" / benefits sentences are sent once per company
+    prompt_offers, company_summaries, report = strip_boilerplate(list(offers_by_id.values()))
+    print(f"  [INFO] Boilerplate stripped: {report['tokens_saved']} of {report['tokens_before']} content tokens saved "
+          f"({report['companies_with_boilerplate']} companies with recurring text)")
+
+    corpus = {
+        "offers_by_id": offers_by_id,
+        "prompt_offers": prompt_offers,
+        "company_summaries": company_summaries,
+    }
+    if not with_scoring_inputs:
+        return corpus
+
+    features = {offer_id: extract_features(offer) for offer_id, offer in offers_by_id.items()}
+    save_feature_cache()
+    print(f"  [INFO] Extracted location/level/period features for {len(features)} offers")
 
-    # ─── 3. STEP 1: Score all offers ────────────────────────────
-    print("\n  [STEP 1/2] Scoring all offers...")
-    scoring_prompt = build_scoring_prompt(cv_data, internships_data, user_prompt)
-    print(f"  [INFO] Scoring prompt size: ~{len(scoring_prompt)} chars")
+    _resolve_unknown_prestige([offer.get("company", "") for offer in offers_by_id.values()])
+    prestige = {
+        offer_id: prestige_points(offer.get("company", "")) or 0
+        for offer_id, offer in offers_by_id.items()
+    }
 
-    scoring_response = query_ollama(scoring_prompt, temperature=0.2)
+    tags = load_tags(date)
+    if not tags:
+        print("  [WARN] No tags.json in this run: the scoring prompt will not list matched skills")
 
-    # Parse the scoring response
-    try:
-        scoring_result = json.loads(scoring_response)
-    except json.JSONDecodeError as e:
-        print(f"  [ERROR] Failed to parse scoring JSON: {e}")
-        print(f"  [DEBUG] Raw response (first 500 chars): {scoring_response[:500]}")
-        # Attempt to extract JSON from response
-        scoring_result = _try_extract_json(scoring_response)
-        if scoring_result is None:
-            print("  [ERROR] Could not recover scoring data. Aborting.")
-            return
+    return {**corpus, "features": features, "prestige": prestige, "tags": tags}
 
-    scoring_list = scoring_result.get("scoring", [])
-    print(f"  [INFO] Scored {len(scoring_list)} offers")
+
+# ═══════════════════════════════════════════════════════════════
+#  PER-CANDIDATE SCORING AND MATCH
+# ═══════════════════════════════════════════════════════════════
+
+def run_candidate(corpus: dict, cv_data: dict, user_prompt: str, targets: dict, output_dir: str,
+                  name: str = "") -> bool:
+    """Score the corpus for one candidate and write scoring.json / match.json to `output_dir`."""
+    scoring_list = score_candidate(corpus, cv_data, user_prompt, targets, output_dir, name)
+    if scoring_list is None:
+        return False
+    return match_candidate(corpus, cv_data, user_prompt, scoring_list, output_dir, name)
+
+
+@traced("score candidate")
+def score_candidate(corpus: dict, cv_data: dict, user_prompt: str, targets: dict, output_dir: str,
+                    name: str = "") -> list | None:
+    """Score every offer for one candidate, write scoring.json and return the sorted scores."""
+    tag = f"[{name}] " if name else ""
+    offers_by_id = corpus["offers_by_id"]
+    # With the skills of this CV that the tag stage found in each offer
+    prompt_offers = {
+        offer_id: {**offer, "skills": matched_skills(corpus["tags"].get(offer_id), cv_data, PROMPT_SKILLS)}
+        for offer_id, offer in corpus["prompt_offers"].items()
+    }
+
+    # ─── 1. STEP 1: Score all offers ────────────────────────────
+    print(f"\n  {tag}[STEP 1/2] Scoring all offers...")
+    local_by_id = {
+        offer_id: {"prestige": corpus["prestige"][offer_id], **score_features(features, targets)}
+        for offer_id, features in corpus["features"].items()
+    }
+    print(f"  {tag}[INFO] Computed local location/level/period points for {len(local_by_id)} offers")
+
+    # Pack as many offers per request as the context window allows
+    static_tokens = scoring_static_tokens(cv_data, user_prompt)
+    batches = pack_offers(list(prompt_offers.values()), static_tokens, NUM_CTX)
+    print(f"  {tag}[INFO] {len(prompt_offers)} offers packed into {len(batches)} scoring request(s)")
+
+    def score_batch(batch_number: int, batch: list) -> tuple[dict, list]:
+        print(f"\n  {tag}[INFO] Scoring batch {batch_number}/{len(batches)} ({len(batch)} offers)")
+        return _query_with_repair(
+            label="scoring",
+            keys=[offer["id"] for offer in batch],
+            build_prompt=lambda ids: build_scoring_prompt(
+                cv_data, [prompt_offers[i] for i in ids], user_prompt),
+            schema=scoring_schema,
+            validate=validate_scoring,
+            temperature=0.2,
+            num_predict=scoring_predict_tokens,
+        )
+
+    # With several Ollama backends, the batches are scored side by side
+    scored, unscored = {}, []
+    with ThreadPoolExecutor(max_workers=max(1, min(len(batches), len(get_pool())))) as pool:
+        results = list(pool.map(in_context(score_batch), range(1, len(batches) + 1), batches))
+    for batch_scored, batch_unscored in results:
+        scored.update(batch_scored)
+        unscored.extend(batch_unscored)
+    print(f"  {tag}[INFO] Scored {len(scored)} offers")
+    if unscored:
+        print(f"  {tag}[WARN] {len(unscored)} offers could not be scored by the AI — kept with local points only")
+
+    # Add the deterministic points to the LLM skills points
+    scoring_list = []
+    for offer_id, local in local_by_id.items():
+        offer = offers_by_id[offer_id]
+        skills = scored[offer_id]["score"] if offer_id in scored else None
+        total = (skills or 0) + local["prestige"] + local["location"] + local["level"] + local["period"]
+        scoring_list.append({
+            "id": offer_id,
+            "name": offer.get("name", ""),
+            "company": offer.get("company", ""),
+            "score": total,
+            "details": {"skills": skills, **local},
+        })
 
     # Sort by score descending
     scoring_list.sort(key=lambda x: x.get("score", 0), reverse=True)
 
-    # ─── 4. Extract top 5 ───────────────────────────────────────
+    os.makedirs(output_dir, exist_ok=True)
+    scoring_output_path = os.path.join(output_dir, "scoring.json")
+    with open(scoring_output_path, "w", encoding="utf-8") as f:
+        json.dump({"scoring": scoring_list}, f, ensure_ascii=False, indent=4)
+    print(f"\n  {tag}[SAVED] Scoring → {scoring_output_path}")
+    return scoring_list
+
+
+@traced("match candidate")
+def match_candidate(corpus: dict, cv_data: dict, user_prompt: str, scoring_list: list, output_dir: str,
+                    name: str = "") -> bool:
+    """Detailed match and cover letters for the top 5 scored offers, written to match.json."""
+    tag = f"[{name}] " if name else ""
+    offers_by_id = corpus["offers_by_id"]
+    prompt_offers = corpus["prompt_offers"]
+
+    # Offers that disappeared from internships.json since scoring cannot be matched
+    scoring_list = [offer for offer in scoring_list if offer["id"] in offers_by_id]
+
+    # ─── 2. Extract top 5 ───────────────────────────────────────
     top_5 = scoring_list[:5]
-    print(f"\n  [INFO] Top 5 offers:")
+    print(f"\n  {tag}[INFO] Top 5 offers:")
     for i, offer in enumerate(top_5):
-        print(f"    {i+1}. [{offer.get('score', '?')}/100] {offer.get('name', 'Unknown')}")
-
-    # ─── 5. STEP 2: Detailed match for top 5 ────────────────────
-    print("\n  [STEP 2/2] Generating detailed match + cover letters for top 5...")
-    match_prompt = build_match_prompt(cv_data, top_5, internships_data, user_prompt)
-    print(f"  [INFO] Match prompt size: ~{len(match_prompt)} chars")
-
-    match_response = query_ollama(match_prompt, temperature=0.4)
-
-    # Parse the match response
-    try:
-        match_result = json.loads(match_response)
-    except json.JSONDecodeError as e:
-        print(f"  [ERROR] Failed to parse match JSON: {e}")
-        print(f"  [DEBUG] Raw response (first 500 chars): {match_response[:500]}")
-        match_result = _try_extract_json(match_response)
-        if match_result is None:
-            print("  [ERROR] Could not recover match data. Aborting.")
-            return
-
-    # ─── 6. Save output files ────────────────────────────────────
-    output_dir = os.path.join("outputs", f"data[{date}]")
+        print(f"    {i+1}. [{offer.get('score', '?')}/100] {offer.get('name', 'Unknown')} ({offer['id']})")
 
-    scoring_output_path = os.path.join(output_dir, "scoring.json")
-    match_output_path = os.path.join(output_dir, "match.json")
+    # ─── 3. STEP 2: Detailed match for top 5 ────────────────────
+    print(f"\n  {tag}[STEP 2/2] Generating detailed match + cover letters for top 5...")
+    top_by_id = {offer["id"]: offer for offer in top_5}
+    experience_indexes = [exp["index"] for exp in cv_data.get("experiences", [])]
 
-    with open(scoring_output_path, "w", encoding="utf-8") as f:
-        json.dump({"scoring": scoring_list}, f, ensure_ascii=False, indent=4)
-    print(f"\n  [SAVED] Scoring → {scoring_output_path}")
+    matched, unmatched = _query_with_repair(
+        label="match",
+        keys=list(top_by_id),
+        build_prompt=lambda ids: build_match_prompt(
+            cv_data, [top_by_id[i] for i in ids], prompt_offers, user_prompt, corpus["company_summaries"]),
+        schema=lambda ids: match_schema(ids, experience_indexes),
+        validate=lambda result, ids: validate_match(result, ids, experience_indexes),
+        temperature=0.4,
+    )
+    if not matched:
+        print(f"  {tag}[ERROR] Could not recover match data. Aborting.")
+        return False
+    if unmatched:
+        print(f"  {tag}[WARN] No valid match for {len(unmatched)} offers: {unmatched}")
+
+    # The model only returns IDs, skills and letters: offer fields come from the join
+    match_list = []
+    for offer_id, scored_offer in top_by_id.items():
+        if offer_id not in matched:
+            continue
+        offer = offers_by_id[offer_id]
+        match_list.append({
+            "id": offer_id,
+            "name": offer.get("name", ""),
+            "URL": offer.get("URL", ""),
+            "company": offer.get("company", ""),
+            "location": offer.get("location", ""),
+            "score": scored_offer["score"],
+            "skills": matched[offer_id]["skills"],
+            "cover_letter": matched[offer_id]["cover_letter"],
+        })
+    match_result = {"match": match_list}
 
+    # ─── 4. Save output file ─────────────────────────────────────
+    os.makedirs(output_dir, exist_ok=True)
+    match_output_path = os.path.join(output_dir, "match.json")
     with open(match_output_path, "w", encoding="utf-8") as f:
         json.dump(match_result, f, ensure_ascii=False, indent=4)
-    print(f"  [SAVED] Match   → {match_output_path}")
+    print(f"  {tag}[SAVED] Match   → {match_output_path}")
+    return True
 
-    print("\n" + "=" * 60)
-    print("[C_IA] AI analysis complete!")
-    print("=" * 60)
 
+@traced("prestige")
+def _resolve_unknown_prestige(companies: list):
+    """Ask the AI (once) for the tier of companies missing from the prestige table."""
+    unknown = unknown_companies(companies)
+    if not unknown:
+        print("  [INFO] All company tiers found in the prestige table / cache")
+        save_tier_cache()
+        return
+
+    print(f"  [INFO] Asking tiers for {len(unknown)} unknown companies...")
+    tiers, missing = _query_with_repair(
+        label="prestige",
+        keys=unknown,
+        build_prompt=build_prestige_prompt,
+        schema=prestige_schema,
+        validate=validate_prestige,
+        temperature=0.0,
+    )
+    record_llm_tiers(tiers)
+    print(f"  [INFO] Stored {len(tiers)} LLM-derived company tiers")
+    if missing:
+        print(f"  [WARN] No tier for {len(missing)} companies — they get 0 prestige points")
 
-def _try_extract_json(raw_text: str) -> dict | None:
+
+def _query_with_repair(label: str, keys: list, build_prompt, schema, validate, temperature: float,
+                       num_predict=None) -> tuple[dict, list]:
     """
-    Attempt to extract valid JSON from a response that might contain
-    extra text before/after the JSON block.
+    Query Ollama for a list of items with schema-constrained output.
+    Items that come back missing or malformed are re-requested alone in a
+    smaller follow-up prompt instead of re-generating the whole answer.
+    `build_prompt(items)` returns (prompt, token count).
+    `num_predict(item_count)` optionally sizes the answer to the number of items.
+    Returns ({key: entry}, [keys still missing]).
     """
-    # Try to find JSON between { and }
-    start = raw_text.find("{")
-    end = raw_text.rfind("}") + 1
-    if start != -1 and end > start:
-        try:
-            return json.loads(raw_text[start:end])
-        except json.JSONDecodeError:
-            pass
-
-    # Try to find JSON between ```json and ```
-    if "```json" in raw_text:
-        json_block = raw_text.split("```json")[1].split("```")[0].strip()
-        try:
-            return json.loads(json_block)
-        except json.JSONDecodeError:
-            pass
-
-    return None
\ No newline at end of file
+    results = {}
+    pending = list(keys)
+
+    for round_number in range(MAX_REPAIR_ROUNDS + 1):
+        if not pending:
+            break
+        if round_number > 0:
+            print(f"  [REPAIR] Re-requesting {len(pending)} {label} items (round {round_number}/{MAX_REPAIR_ROUNDS})")
+
+        with span(f"{label} request", items=len(pending), round=round_number):
+            prompt, prompt_tokens = build_prompt(pending)
+            predict = num_predict(len(pending)) if num_predict else NUM_PREDICT
+            print(f"  [INFO] {label.capitalize()} prompt: {budget_report(prompt_tokens, NUM_CTX, predict)}")
+            response = query_ollama(prompt, temperature=temperature, schema=schema(pending), num_predict=predict)
+
+            parsed = parse_json_response(response)
+            if parsed is None:
+                print(f"  [ERROR] Failed to parse {label} JSON")
+                print(f"  [DEBUG] Raw response (first 500 chars): {response[:500]}")
+            valid, pending = validate(parsed, pending)
+        results.update(valid)
+        if pending:
+            print(f"  [WARN] {len(pending)} {label} items missing or malformed")
+
+    return results, pending
@@ -0,0 +1,300 @@
+import os
+import re
+import json
+import math
+import hashlib
+import datetime
+import threading
+from functools import lru_cache
+from utils.text import normalize_text
+
+# Deterministic part of the scoring grid: location (15 pts), level (10 pts)
+# and start period (15 pts) are computed here, the LLM only scores the rest.
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "fr_gazetteer.json")
+FEATURE_CACHE_PATH = os.path.join("outputs", "cache", "local_features.json")
+FEATURE_VERSION = 2
+
+LOCATION_MAX_POINTS = 15
+LEVEL_MAX_POINTS = 10
+PERIOD_MAX_POINTS = 15
+LOCAL_MAX_POINTS = LOCATION_MAX_POINTS + LEVEL_MAX_POINTS + PERIOD_MAX_POINTS
+
+# Points lost per km beyond the target city, and per month away from the window
+LOCATION_POINTS_PER_KM = 1
+PERIOD_POINTS_PER_MONTH = 5
+# When the offer does not state a start date at all
+PERIOD_UNKNOWN_POINTS = 7
+
+# Target cities with their radius in km (distance is counted beyond the city),
+# and the months in which the internship should start
+DEFAULT_TARGETS = {
+    "cities": {"lyon": 4.5, "paris": 6.0, "montpellier": 4.0},
+    "start_months": ["2026-06", "2026-07"],
+}
+
+_MONTHS = {
+    "janvier": 1, "janv": 1, "january": 1, "jan": 1,
+    "fevrier": 2, "fevr": 2, "february": 2, "feb": 2,
+    "mars": 3, "march": 3, "mar": 3,
+    "avril": 4, "april": 4, "avr": 4, "apr": 4,
+    "mai": 5, "may": 5,
+    "juin": 6, "june": 6,
+    "juillet": 7, "juil": 7, "july": 7, "jul": 7,
+    "aout": 8, "august": 8, "aug": 8,
+    "septembre": 9, "september": 9, "sept": 9, "sep": 9,
+    "octobre": 10, "october": 10, "oct": 10,
+    "novembre": 11, "november": 11, "nov": 11,
+    "decembre": 12, "december": 12, "dec": 12,
+}
+_MONTH_ALT = "|".join(sorted(_MONTHS, key=len, reverse=True))
+
+# Whole words only: "start up" or "debutant" is no start date
+_START_KEYWORDS = re.compile(
+    r"\b(debut(?:e|er|era)?|a partir d\w*|des le|start(?:ing)?(?! ?up\b)|commenc\w*|demarr\w*|"
+    r"pourvoir|disponible|available)\b"
+)
+_MONTH_YEAR = re.compile(
+    rf"\b({_MONTH_ALT})\.?(?:\s*(?:/|-|ou|or|et)\s*(?:{_MONTH_ALT})\.?)?\s+(20\d\d)\b"
+)
+_MONTH_ONLY = re.compile(rf"\b({_MONTH_ALT})\b")
+_SEMESTER = re.compile(r"\b(premier|1er|second|deuxieme|2nd|2e|s1|s2)\s*(?:semestre)?\s*(20\d\d)\b")
+_NUMERIC_DATE = re.compile(r"\b(?:\d{1,2}/)?(\d{1,2})/(20\d\d)\b")
+_ASAP = re.compile(r"\b(des que possible|asap|as soon as possible)\b")
+# Only a start after a start keyword ("demarrage immediat"), not "immediatement operationnel"
+_IMMEDIATE = re.compile(r"\b(immediatement|immediat|immediate)\b")
+
+_LEVEL_PATTERNS = re.compile(
+    r"\b(bac\s*\+\s*[45]|bac\s*\+\s*4\s*/\s*5|master|m[12]|ecole d.ingenieur|"
+    r"ecole de commerce|grande ecole|fin d.etudes|engineering school|business school|"
+    r"final[- ]year|graduate degree|msc)\b"
+)
+
+
+@lru_cache(maxsize=1)
+def _load_gazetteer() -> tuple[dict, dict, re.Pattern]:
+    """Load the offline gazetteer once and compile a longest-first place regex."""
+    with open(GAZETTEER_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    # Cities are (lat, lon); regions and departements named in full are
+    # (lat, lon, radius km) around their main city
+    places = {}
+    for name, coords in data.get("cities", {}).items():
+        places[normalize_text(name)] = tuple(coords)
+    for name, coords in data.get("regions", {}).items():
+        places.setdefault(normalize_text(name), tuple(coords))
+
+    departements = {code: tuple(coords) for code, coords in data.get("departements", {}).items()}
+    names = sorted(places, key=len, reverse=True)
+    pattern = re.compile(r"(?<![a-z])(" + "|".join(re.escape(n) for n in names) + r")(?![a-z])")
+    return places, departements, pattern
+
+
+def _haversine_km(a: tuple, b: tuple) -> float:
+    lat1, lon1 = map(math.radians, a[:2])
+    lat2, lon2 = map(math.radians, b[:2])
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+@lru_cache(maxsize=4096)
+def _distance_beyond_targets(coords: tuple, targets_key: tuple) -> float:
+    """
+    Distance in km beyond the closest target city (0 inside a target city).
+    A region counts from the average distance of its points to its centre
+    (2/3 of its radius): an offer somewhere in Ile-de-France is not in Paris.
+    """
+    places, _, _ = _load_gazetteer()
+    extent = 2 / 3 * coords[2] if len(coords) > 2 else 0.0
+    best = None
+    for city, radius in targets_key:
+        center = places.get(normalize_text(city))
+        if center is None:
+            continue
+        beyond = max(0.0, _haversine_km(coords, center) + extent - radius)
+        best = beyond if best is None else min(best, beyond)
+    return best if best is not None else math.inf
+
+
+# ═══════════════════════════════════════════════════════════════
+#  FEATURE EXTRACTION (candidate independent, cached per offer)
+# ═══════════════════════════════════════════════════════════════
+
+def parse_locations(location: str) -> list:
+    """Return every (place, coords) found in a location string."""
+    places, departements, pattern = _load_gazetteer()
+    found = []
+    for segment in re.split(r"[;,]| - |\(", location or ""):
+        normalized = normalize_text(segment)
+        if not normalized:
+            continue
+        match = pattern.search(normalized)
+        if match:
+            found.append((match.group(1), places[match.group(1)]))
+            continue
+        postal = re.search(r"\b(\d{5})\b", segment)
+        if postal and postal.group(1)[:2] in departements:
+            found.append((postal.group(1), departements[postal.group(1)[:2]]))
+    return found
+
+
+def parse_start(content: str) -> str | None:
+    """
+    Find the internship start in the offer text: a date right after a start
+    keyword, or "as soon as possible" anywhere. Dates elsewhere in the text
+    (founding year, clearance date) are ignored.
+    Returns "YYYY-MM", "--MM" (month without year), "asap" or None.
+
+    >>> parse_start("Stage de 6 mois à partir de juin 2026.")
+    '2026-06'
+    >>> parse_start("Rejoignez notre start-up créée en septembre 2018.") is None
+    True
+    >>> parse_start("Habilitation IGI 1300 du 09 août 2021 requise.") is None
+    True
+    >>> parse_start("Stage dès que possible, 6 mois.")
+    'asap'
+    """
+    text = normalize_text(content)
+
+    for match in _START_KEYWORDS.finditer(text):
+        window = text[match.end():match.end() + 80]
+        month_year = _MONTH_YEAR.search(window)
+        semester = _SEMESTER.search(window)
+        numeric = _NUMERIC_DATE.search(window)
+        candidates = []
+        if month_year:
+            candidates.append((month_year.start(), f"{month_year.group(2)}-{_MONTHS[month_year.group(1)]:02d}"))
+        if semester:
+            month = 1 if semester.group(1) in ("premier", "1er", "s1") else 7
+            candidates.append((semester.start(), f"{semester.group(2)}-{month:02d}"))
+        if numeric and 1 <= int(numeric.group(1)) <= 12:
+            candidates.append((numeric.start(), f"{numeric.group(2)}-{int(numeric.group(1)):02d}"))
+        asap = _ASAP.search(window) or _IMMEDIATE.search(window)
+        if asap:
+            candidates.append((asap.start(), "asap"))
+        month_only = _MONTH_ONLY.search(window)
+        if month_only and len(month_only.group(1)) > 3:
+            candidates.append((month_only.start() + 1, f"--{_MONTHS[month_only.group(1)]:02d}"))
+        if candidates:
+            return min(candidates)[1]
+    if _ASAP.search(text):
+        return "asap"
+    return None
+
+
+def requires_level(content: str) -> bool:
+    """True when the offer targets Bac+4/5, engineering school or end-of-studies internships."""
+    return _LEVEL_PATTERNS.search(normalize_text(content)) is not None
+
+
+_feature_cache: dict | None = None
+_save_lock = threading.Lock()
+
+
+def _offer_key(offer: dict) -> str:
+    raw = f"{FEATURE_VERSION}\x00{offer.get('location', '')}\x00{offer.get('content', '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _get_feature_cache() -> dict:
+    global _feature_cache
+    if _feature_cache is None:
+        _feature_cache = {}
+        if os.path.exists(FEATURE_CACHE_PATH):
+            try:
+                with open(FEATURE_CACHE_PATH, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == FEATURE_VERSION:
+                    _feature_cache = data.get("offers", {})
+            except (OSError, json.JSONDecodeError):
+                print(f"  [WARN] Ignoring unreadable feature cache: {FEATURE_CACHE_PATH}")
+    return _feature_cache
+
+
+def save_feature_cache():
+    """Write the per-offer feature cache back to disk."""
+    if _feature_cache is None:
+        return
+    os.makedirs(os.path.dirname(FEATURE_CACHE_PATH), exist_ok=True)
+    # Stages of concurrent runs (HTTP service) can save at the same time
+    with _save_lock:
+        with open(FEATURE_CACHE_PATH + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": FEATURE_VERSION, "offers": dict(_feature_cache)}, f, ensure_ascii=False)
+        os.replace(FEATURE_CACHE_PATH + ".tmp", FEATURE_CACHE_PATH)
+
+
+def extract_features(offer: dict) -> dict:
+    """Return the cached location/level/start features of an offer."""
+    cache = _get_feature_cache()
+    key = _offer_key(offer)
+    if key not in cache:
+        locations = parse_locations(offer.get("location", ""))
+        cache[key] = {
+            "places": [[name, list(coords)] for name, coords in locations],
+            "level": requires_level(offer.get("content", "")),
+            "start": parse_start(offer.get("content", "")),
+        }
+    return cache[key]
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SCORING (candidate dependent, cheap)
+# ═══════════════════════════════════════════════════════════════
+
+def _resolve_start(start: str | None, reference: datetime.date) -> tuple | None:
+    if start is None:
+        return None
+    if start == "asap":
+        return reference.year, reference.month
+    if start.startswith("--"):
+        month = int(start[2:])
+        year = reference.year if month >= reference.month else reference.year + 1
+        return year, month
+    year, month = (int(part) for part in start.split("-"))
+    # A start already past is a date about something else: unknown
+    if (year, month) < (reference.year, reference.month):
+        return None
+    return year, month
+
+
+def score_features(features: dict, targets: dict = DEFAULT_TARGETS,
+                   reference: datetime.date | None = None) -> dict:
+    """Turn extracted features into the 40 deterministic points."""
+    reference = reference or datetime.date.today()
+
+    # Location: best of all places listed in the offer
+    targets_key = tuple(sorted(targets["cities"].items()))
+    distances = [_distance_beyond_targets(tuple(coords), targets_key) for _, coords in features["places"]]
+    km = min(distances) if distances else None
+    if km is None or math.isinf(km):
+        location_points = 0
+    else:
+        location_points = max(0, round(LOCATION_MAX_POINTS - LOCATION_POINTS_PER_KM * km))
+
+    level_points = LEVEL_MAX_POINTS if features["level"] else 0
+
+    start = _resolve_start(features["start"], reference)
+    if start is None:
+        period_points = PERIOD_UNKNOWN_POINTS
+    else:
+        wanted = [tuple(int(p) for p in m.split("-")) for m in targets["start_months"]]
+        delta = min(abs((start[0] - y) * 12 + start[1] - m) for y, m in wanted)
+        period_points = max(0, PERIOD_MAX_POINTS - PERIOD_POINTS_PER_MONTH * delta)
+
+    return {
+        "location": location_points,
+        "level": level_points,
+        "period": period_points,
+        "location_km": None if km is None or math.isinf(km) else round(km, 1),
+        "start": None if start is None else f"{start[0]}-{start[1]:02d}",
+    }
+
+
+def compute_local_scores(internships_data: list, targets: dict = DEFAULT_TARGETS,
+                         reference: datetime.date | None = None) -> list:
+    """Score location, level and period for every offer (same order as the input)."""
+    scores = [score_features(extract_features(offer), targets, reference) for offer in internships_data]
+    save_feature_cache()
+    return scores
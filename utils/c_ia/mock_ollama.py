@@ -0,0 +1,323 @@
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for `ollama serve`: implements the streamed /api/generate and
+# the /api/embed protocol with configurable latency, token rate, TTFT and
+# failure injection, so utils/c_ia can be exercised and timed without a GPU.
+
+DEFAULT_MODEL = "qwen2.5:14b"
+
+
+class MockConfig:
+    """Timing and failure knobs of the mock server (all times in seconds)."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        ttft: float = 0.2,
+        ttft_per_1k_chars: float = 0.0,
+        token_rate: float = 0.0,
+        chars_per_token: int = 4,
+        load_time: float = 0.0,
+        fail_rate: float = 0.0,
+        fail_first: int = 0,
+        failure_mode: str = "http500",
+        embed_dim: int = 64,
+        models: list | None = None,
+        seed: int | None = None,
+    ):
+        self.latency = latency                       # before the response headers
+        self.ttft = ttft                             # base prompt evaluation time
+        self.ttft_per_1k_chars = ttft_per_1k_chars   # prompt evaluation cost per 1000 prompt chars
+        self.token_rate = token_rate                 # generated tokens/s (0 = as fast as possible)
+        self.chars_per_token = chars_per_token
+        self.load_time = load_time                   # paid once, by the first request per model
+        self.fail_rate = fail_rate                   # probability that a request fails
+        self.fail_first = fail_first                 # the N first requests always fail
+        self.failure_mode = failure_mode             # "http500", "drop", "garbage" or "hang"
+        self.embed_dim = embed_dim
+        self.models = models or [DEFAULT_MODEL]
+        self.random = random.Random(seed)
+
+
+class MockOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig, responder=None):
+        super().__init__(address, _MockHandler)
+        self.config = config
+        self.responder = responder or default_responder
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.loaded_models = set()
+        self.log = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients closing idle keep-alive connections are not errors
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    def next_request(self) -> tuple[int, bool]:
+        """Return (request number, should this request fail)."""
+        with self.lock:
+            self.request_count += 1
+            number = self.request_count
+            fail = number <= self.config.fail_first or self.config.random.random() < self.config.fail_rate
+        return number, fail
+
+    def load_model(self, model: str) -> float:
+        """Simulate loading weights the first time a model is used."""
+        with self.lock:
+            if model in self.loaded_models:
+                return 0.0
+            self.loaded_models.add(model)
+        time.sleep(self.config.load_time)
+        return self.config.load_time
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, responder=None, **config) -> MockOllamaServer:
+    """Start a mock server in a background thread. Use `server.url` as OLLAMA_HOST."""
+    server = MockOllamaServer((host, port), MockConfig(**config), responder)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# ═══════════════════════════════════════════════════════════════
+#  RESPONDER (fake model output that run_ia can parse)
+# ═══════════════════════════════════════════════════════════════
+
+def _stable_int(text: str, modulo: int) -> int:
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % modulo
+
+
+def _json_after(prompt: str, marker: str):
+    """Decode the first JSON value that follows `marker` in the prompt."""
+    position = prompt.find(marker)
+    if position == -1:
+        return None
+    start = min((i for i in (prompt.find("[", position), prompt.find("{", position)) if i != -1), default=-1)
+    if start == -1:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(prompt[start:])
+        return value
+    except json.JSONDecodeError:
+        return None
+
+
+def default_responder(prompt: str) -> str:
+    """Produce a plausible JSON answer for the prompts built by prompt_builder."""
+    if '"companies"' in prompt:
+        companies = _json_after(prompt, "ENTREPRISES :") or []
+        tiers = ["top", "large", "mid", "small"]
+        return json.dumps({"companies": [
+            {"company": c, "tier": tiers[_stable_int(c, 4)]} for c in companies
+        ]}, ensure_ascii=False)
+
+    if '"scoring"' in prompt:
+        offers = _json_after(prompt, "LISTE DES OFFRES") or []
+        return json.dumps({"scoring": [
+            {"id": o.get("id", ""), "score": _stable_int(o.get("name", ""), 41)}
+            for o in offers if isinstance(o, dict)
+        ]}, ensure_ascii=False)
+
+    if '"match"' in prompt:
+        offers = _json_after(prompt, "TOP 5 OFFRES") or []
+        indexes = sorted({int(i) for i in re.findall(r"^\[(\d+)\] ", prompt, re.MULTILINE)})[:6]
+        letter = ("Madame, Monsieur,\n\n" + "Lorem ipsum dolor sit amet. " * 40 +
+                  "\n\nEn attendant de pouvoir échanger à nouveau avec vous, "
+                  "veuillez accepter mes sincères salutations.")
+        return json.dumps({"match": [
+            {"id": o.get("id", ""), "skills": indexes, "cover_letter": letter}
+            for o in offers if isinstance(o, dict)
+        ]}, ensure_ascii=False)
+
+    return json.dumps({"response": "ok"})
+
+
+# ═══════════════════════════════════════════════════════════════
+#  HTTP HANDLER
+# ═══════════════════════════════════════════════════════════════
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockOllamaServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def do_GET(self):
+        config = self.server.config
+        if self.path in ("/", "/api/version"):
+            self._send_json(200, {"version": "mock"})
+        elif self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": m, "model": m} for m in config.models]})
+        elif self.path == "/api/ps":
+            self._send_json(200, {"models": [{"name": m, "model": m} for m in sorted(self.server.loaded_models)]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self._read_json()
+        config = self.server.config
+        number, fail = self.server.next_request()
+        self.server.log.append({"path": self.path, "request": number, "failed": fail,
+                                "prompt_chars": len(body.get("prompt", "") or "")})
+        time.sleep(config.latency)
+
+        if fail and config.failure_mode == "hang":
+            time.sleep(3600)
+            return
+        # "drop" and "garbage" only make sense for a streamed generation
+        if fail and (config.failure_mode == "http500" or self.path != "/api/generate"):
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        if self.path == "/api/generate":
+            self._generate(body, fail)
+        elif self.path in ("/api/embed", "/api/embeddings"):
+            self._embed(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _embed(self, body: dict):
+        config = self.server.config
+        model = body.get("model", DEFAULT_MODEL)
+        self.server.load_model(model)
+        inputs = body.get("input", body.get("prompt", ""))
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        vectors = []
+        for text in texts:
+            rng = random.Random(hashlib.md5(str(text).encode("utf-8")).hexdigest())
+            vectors.append([rng.uniform(-1, 1) for _ in range(config.embed_dim)])
+        if self.path == "/api/embeddings":
+            self._send_json(200, {"embedding": vectors[0]})
+        else:
+            self._send_json(200, {"model": model, "embeddings": vectors})
+
+    def _generate(self, body: dict, fail: bool):
+        config = self.server.config
+        model = body.get("model", DEFAULT_MODEL)
+        prompt = body.get("prompt", "") or ""
+        start = time.time()
+        load_time = self.server.load_model(model)
+
+        # Empty prompt = model preload, as in the real API
+        if not prompt:
+            self._send_json(200, {"model": model, "response": "", "done": True,
+                                  "load_duration": int(load_time * 1e9)})
+            return
+
+        text = self.server.responder(prompt)
+        if fail and config.failure_mode == "garbage":
+            text = "Voici le JSON demandé : " + text[: len(text) // 2]
+
+        time.sleep(config.ttft + config.ttft_per_1k_chars * len(prompt) / 1000)
+        prompt_done = time.time()
+
+        step = max(1, config.chars_per_token)
+        tokens = [text[i:i + step] for i in range(0, len(text), step)]
+        base = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ")}
+
+        if not body.get("stream", True):
+            if config.token_rate:
+                time.sleep(len(tokens) / config.token_rate)
+            self._send_json(200, {**base, "response": text, "done": True,
+                                  **self._final_counts(prompt, tokens, start, prompt_done, load_time)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, token in enumerate(tokens):
+                if fail and config.failure_mode == "drop" and i >= len(tokens) // 2:
+                    # Close mid-stream without the terminating chunk
+                    self.close_connection = True
+                    self.wfile.flush()
+                    self.connection.shutdown(2)
+                    return
+                self._write_chunk({**base, "response": token, "done": False})
+                if config.token_rate:
+                    time.sleep(1 / config.token_rate)
+            self._write_chunk({**base, "response": "", "done": True, "done_reason": "stop",
+                               **self._final_counts(prompt, tokens, start, prompt_done, load_time)})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _write_chunk(self, chunk: dict):
+        data = (json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _final_counts(self, prompt: str, tokens: list, start: float, prompt_done: float, load_time: float) -> dict:
+        now = time.time()
+        return {
+            "total_duration": int((now - start) * 1e9),
+            "load_duration": int(load_time * 1e9),
+            "prompt_eval_count": len(prompt) // self.server.config.chars_per_token,
+            "prompt_eval_duration": int((prompt_done - start - load_time) * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((now - prompt_done) * 1e9),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Ollama server for tests and benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--ttft-per-1k-chars", type=float, default=0.0)
+    parser.add_argument("--token-rate", type=float, default=0.0)
+    parser.add_argument("--load-time", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-first", type=int, default=0)
+    parser.add_argument("--failure-mode", choices=["http500", "drop", "garbage", "hang"], default="http500")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockOllamaServer((args.host, args.port), MockConfig(
+        latency=args.latency, ttft=args.ttft, ttft_per_1k_chars=args.ttft_per_1k_chars,
+        token_rate=args.token_rate, load_time=args.load_time, fail_rate=args.fail_rate,
+        fail_first=args.fail_first, failure_mode=args.failure_mode, seed=args.seed,
+    ))
+    print(f"[MOCK] Ollama mock listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import os
+import json
+from collections import Counter, deque
+from utils.manifest import run_dir
+from utils.offer_ids import index_offers
+from utils.tracing import span
+from utils.text import normalize_text
+
+# Tag stage, right after scraping: every offer's title and full content are
+# searched for the domain keywords (data/domain_keywords.json) and for the
+# skills of the CV, and the hit counts are written to
+# outputs/data[{date}]/tags.json. The scoring prompt lists the CV skills found
+# in each offer and the PDF stage picks the Supply Chain or Data variant from
+# the domain counts. All keywords are found in one pass over the text (an
+# Aho-Corasick automaton), so a bigger vocabulary does not slow the scan down.
+
+KEYWORDS_PATH = os.path.join(os.path.dirname(__file__), "data", "domain_keywords.json")
+DEFAULT_CV_PATH = os.path.join("inputs", "cv.json")
+TAGS_FILE = "tags.json"
+TAGS_VERSION = 1
+
+# Title hits weigh more than content hits when picking the domain of an offer
+TITLE_WEIGHT = 3
+
+
+# ═══════════════════════════════════════════════════════════════
+#  MATCHER
+# ═══════════════════════════════════════════════════════════════
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over normalized keywords: finds every whole-word
+    occurrence of every keyword in one pass over the text.
+    """
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        # Keywords ending at each state, including through its fail links
+        self.output = [[]]
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                if char not in self.goto[state]:
+                    self.goto[state][char] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = self.goto[state][char]
+            self.output[state].append(keyword)
+
+        # Breadth first, so a state's fail link is set before its children's
+        states = deque(self.goto[0].values())
+        while states:
+            state = states.popleft()
+            for char, child in self.goto[state].items():
+                states.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def count(self, text: str) -> Counter:
+        """Occurrences of each keyword in already normalized `text`."""
+        counts = Counter()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        last = len(text) - 1
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state] or (end < last and text[end + 1].isalnum()):
+                continue
+            for keyword in output[state]:
+                start = end - len(keyword) + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    counts[keyword] += 1
+        return counts
+
+
+# ═══════════════════════════════════════════════════════════════
+#  VOCABULARY
+# ═══════════════════════════════════════════════════════════════
+
+def cv_skills(cv_data: dict) -> dict:
+    """{skill: [(domain, priority), ...]} of the CV "skills" section."""
+    skills = {}
+    for block in cv_data.get("skills", []):
+        for domain, priorities in block.items():
+            for priority, names in priorities.items():
+                for name in names:
+                    skills.setdefault(name, []).append((domain, priority))
+    return skills
+
+
+def _skill_terms(name: str) -> set:
+    """Normalized forms of a skill: "Excel (advanced)" is also looked up as "excel"."""
+    terms = {normalize_text(name)}
+    if "(" in name:
+        terms.add(normalize_text(name.split("(")[0]))
+    return {term for term in terms if term}
+
+
+def build_vocabulary(cvs: list, keywords_path: str = KEYWORDS_PATH) -> dict:
+    """
+    {normalized term: [("domain", domain) or ("skill", skill name), ...]}
+    from the domain keyword lists and the skills of every CV in `cvs`.
+    Experience "skills" are sentences, not keywords: they are left out.
+    """
+    with open(keywords_path, "r", encoding="utf-8") as f:
+        keywords = json.load(f)
+
+    vocabulary = {}
+    for domain, terms in keywords.items():
+        for term in terms:
+            vocabulary.setdefault(normalize_text(term), set()).add(("domain", domain))
+    for cv_data in cvs:
+        for name in cv_skills(cv_data):
+            for term in _skill_terms(name):
+                vocabulary.setdefault(term, set()).add(("skill", name))
+    return {term: sorted(labels) for term, labels in vocabulary.items()}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  TAGGING
+# ═══════════════════════════════════════════════════════════════
+
+def _labelled_counts(counts: Counter, vocabulary: dict) -> tuple[dict, dict]:
+    domains, skills = Counter(), Counter()
+    for term, count in counts.items():
+        for kind, name in vocabulary[term]:
+            (domains if kind == "domain" else skills)[name] += count
+    return dict(domains), dict(skills)
+
+
+def tag_offer(offer: dict, matcher: KeywordMatcher, vocabulary: dict) -> dict:
+    """Domain keyword and CV skill hits of one offer, in its title and in its content."""
+    title_counts = matcher.count(normalize_text(f"{offer.get('name', '')} {offer.get('company', '')}"))
+    content_counts = matcher.count(normalize_text(offer.get("content", "")))
+    title_domains, _ = _labelled_counts(title_counts, vocabulary)
+    domains, skills = _labelled_counts(title_counts + content_counts, vocabulary)
+    return {
+        "title_domains": title_domains,
+        "domains": domains,
+        "skills": dict(sorted(skills.items(), key=lambda item: (-item[1], item[0]))),
+    }
+
+
+def offer_domain(tags: dict | None) -> str | None:
+    """
+    Domain with the most hits ("supply_chain", "data", ...), title hits
+    weighted; None without hits or on a tie.
+    """
+    if not tags:
+        return None
+    scores = Counter(tags.get("domains", {}))
+    for domain, count in tags.get("title_domains", {}).items():
+        scores[domain] += (TITLE_WEIGHT - 1) * count
+    ranked = scores.most_common(2)
+    if not ranked or (len(ranked) == 2 and ranked[0][1] == ranked[1][1]):
+        return None
+    return ranked[0][0]
+
+
+def matched_skills(tags: dict | None, cv_data: dict, limit: int | None = None) -> list:
+    """Skills of this CV found in the offer, most frequent first."""
+    if not tags:
+        return []
+    names = cv_skills(cv_data)
+    found = [name for name in tags.get("skills", {}) if name in names]
+    return found[:limit] if limit else found
+
+
+def load_tags(date: str) -> dict:
+    """{offer ID: tags} of a run; empty for runs tagged before this stage existed."""
+    path = os.path.join(run_dir(date), TAGS_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"  [WARN] Ignoring unreadable {path}")
+        return {}
+    if data.get("version") != TAGS_VERSION:
+        return {}
+    return data["offers"]
+
+
+def run_tagging(date: str, cvs: list | None = None) -> bool:
+    """
+    Tag stage: tag the scraped offers of a run for the skills of `cvs` (CV
+    dicts or paths, default inputs/cv.json) and write tags.json.
+    """
+    print("=" * 60)
+    print("[TAG] Tagging offers...")
+    print("=" * 60)
+
+    internships_path = os.path.join(run_dir(date), "internships.json")
+    if not os.path.exists(internships_path):
+        print(f"  [ERROR] Internships file not found: {internships_path}")
+        return False
+    with open(internships_path, "r", encoding="utf-8") as f:
+        offers = json.load(f)
+
+    cv_datas = []
+    for cv in cvs or [DEFAULT_CV_PATH]:
+        if isinstance(cv, str):
+            if not os.path.exists(cv):
+                print(f"  [WARN] CV file not found: {cv} — tagging without its skills")
+                continue
+            with open(cv, "r", encoding="utf-8") as f:
+                cv = json.load(f)
+        cv_datas.append(cv)
+
+    with span("tag offers", offers=len(offers)) as record:
+        vocabulary = build_vocabulary(cv_datas)
+        matcher = KeywordMatcher(vocabulary)
+        tags = {offer_id: tag_offer(offer, matcher, vocabulary) for offer_id, offer in index_offers(offers).items()}
+        record["terms"] = len(vocabulary)
+
+    path = os.path.join(run_dir(date), TAGS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": TAGS_VERSION, "terms": len(vocabulary), "offers": tags}, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+    domains = Counter(offer_domain(entry) for entry in tags.values())
+    with_skills = sum(bool(entry["skills"]) for entry in tags.values())
+    print(f"  [INFO] {len(tags)} offers tagged with {len(vocabulary)} terms: "
+          + ", ".join(f"{domain or 'no domain'} {count}" for domain, count in domains.most_common())
+          + f"; {with_skills} mention CV skills")
+    print(f"\n  [SAVED] Tags → {path}")
+    return True
@@ -1,11 +1,82 @@
+import os
 import requests
 import json
 import time
 import sys
 import threading
+from collections import deque
+from utils.tracing import traced, annotate
+from utils.threads import in_context
+from utils.c_ia.backend_pool import BackendPool
 
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
+# Ollama servers requests are spread over (comma-separated URLs)
+OLLAMA_BACKENDS = [url for url in os.environ.get("OLLAMA_BACKENDS", OLLAMA_HOST).split(",") if url.strip()]
 MODEL_NAME = "qwen2.5:14b"
+NUM_CTX = 32768
+NUM_PREDICT = 8192
+# How long the server keeps the model in memory after the last request
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Seconds to wait before retrying a failed request (connection errors wait 1.5x)
+RETRY_DELAY = float(os.environ.get("OLLAMA_RETRY_DELAY", "10"))
+# Seconds without any data from the server before a request times out
+REQUEST_TIMEOUT = float(os.environ.get("OLLAMA_REQUEST_TIMEOUT", "3600"))
+
+# One entry per query_ollama call, used by benchmarks and run summaries (the
+# latest ones only: the daemon and the service never clear it)
+CALL_STATS = deque(maxlen=1000)
+# Filled by warm_up_model(): start/end timestamps, load time, prefix tokens
+WARMUP_STATS = {}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> BackendPool:
+    """The backend pool, health-checked on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BackendPool(OLLAMA_BACKENDS)
+            _pool.check_all()
+        return _pool
+
+
+def set_backends(urls: list):
+    """Send requests to the Ollama servers at `urls` from now on."""
+    global OLLAMA_BACKENDS, _pool
+    with _pool_lock:
+        OLLAMA_BACKENDS = list(urls)
+        _pool = None
+
+
+def _client_error(error: Exception) -> bool:
+    """An HTTP 4xx: the request is at fault (bad payload, model not pulled), not the backend."""
+    return (isinstance(error, requests.exceptions.HTTPError) and error.response is not None
+            and 400 <= error.response.status_code < 500)
+
+
+def _model_missing(error: Exception) -> bool:
+    """A 404 from Ollama: the model is not pulled on that backend (others may have it)."""
+    return _client_error(error) and error.response.status_code == 404
+
+
+def _after_failure(pool: BackendPool, backend, tried: list, delay: float, retry: bool = True, down: bool = True):
+    """
+    Mark `backend` down (unless not `down`: a bad answer, not a dead server);
+    before a retry, wait `delay` only when no other backend is left to try.
+    """
+    if down:
+        pool.mark_failed(backend)
+    tried.append(backend)
+    if not retry:
+        return
+    if pool.has_other(tried):
+        print(f"  [Ollama] ↪️  Rerouting away from {backend.url}")
+        return
+    tried.clear()
+    time.sleep(delay)
 
 
 def _waiting_indicator(start_time, stop_event):
@@ -17,38 +88,68 @@ def _waiting_indicator(start_time, stop_event):
         stop_event.wait(10)
 
 
-def query_ollama(prompt: str, temperature: float = 0.3, max_retries: int = 3) -> str:
+@traced("ollama request", "call")
+def query_ollama(prompt: str, temperature: float = 0.3, max_retries: int = 3, schema: dict | None = None,
+                 num_predict: int = NUM_PREDICT) -> str:
+    """
+    Stream a generation from Ollama and return the full text.
+    `schema` is a JSON schema used as `format` to constrain the output;
+    without it the model is only asked for valid JSON.
+    """
     payload = {
         "model": MODEL_NAME,
         "prompt": prompt,
         "stream": True,
         "options": {
             "temperature": temperature,
-            "num_ctx": 32768,
-            "num_predict": 8192,
+            "num_ctx": NUM_CTX,
+            "num_predict": num_predict,
         },
-        "format": "json"
+        "format": schema if schema is not None else "json",
+        "keep_alive": KEEP_ALIVE,
     }
 
+    stats = {
+        "prompt_chars": len(prompt),
+        "attempts": 0,
+        "ttft": None,
+        "elapsed": None,
+        "prompt_eval_count": None,
+        "eval_count": None,
+        "load_duration": None,
+        "backend": None,
+        "ok": False,
+    }
+    CALL_STATS.append(stats)
+    call_start = time.time()
+    pool = get_pool()
+    # A failure moves the request to another backend: give each one a chance
+    max_retries = max(max_retries, len(pool))
+    tried = []
+
     for attempt in range(max_retries):
+        stats["attempts"] = attempt + 1
+        backend = pool.acquire(MODEL_NAME, tried)
+        stats["backend"] = backend.url
+        stop_event = threading.Event()
         try:
-            print(f"  [Ollama] Sending request (attempt {attempt + 1}/{max_retries})...")
+            where = f" to {backend.url}" if len(pool) > 1 else ""
+            print(f"  [Ollama] Sending request{where} (attempt {attempt + 1}/{max_retries})...")
             start_time = time.time()
             first_token_time = None
             token_count = 0
             full_response = ""
 
             # Start a waiting indicator thread
-            stop_event = threading.Event()
-            waiter = threading.Thread(target=_waiting_indicator, args=(start_time, stop_event))
+            waiter = threading.Thread(target=in_context(_waiting_indicator), args=(start_time, stop_event))
             waiter.daemon = True
             waiter.start()
 
             response = requests.post(
-                OLLAMA_API_URL,
+                backend.generate_url,
                 json=payload,
                 stream=True,
-                timeout=3600
+                timeout=REQUEST_TIMEOUT
             )
             response.raise_for_status()
 
@@ -65,6 +166,7 @@ def query_ollama(prompt: str, temperature: float = 0.3, max_retries: int = 3) ->
                     stop_event.set()
                     first_token_time = time.time()
                     prompt_time = first_token_time - start_time
+                    stats["ttft"] = prompt_time
                     print(f"\n  [Ollama] ⏱️  Prompt processed in {prompt_time:.1f}s — now generating...")
 
                 if token:
@@ -89,26 +191,149 @@ def query_ollama(prompt: str, temperature: float = 0.3, max_retries: int = 3) ->
                     print(f"  [Ollama] 📊 Prompt: {prompt_eval_count} tok | "
                           f"Generated: {eval_count} tok | "
                           f"Total: {total_duration:.1f}s")
+                    stats["prompt_eval_count"] = prompt_eval_count
+                    stats["eval_count"] = eval_count
+                    stats["load_duration"] = chunk.get("load_duration", 0) / 1e9
+                    annotate(prompt_tokens=prompt_eval_count, output_tokens=eval_count,
+                             ttft_s=round(stats["ttft"] or 0, 3), load_s=round(stats["load_duration"], 3),
+                             attempts=attempt + 1, backend=backend.url)
+                    if stats["load_duration"] > 1:
+                        print(f"  [Ollama] ⚠️  Model was not loaded: {stats['load_duration']:.1f}s spent loading it")
                     break
 
+            stats["ok"] = True
+            stats["elapsed"] = time.time() - call_start
             return full_response
 
         except requests.exceptions.Timeout:
+            stop_event.set()
             print(f"\n  [Ollama] Timeout (attempt {attempt + 1})")
+            _after_failure(pool, backend, tried, RETRY_DELAY, retry=attempt < max_retries - 1)
             if attempt == max_retries - 1:
+                stats["elapsed"] = time.time() - call_start
                 raise
-            time.sleep(10)
 
         except requests.exceptions.ConnectionError:
-            print(f"\n  [Ollama] Connection error — is 'ollama serve' running?")
+            stop_event.set()
+            print(f"\n  [Ollama] Connection error — is 'ollama serve' running at {backend.url}?")
+            _after_failure(pool, backend, tried, RETRY_DELAY * 1.5, retry=attempt < max_retries - 1)
             if attempt == max_retries - 1:
+                stats["elapsed"] = time.time() - call_start
                 raise
-            time.sleep(15)
 
         except Exception as e:
+            stop_event.set()
             print(f"\n  [Ollama] Error: {e}")
+            if _model_missing(e):
+                pool.mark_missing(backend, MODEL_NAME)
+                tried.append(backend)
+                if attempt < max_retries - 1 and pool.has_other(tried, MODEL_NAME):
+                    print(f"  [Ollama] ↪️  {MODEL_NAME} is not pulled on {backend.url}, rerouting")
+                    continue
+            if _client_error(e):
+                # Bad request, or no backend has the model: it would fail everywhere
+                stats["elapsed"] = time.time() - call_start
+                raise
+            _after_failure(pool, backend, tried, RETRY_DELAY, retry=attempt < max_retries - 1,
+                           down=isinstance(e, requests.exceptions.HTTPError))
             if attempt == max_retries - 1:
+                stats["elapsed"] = time.time() - call_start
                 raise
-            time.sleep(10)
 
-    return ""
\ No newline at end of file
+        finally:
+            # A backend that answered now holds the model
+            pool.release(backend, MODEL_NAME if stats["ok"] else None)
+
+    stats["elapsed"] = time.time() - call_start
+    return ""
+
+
+# ═══════════════════════════════════════════════════════════════
+#  WARM-UP (overlapped with the crawl)
+# ═══════════════════════════════════════════════════════════════
+
+def set_keep_alive(value: str):
+    """How long the server keeps the model loaded after each request from now on (e.g. "90m")."""
+    global KEEP_ALIVE
+    KEEP_ALIVE = value
+
+
+def _warm_up_backend(backend, prefix: str, keep_alive: str) -> tuple[float, int]:
+    """(load seconds, prefix tokens) of warming up one backend."""
+    options = {"num_ctx": NUM_CTX}
+    # Empty prompt = load the model only
+    response = requests.post(backend.generate_url, json={
+        "model": MODEL_NAME, "prompt": "", "stream": False, "keep_alive": keep_alive, "options": options,
+    }, timeout=1800)
+    response.raise_for_status()
+    load_s = response.json().get("load_duration", 0) / 1e9
+
+    prefix_tokens = 0
+    if prefix:
+        response = requests.post(backend.generate_url, json={
+            "model": MODEL_NAME, "prompt": prefix, "stream": False, "keep_alive": keep_alive,
+            "options": {**options, "num_predict": 1},
+        }, timeout=1800)
+        response.raise_for_status()
+        prefix_tokens = response.json().get("prompt_eval_count", 0)
+    return load_s, prefix_tokens
+
+
+def warm_up_model(prefix: str = "", keep_alive: str | None = None) -> dict:
+    """
+    Load the model with the same options as query_ollama on every backend,
+    then optionally evaluate `prefix` (the static start of the first prompt)
+    so the first real request only processes what follows it. Never raises.
+    """
+    keep_alive = keep_alive or KEEP_ALIVE
+    WARMUP_STATS.clear()
+    WARMUP_STATS.update({"start": time.time(), "end": None, "load_s": None, "prefix_tokens": 0, "ok": False,
+                         "backends": 0})
+    pool = get_pool()
+    lock = threading.Lock()
+
+    def warm(backend):
+        try:
+            load_s, prefix_tokens = _warm_up_backend(backend, prefix, keep_alive)
+        except requests.exceptions.RequestException as e:
+            if _model_missing(e):
+                pool.mark_missing(backend, MODEL_NAME)
+            elif not _client_error(e):
+                pool.mark_failed(backend)
+            print(f"\n  [WARN] Model warm-up failed on {backend.url}: {e}")
+            return
+        pool.mark_loaded(backend, MODEL_NAME)
+        with lock:
+            WARMUP_STATS["load_s"] = max(load_s, WARMUP_STATS["load_s"] or 0.0)
+            WARMUP_STATS["prefix_tokens"] = max(prefix_tokens, WARMUP_STATS["prefix_tokens"])
+            WARMUP_STATS["backends"] += 1
+            WARMUP_STATS["ok"] = True
+
+    threads = [threading.Thread(target=in_context(warm), args=(backend,), daemon=True)
+               for backend in pool.backends if backend.healthy]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    WARMUP_STATS["end"] = time.time()
+    return WARMUP_STATS
+
+
+def start_warm_up(prefix: str = "") -> threading.Thread:
+    """Run warm_up_model() in a background thread (e.g. while the scraper runs)."""
+    thread = threading.Thread(target=in_context(warm_up_model), args=(prefix,), daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_up_report(overlap_end: float) -> str:
+    """Summary of the warm-up and of the time it overlapped with work ending at `overlap_end`."""
+    if not WARMUP_STATS:
+        return "Model warm-up not started"
+    if not WARMUP_STATS["ok"]:
+        return "Model warm-up failed — the first request paid the model load"
+    hidden = max(0.0, min(WARMUP_STATS["end"], overlap_end) - WARMUP_STATS["start"])
+    total = WARMUP_STATS["end"] - WARMUP_STATS["start"]
+    backends = f", {WARMUP_STATS['backends']} backends" if len(get_pool()) > 1 else ""
+    return (f"Model warm-up {total:.1f}s (load {WARMUP_STATS['load_s']:.1f}s, "
+            f"{WARMUP_STATS['prefix_tokens']} prefix tokens{backends}) — {hidden:.1f}s hidden behind the crawl")
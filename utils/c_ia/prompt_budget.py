@@ -0,0 +1,202 @@
+import os
+import re
+import json
+from functools import lru_cache
+
+# Token budgeting for prompts: counts tokens with the model's own tokenizer
+# (tokenizer.json loaded locally with the optional `tokenizers` package),
+# keeps the most useful sections of each offer within a per-offer allowance
+# and packs offers into requests that fit the context window.
+
+TOKENIZER_PATH = os.environ.get("JOBOT_TOKENIZER", os.path.join("inputs", "tokenizer.json"))
+
+# Tokens kept per offer in the scoring prompt (≈ the old content[:1000])
+OFFER_TOKEN_ALLOWANCE = 300
+# JSON keys, quotes and the offer name around the content, per offer
+OFFER_OVERHEAD_TOKENS = 40
+# Generated tokens per scored offer: {"id": "xxxxxxxx", "score": 32},
+SCORING_OUTPUT_TOKENS_PER_OFFER = 16
+# Kept free for the answer wrapper and tokenizer mismatches
+SAFETY_MARGIN_TOKENS = 512
+
+# Section headings found in offers, by priority (lower is kept first)
+_SECTION_PATTERNS = [
+    ("missions", 0, r"vos missions|missions? principales?|missions?|description du poste|le poste|votre role|"
+                    r"your missions|responsibilities|job description|your role|what you will do|ce que vous ferez"),
+    ("profile", 1, r"votre profil|profil recherche|profil|competences requises|prerequis|qualifications|"
+                   r"requirements|your profile|who you are|ce que nous recherchons"),
+    ("dates", 2, r"date de debut|duree|start date|duration|informations complementaires|modalites|"
+                 r"type de contrat|contract"),
+    ("company", 5, r"qui sommes[- ]nous|a propos|about us|who we are|notre entreprise|l.entreprise|"
+                   r"presentation de l.entreprise|nous sommes"),
+    ("benefits", 6, r"avantages|benefits|ce que nous offrons|ce que nous vous offrons|pourquoi nous rejoindre|"
+                    r"why join|diversite|handicap|egalite des chances|equal opportunit"),
+]
+_INTRO_PRIORITY = 3
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents, keeping the same length as the input."""
+    table = str.maketrans("àâäéèêëîïôöùûüçÀÂÄÉÈÊËÎÏÔÖÙÛÜÇ", "aaaeeeeiioouuucAAAEEEEIIOOUUUC")
+    return text.translate(table).lower()
+
+
+_HEADING_REGEX = re.compile(
+    "|".join(f"(?P<{name}>\\b(?:{pattern})\\b)" for name, _, pattern in _SECTION_PATTERNS)
+)
+_PRIORITY = {name: priority for name, priority, _ in _SECTION_PATTERNS}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  TOKEN COUNTING
+# ═══════════════════════════════════════════════════════════════
+
+@lru_cache(maxsize=1)
+def _load_tokenizer():
+    """Load the model tokenizer once; None when unavailable (heuristic fallback)."""
+    if not os.path.exists(TOKENIZER_PATH):
+        print(f"  [WARN] Tokenizer not found at {TOKENIZER_PATH} — using a heuristic token count")
+        return None
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        print("  [WARN] 'tokenizers' package not installed — using a heuristic token count")
+        return None
+    return Tokenizer.from_file(TOKENIZER_PATH)
+
+
+def _heuristic_count(text: str) -> int:
+    # Qwen's BPE averages ~3.3 chars/token on French prose; punctuation-heavy
+    # JSON is denser, so count words and symbols separately
+    words = re.findall(r"\w+", text)
+    symbols = len(re.findall(r"[^\w\s]", text))
+    return sum(1 + len(w) // 6 for w in words) + symbols
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens of `text` for the configured model."""
+    if not text:
+        return 0
+    tokenizer = _load_tokenizer()
+    if tokenizer is None:
+        return _heuristic_count(text)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+@lru_cache(maxsize=4096)
+def _offer_tokens(text: str) -> int:
+    """count_tokens() memoized for offer-sized texts, counted again for every candidate and batch."""
+    return count_tokens(text)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of `text`, cut at a sentence or word boundary, within `max_tokens`."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    cut = text[:low]
+    sentence_end = max(cut.rfind(". "), cut.rfind("; "), cut.rfind(" - "))
+    if sentence_end > len(cut) * 0.6:
+        return cut[:sentence_end + 1]
+    return cut.rsplit(" ", 1)[0] if " " in cut else cut
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SECTION-AWARE OFFER FITTING
+# ═══════════════════════════════════════════════════════════════
+
+def split_sections(content: str) -> list:
+    """Split an offer into [(section name, priority, text)] in reading order."""
+    folded = _fold(content)
+    boundaries = [(0, "intro")]
+    for match in _HEADING_REGEX.finditer(folded):
+        if not content[match.start()].isupper():
+            continue  # headings are capitalized, "la mission de…" is not one
+        if match.start() - boundaries[-1][0] < 40 and boundaries[-1][1] != "intro":
+            continue  # "Missions principales Vos missions" is one heading
+        boundaries.append((match.start(), match.lastgroup))
+
+    sections = []
+    for i, (start, name) in enumerate(boundaries):
+        end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(content)
+        text = content[start:end].strip()
+        if text:
+            sections.append((name, _PRIORITY.get(name, _INTRO_PRIORITY), text))
+    return sections
+
+
+@lru_cache(maxsize=4096)
+def fit_content(content: str, allowance: int) -> str:
+    """
+    Keep the most useful sections (missions, profile, dates, then the rest)
+    of an offer within `allowance` tokens, in their original order.
+    """
+    if _offer_tokens(content) <= allowance:
+        return content
+
+    sections = split_sections(content)
+    kept = {}
+    remaining = allowance
+    for position, (name, priority, text) in sorted(enumerate(sections), key=lambda s: (s[1][1], s[0])):
+        if remaining <= 20:
+            break
+        tokens = _offer_tokens(text)
+        if tokens <= remaining:
+            kept[position] = text
+            remaining -= tokens
+        elif priority < _PRIORITY["company"]:
+            kept[position] = _truncate_to_tokens(text, remaining)
+            remaining -= count_tokens(kept[position])
+    return " … ".join(kept[p] for p in sorted(kept))
+
+
+# ═══════════════════════════════════════════════════════════════
+#  PACKING OFFERS INTO REQUESTS
+# ═══════════════════════════════════════════════════════════════
+
+def offer_tokens(offer: dict, allowance: int = OFFER_TOKEN_ALLOWANCE) -> int:
+    """Prompt tokens taken by one offer once fitted (with its matched CV skills, if any)."""
+    return (_offer_tokens(fit_content(offer.get("content", ""), allowance))
+            + _offer_tokens(offer.get("name", "")) + OFFER_OVERHEAD_TOKENS
+            + (_offer_tokens(json.dumps(offer["skills"], ensure_ascii=False)) if offer.get("skills") else 0))
+
+
+def pack_offers(offers: list, static_tokens: int, num_ctx: int,
+                output_tokens_per_offer: int = SCORING_OUTPUT_TOKENS_PER_OFFER,
+                allowance: int = OFFER_TOKEN_ALLOWANCE) -> list:
+    """
+    Split offers into batches whose prompt + expected answer fit in `num_ctx`.
+    Each batch gets as many offers as the window allows.
+    """
+    budget = num_ctx - static_tokens - SAFETY_MARGIN_TOKENS
+    if budget <= 0:
+        raise ValueError(f"Static prompt ({static_tokens} tokens) does not fit in num_ctx={num_ctx}")
+
+    batches = [[]]
+    used = 0
+    for offer in offers:
+        cost = offer_tokens(offer, allowance) + output_tokens_per_offer
+        if batches[-1] and used + cost > budget:
+            batches.append([])
+            used = 0
+        batches[-1].append(offer)
+        used += cost
+    return [batch for batch in batches if batch]
+
+
+def budget_report(tokens: int, num_ctx: int, num_predict: int) -> str:
+    """One-line summary of a prompt of `tokens` tokens against the context window."""
+    status = "OK" if tokens + num_predict <= num_ctx else "OVERFLOW"
+    return f"{tokens} prompt tokens + {num_predict} predicted / {num_ctx} ctx [{status}]"
+
+
+def scoring_predict_tokens(offer_count: int) -> int:
+    """num_predict needed to score `offer_count` offers."""
+    return SCORING_OUTPUT_TOKENS_PER_OFFER * offer_count + 64
+
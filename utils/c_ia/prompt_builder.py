@@ -1,149 +1,97 @@
 import json
-
-
-def build_scoring_prompt(cv_data: dict, internships_data: list, user_prompt: str) -> str:
-    """
-    Build the prompt that asks the AI to score ALL job offers against the CV.
-    Returns a structured prompt instructing the model to output JSON.
-    """
-
-    # Extract key CV info for the prompt
-    experiences_summary = []
-    for exp in cv_data.get("experiences", []):
-        experiences_summary.append({
-            "index": exp["index"],
-            "name": exp["name"],
-            "period": exp["period"],
-            "categorization": exp["categorization"],
-            "skills": exp.get("skills", [])
-        })
-
-    skills_summary = cv_data.get("skills", [])
-    perso_info = cv_data.get("Perso", [{}])[0]
-
-    # Simplify internship data to reduce token count
-    internships_simplified = []
-    for offer in internships_data:
-        internships_simplified.append({
-            "name": offer.get("name", ""),
-            "company": offer.get("company", ""),
-            "location": offer.get("location", ""),
-            "content": offer.get("content", "")[:1000]  # Truncate very long descriptions
-        })
-
-    prompt = f"""Tu es un expert en recrutement et en matching de profils candidats avec des offres de stage.
+from utils.c_ia.ollama_client import NUM_CTX
+from utils.c_ia.prompt_budget import count_tokens, fit_content, OFFER_TOKEN_ALLOWANCE
+from utils.c_ia.prompt_templates import (
+    compact_json, encode_experiences, encode_skills, compile_sections, section_tokens, section_token_report,
+)
+
+# ═══════════════════════════════════════════════════════════════
+#  TEMPLATES
+#  Heads only depend on the CV and the user prompt: they are compiled once
+#  per run by compile_sections(). Offers are inserted as minified JSON.
+# ═══════════════════════════════════════════════════════════════
+
+# Profile lines used when the CV "Perso" entry does not give them (batch
+# mode candidates set "formation", "competences", "recherche", "domaines")
+DEFAULT_PROFILE = {
+    "formation": "Étudiant en 5ème année école d'ingénieur (ECAM Lyon), spécialisation Supply Chain Management",
+    "competences": "Fort interet pour la Data, maîtrise de Python, Excel avancé, pandas, numpy, matplotlib, "
+                   "seaborn, scikit-learn, et à de multiples projets à son actif",
+    "recherche": "Stage de fin d'études à partir de juin 2026",
+    "domaines": "Data Analysis ET/OU Supply Chain",
+}
+
+SCORING_HEAD = """Tu es un expert en recrutement et en matching de profils candidats avec des offres de stage.
 
 CONTEXTE UTILISATEUR : {user_prompt}
 
 PROFIL DU CANDIDAT :
-- Nom : {perso_info.get("nom", "Hugo MANIPOUD")}
-- Formation : Étudiant en 5ème année école d'ingénieur (ECAM Lyon), spécialisation Supply Chain Management
-- Compétences supplementaires : Fort interet pour la Data, maîtrise de Python, Excel avancé, pandas, numpy, matplotlib, seaborn, scikit-learn, et à de multiples projets à son actif
-- Recherche : Stage de fin d'études à partir de juin 2026
-- Domaines cibles : Data Analysis ET/OU Supply Chain
+- Nom : {name}
+- Formation : {formation}
+- Compétences supplementaires : {extra_skills}
+- Recherche : {search}
+- Domaines cibles : {domains}
 
-EXPÉRIENCES DU CANDIDAT :
-{json.dumps(experiences_summary, ensure_ascii=False, indent=2)}
+EXPÉRIENCES DU CANDIDAT ([index] intitulé (période, catégorie) : compétences) :
+{experiences}
 
-COMPÉTENCES DU CANDIDAT (indexées par domaine et priorité) :
-{json.dumps(skills_summary, ensure_ascii=False, indent=2)}
+COMPÉTENCES DU CANDIDAT (domaine / priorité : compétences) :
+{skills}
 
 ---
 
 LISTE DES OFFRES DE STAGE À ÉVALUER :
-{json.dumps(internships_simplified, ensure_ascii=False, indent=2)}
+"""
 
+SCORING_TAIL = """
 ---
 
 INSTRUCTIONS :
-Tu dois scorer CHAQUE offre de stage sur 100 points en fonction des critères suivants :
-1. **Correspondance compétences** (40 pts) : Les compétences demandées dans l'offre correspondent-elles aux compétences du candidat (supply_chain et/ou data) ?
-   - t_prio skills match = max points
-   - prio skills match = points moyens
-   - bonus skills match = points bonus
-2. **Correspondance formation/niveau** (10 pts) : L'offre demande-t-elle un Bac+4/5, école d'ingénieur, stage de fin d'études ? Si oui, points complets, sinon 0
-3. **Prestige de l'entreprise** (20 pts) : Point maximum si la boite fait parti du Cac40, du S&P 500, si cest une big 3 ou une big 4. Point maximum pour les offres d'audit ou conseil, sinon réduire en fonction de la notoriété de l'entreprise (ex: 15 pts pour une entreprise de taille intermédiaire, 5 pts pour une petite entreprise locale)
-4. **Localisation** (15 pts) : Point maximum si L'offres est à Lyon, Paris, ou Montpellier, reduire de 1 point pour chaque 1km au-delà, des villes citées, (ex 10 km de la ville = 5 pts, 20 km = 0 pts)
-5. **Période** (15 pts) : L'offre commence-t-elle autour de juin/juillet 2026 ?
+Tu dois scorer CHAQUE offre de stage sur 40 points selon la correspondance des compétences
+(la localisation, le niveau d'études, la période et le prestige de l'entreprise sont déjà calculés par ailleurs, ne les évalue pas) :
+- Les compétences demandées dans l'offre correspondent-elles aux compétences du candidat (supply_chain et/ou data) ?
+- Le champ "skills" d'une offre (s'il existe) liste les compétences du candidat citées dans le texte complet de l'offre, du plus au moins fréquent
+- t_prio skills match = max points
+- prio skills match = points moyens
+- bonus skills match = points bonus
 
 
 Réponds UNIQUEMENT avec un JSON valide au format suivant :
-{{
-  "scoring": [
-    {{
-      "name": "nom exact de l'offre tel que dans la liste",
-      "score": 85
-    }},
-    ...
-  ]
-}}
+{"scoring":[{"id":"identifiant de l'offre (champ id)","score":32}, ...]}
 
 Classe les résultats du score le plus élevé au plus bas.
 Ne rajoute AUCUN texte en dehors du JSON.
 """
-    
-    estimated_tokens = len(prompt) // 4
-    print(f"  [INFO] Scoring prompt estimated tokens: ~{estimated_tokens} tokens")
-    if estimated_tokens > 32768:
-        print("  [WARNING] Scoring prompt may exceed model context window!")
-    return prompt
-
-
-def build_match_prompt(cv_data: dict, top_offers: list, internships_data: list, user_prompt: str) -> str:
-    """
-    Build the prompt for the top 5 offers: extract detailed match info,
-    relevant skill indexes, and generate a cover letter for each.
-    """
 
-    # Get the full offer data for the top 5
-    top_offers_full = []
-    for scored_offer in top_offers:
-        offer_name = scored_offer["name"]
-        for internship in internships_data:
-            if internship.get("name", "") == offer_name:
-                top_offers_full.append({
-                    "name": internship["name"],
-                    "URL": internship.get("URL", ""),
-                    "company": internship.get("company", ""),
-                    "location": internship.get("location", ""),
-                    "content": internship.get("content", ""),
-                    "score": scored_offer["score"]
-                })
-                break
-
-    skills_summary = cv_data.get("skills", [])
-    experiences = cv_data.get("experiences", [])
-    perso_info = cv_data.get("Perso", [{}])[0]
-
-    prompt = f"""Tu es un expert en recrutement. Le candidat suivant cherche un stage de fin d'études.
+MATCH_HEAD = """Tu es un expert en recrutement. Le candidat suivant cherche un stage de fin d'études.
 
 CONTEXTE : {user_prompt}
 
 PROFIL DU CANDIDAT :
-- Nom : {perso_info.get("nom", "Hugo MANIPOUD")}
-- Email : {perso_info.get("mail", "")}
-- Téléphone : {perso_info.get("numero", "")}
-- Formation : 5ème année école d'ingénieur ECAM Lyon, spécialisation Supply Chain Management
-- Phrase d'intro Data : {perso_info.get("phrase_intro", {}).get("data", "")}
-- Phrase d'intro Supply Chain : {perso_info.get("phrase_intro", {}).get("supply_chain", "")}
+- Nom : {name}
+- Email : {mail}
+- Téléphone : {phone}
+- Formation : {formation}
+- Phrase d'intro Data : {intro_data}
+- Phrase d'intro Supply Chain : {intro_supply_chain}
 
-EXPÉRIENCES DU CANDIDAT (avec index) :
-{json.dumps(experiences, ensure_ascii=False, indent=2)}
+EXPÉRIENCES DU CANDIDAT ([index] intitulé (période, catégorie) : compétences, puis description) :
+{experiences}
 
-COMPÉTENCES DU CANDIDAT (indexées par domaine et niveau de priorité) :
-{json.dumps(skills_summary, ensure_ascii=False, indent=2)}
+COMPÉTENCES DU CANDIDAT (domaine / priorité : compétences) :
+{skills}
 
 ---
 
-TOP 5 OFFRES SÉLECTIONNÉES (avec leur score) :
-{json.dumps(top_offers_full, ensure_ascii=False, indent=2)}
+"""
 
+MATCH_TAIL = """
 ---
 
 INSTRUCTIONS :
 Pour l'offre avec le meileur score, tu dois produire :
 
-1. **skills** : une liste des INDEX des expériences du CV (champ "index" dans les expériences) qui sont les plus pertinentes à mettre en avant pour CETTE offre spécifique. Choisis les 6 expériences les plus pertinentes.
+1. **skills** : une liste des INDEX des expériences du CV (numéro entre crochets devant chaque expérience) qui sont les plus pertinentes à mettre en avant pour CETTE offre spécifique. Choisis les 6 expériences les plus pertinentes.
 
 2. **cover_letter** : une lettre de motivation en FRANÇAIS, professionnelle mais naturelle, personnalisée pour cette offre.
    - Sert toi de la description de l'offre et des expériences/compétences du candidat pour faire le lien et montrer pourquoi il est un bon match
@@ -154,17 +102,121 @@ Pour l'offre avec le meileur score, tu dois produire :
    - NE PAS inclure d'en-tête (pas de date, pas d'adresse) — juste le corps de la lettre
    - Commence par "Madame, Monsieur," et termine par la formule de politesse suivante : "En attendant de pouvoir échanger à nouveau avec vous, veuillez accepter mes sincères salutations." 
 
+Réponds UNIQUEMENT avec un JSON valide au format suivant :
+{"match":[{"id":"identifiant de l'offre (champ id)","skills":[1,2,4,6],"cover_letter":"Madame, Monsieur,\\n\\nActuellement en 5ème année...\\n\\n..."}, ...]}
+
+Ne rajoute AUCUN texte en dehors du JSON.
+"""
+
+
+def _scoring_sections(cv_data: dict, user_prompt: str) -> dict:
+    def render():
+        perso_info = cv_data.get("Perso", [{}])[0]
+        profile = {**DEFAULT_PROFILE, **perso_info}
+        head = SCORING_HEAD.format(
+            user_prompt=user_prompt,
+            name=perso_info.get("nom", "Hugo MANIPOUD"),
+            formation=profile["formation"],
+            extra_skills=profile["competences"],
+            search=profile["recherche"],
+            domains=profile["domaines"],
+            experiences=encode_experiences(cv_data.get("experiences", [])),
+            skills=encode_skills(cv_data.get("skills", [])),
+        )
+        return {"head": head, "tail": SCORING_TAIL}
+
+    return compile_sections("scoring", (cv_data, user_prompt, SCORING_HEAD, SCORING_TAIL, DEFAULT_PROFILE), render)
+
+
+def _match_sections(cv_data: dict, user_prompt: str) -> dict:
+    def render():
+        perso_info = cv_data.get("Perso", [{}])[0]
+        head = MATCH_HEAD.format(
+            user_prompt=user_prompt,
+            name=perso_info.get("nom", "Hugo MANIPOUD"),
+            mail=perso_info.get("mail", ""),
+            phone=perso_info.get("numero", ""),
+            formation=perso_info.get("formation", DEFAULT_PROFILE["formation"]),
+            intro_data=perso_info.get("phrase_intro", {}).get("data", ""),
+            intro_supply_chain=perso_info.get("phrase_intro", {}).get("supply_chain", ""),
+            experiences=encode_experiences(cv_data.get("experiences", []), detailed=True),
+            skills=encode_skills(cv_data.get("skills", [])),
+        )
+        return {"head": head, "tail": MATCH_TAIL}
+
+    return compile_sections("match", (cv_data, user_prompt, MATCH_HEAD, MATCH_TAIL, DEFAULT_PROFILE), render)
+
+
+def scoring_prefix(cv_data: dict, user_prompt: str) -> str:
+    """Static start shared by every scoring prompt of this candidate (used to warm the model)."""
+    return _scoring_sections(cv_data, user_prompt)["head"]
+
+
+def scoring_static_tokens(cv_data: dict, user_prompt: str) -> int:
+    """Tokens of a scoring prompt without its offers (to pack the offers around it)."""
+    static = _scoring_sections(cv_data, user_prompt)
+    return count_tokens(static["head"]) + count_tokens(compact_json([])) + count_tokens(static["tail"])
+
+
+def build_scoring_prompt(cv_data: dict, internships_data: list, user_prompt: str,
+                         offer_allowance: int = OFFER_TOKEN_ALLOWANCE) -> tuple[str, int]:
+    """
+    Build the prompt that asks the AI to score job offers against the CV.
+    Each offer is reduced to its most useful sections within `offer_allowance` tokens
+    and keeps its "skills" (CV skills found by the tag stage) if it has some.
+    Returns a structured prompt instructing the model to output JSON, and its
+    token count (each section is counted once, here).
+    """
+    static = _scoring_sections(cv_data, user_prompt)
+
+    # Simplify internship data to reduce token count
+    internships_simplified = []
+    for offer in internships_data:
+        simplified = {
+            "id": offer["id"],
+            "name": offer.get("name", ""),
+            "content": fit_content(offer.get("content", ""), offer_allowance)
+        }
+        if offer.get("skills"):
+            # CV skills the tag stage found in the full content
+            simplified["skills"] = offer["skills"]
+        internships_simplified.append(simplified)
+
+    sections = {"head": static["head"], "offers": compact_json(internships_simplified), "tail": static["tail"]}
+    prompt = "".join(sections.values())
+
+    counts = section_tokens(sections)
+    prompt_tokens = sum(counts.values())
+    print(f"  [INFO] Scoring prompt: {section_token_report(counts)}, {len(internships_data)} offers")
+    if prompt_tokens > NUM_CTX:
+        print("  [WARNING] Scoring prompt exceeds model context window!")
+    return prompt, prompt_tokens
+
+
+def build_prestige_prompt(companies: list) -> tuple[str, int]:
+    """
+    Build a short prompt asking the AI to classify companies that are not
+    in the local prestige table. The answer is cached, so each company is
+    only ever asked once. Returns the prompt and its token count.
+    """
+
+    prompt = f"""Tu es un expert du marché de l'emploi en France.
+
+Classe chaque entreprise de la liste dans un des niveaux suivants :
+- "top" : entreprise du CAC40 ou du S&P 500 (ou filiale), Big 3 du conseil, Big 4 de l'audit, grand cabinet d'audit ou de conseil
+- "large" : grande entreprise ou institution connue hors de ces indices
+- "mid" : entreprise de taille intermédiaire
+- "small" : petite entreprise locale ou start-up
+
+ENTREPRISES :
+{json.dumps(companies, ensure_ascii=False)}
+
 Réponds UNIQUEMENT avec un JSON valide au format suivant :
 {{
-  "match": [
+  "companies": [
     {{
-      "name": "nom exact de l'offre",
-      "URL": "URL de l'offre",
-      "company": "nom de l'entreprise",
-      "location": "localisation",
-      "score": 85,
-      "skills": [1, 2, 4, 6],
-      "cover_letter": "Madame, Monsieur,\\n\\nActuellement en 5ème année...\\n\\n..."
+      "company": "nom exact de l'entreprise tel que dans la liste",
+      "tier": "large"
     }},
     ...
   ]
@@ -172,4 +224,47 @@ Réponds UNIQUEMENT avec un JSON valide au format suivant :
 
 Ne rajoute AUCUN texte en dehors du JSON.
 """
-    return prompt
\ No newline at end of file
+    return prompt, count_tokens(prompt)
+
+
+def build_match_prompt(cv_data: dict, top_offers: list, offers_by_id: dict, user_prompt: str,
+                       company_summaries: dict | None = None) -> tuple[str, int]:
+    """
+    Build the prompt for the top 5 offers: extract detailed match info,
+    relevant skill indexes, and generate a cover letter for each.
+    `top_offers` are scoring entries, joined to the scraped offers by ID.
+    `company_summaries` holds the text stripped from offers as boilerplate,
+    given once per company of the top offers.
+    Returns the prompt and its token count.
+    """
+
+    # Get the full offer data for the top 5
+    top_offers_full = []
+    for scored_offer in top_offers:
+        internship = offers_by_id[scored_offer["id"]]
+        top_offers_full.append({
+            "id": internship["id"],
+            "name": internship.get("name", ""),
+            "company": internship.get("company", ""),
+            "location": internship.get("location", ""),
+            "content": internship.get("content", ""),
+            "score": scored_offer["score"]
+        })
+
+    companies_context = ""
+    top_companies = {offer["company"] for offer in top_offers_full}
+    summaries = {c: s for c, s in (company_summaries or {}).items() if c in top_companies}
+    if summaries:
+        companies_context = "PRÉSENTATION DES ENTREPRISES (commune à toutes leurs offres) :\n"
+        companies_context += "\n".join(f"- {company} : {summary}" for company, summary in summaries.items())
+        companies_context += "\n\n"
+
+    static = _match_sections(cv_data, user_prompt)
+    sections = {
+        "head": static["head"],
+        "offers": f"{companies_context}TOP 5 OFFRES SÉLECTIONNÉES (avec leur score) :\n{compact_json(top_offers_full)}",
+        "tail": static["tail"],
+    }
+    counts = section_tokens(sections)
+    print(f"  [INFO] Match prompt: {section_token_report(counts)}, {len(top_offers_full)} offers")
+    return "".join(sections.values()), sum(counts.values())
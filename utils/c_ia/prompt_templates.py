@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import threading
+from utils.c_ia.prompt_budget import count_tokens
+
+# Compiled prompt templates: the sections that only depend on the CV and the
+# user prompt are rendered once per run (and cached on disk keyed by their
+# inputs), then reused by every request. Data is written in a compact form:
+# minified JSON for offers, one terse line per CV experience / skill group.
+
+PROMPT_CACHE_PATH = os.path.join("outputs", "cache", "prompt_sections.json")
+# Renderings kept on disk per prompt (one per candidate in batch mode)
+MAX_RENDERINGS_PER_PROMPT = 32
+
+_compiled = {}
+_disk_cache = None
+_lock = threading.Lock()
+
+
+# ═══════════════════════════════════════════════════════════════
+#  COMPACT ENCODINGS
+# ═══════════════════════════════════════════════════════════════
+
+def compact_json(value) -> str:
+    """Minified JSON: no indentation nor spaces after separators."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_experiences(experiences: list, detailed: bool = False) -> str:
+    """
+    One line per experience: "[index] name (period, category) : skill ; skill".
+    `detailed` adds the description on an indented second line.
+    """
+    lines = []
+    for exp in experiences:
+        line = f"[{exp['index']}] {exp['name']} ({exp.get('period', '')}, {exp.get('categorization', '')})"
+        if exp.get("skills"):
+            line += " : " + " ; ".join(exp["skills"])
+        lines.append(line)
+        if detailed and exp.get("description"):
+            lines.append(f"    {exp['description']}")
+    return "\n".join(lines)
+
+
+def encode_skills(skills: list) -> str:
+    """One line per domain and priority: "domain / priority : skill, skill"."""
+    lines = []
+    for group in skills:
+        for domain, priorities in group.items():
+            for priority, names in priorities.items():
+                lines.append(f"{domain} / {priority} : {', '.join(names)}")
+    return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════
+#  STATIC SECTION CACHE
+# ═══════════════════════════════════════════════════════════════
+
+def fingerprint(*parts) -> str:
+    """Stable hash of JSON-serializable inputs (CV, user prompt, template text...)."""
+    canonical = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_disk_cache() -> dict:
+    global _disk_cache
+    if _disk_cache is None:
+        _disk_cache = {}
+        if os.path.exists(PROMPT_CACHE_PATH):
+            try:
+                with open(PROMPT_CACHE_PATH, "r", encoding="utf-8") as f:
+                    _disk_cache = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print(f"  [WARN] Ignoring unreadable prompt cache: {PROMPT_CACHE_PATH}")
+    return _disk_cache
+
+
+def compile_sections(name: str, inputs: tuple, render) -> dict:
+    """
+    Return the static sections of the `name` prompt for these `inputs`.
+    `render()` builds them ({section: text}) only on a cache miss.
+    """
+    key = f"{name}:{fingerprint(*inputs)}"
+    with _lock:
+        if key in _compiled:
+            return _compiled[key]
+
+        disk_cache = _load_disk_cache()
+        sections = disk_cache.get(key)
+        if sections is None:
+            sections = render()
+            # Forget the oldest renderings of this prompt (dicts keep insertion order)
+            same_prompt = [k for k in disk_cache if k.startswith(f"{name}:")]
+            for stale in same_prompt[:max(0, len(same_prompt) + 1 - MAX_RENDERINGS_PER_PROMPT)]:
+                del disk_cache[stale]
+            disk_cache[key] = sections
+            os.makedirs(os.path.dirname(PROMPT_CACHE_PATH), exist_ok=True)
+            with open(PROMPT_CACHE_PATH + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(disk_cache, f, ensure_ascii=False)
+            os.replace(PROMPT_CACHE_PATH + ".tmp", PROMPT_CACHE_PATH)
+        _compiled[key] = sections
+        return sections
+
+
+def section_tokens(sections: dict) -> dict:
+    """{section name: tokens}; the prompt holds their sum."""
+    return {name: count_tokens(text) for name, text in sections.items()}
+
+
+def section_token_report(counts: dict) -> str:
+    """Tokens per prompt section, e.g. "1234 tokens (head 800 · offers 400 · tail 34)"."""
+    detail = " · ".join(f"{name} {tokens}" for name, tokens in counts.items())
+    return f"{sum(counts.values())} tokens ({detail})"
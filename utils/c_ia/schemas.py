@@ -0,0 +1,183 @@
+import re
+import json
+
+# JSON schemas passed as Ollama's `format` (grammar-constrained output) and
+# the matching validators, which report exactly which offers are missing or
+# malformed so only those are asked again.
+
+SKILLS_MAX_POINTS = 40
+TIERS = ["top", "large", "mid", "small"]
+
+
+def scoring_schema(ids: list) -> dict:
+    return {
+        "type": "object",
+        "properties": {
+            "scoring": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string", "enum": sorted(set(ids))},
+                        "score": {"type": "integer", "minimum": 0, "maximum": SKILLS_MAX_POINTS},
+                    },
+                    "required": ["id", "score"],
+                },
+            }
+        },
+        "required": ["scoring"],
+    }
+
+
+def match_schema(ids: list, experience_indexes: list) -> dict:
+    return {
+        "type": "object",
+        "properties": {
+            "match": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string", "enum": sorted(set(ids))},
+                        "skills": {
+                            "type": "array",
+                            "items": {"type": "integer", "enum": sorted(set(experience_indexes))},
+                        },
+                        "cover_letter": {"type": "string"},
+                    },
+                    "required": ["id", "skills", "cover_letter"],
+                },
+            }
+        },
+        "required": ["match"],
+    }
+
+
+def prestige_schema(companies: list) -> dict:
+    return {
+        "type": "object",
+        "properties": {
+            "companies": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "company": {"type": "string", "enum": sorted(set(companies))},
+                        "tier": {"type": "string", "enum": TIERS},
+                    },
+                    "required": ["company", "tier"],
+                },
+            }
+        },
+        "required": ["companies"],
+    }
+
+
+def _entries(result, list_key: str) -> list:
+    if not isinstance(result, dict) or not isinstance(result.get(list_key), list):
+        return []
+    return [entry for entry in result[list_key] if isinstance(entry, dict)]
+
+
+def validate_scoring(result, expected_ids: list) -> tuple[dict, list]:
+    """
+    Return ({id: entry} for well-formed entries, [ids missing or malformed]).
+    Scores are rounded and must lie within the skills range.
+    """
+    expected = set(expected_ids)
+    valid = {}
+    for entry in _entries(result, "scoring"):
+        offer_id = entry.get("id")
+        score = entry.get("score")
+        # Checked before the set lookups: a list or dict id is unhashable
+        if not isinstance(offer_id, str) or offer_id not in expected or offer_id in valid:
+            continue
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            continue
+        if not 0 <= score <= SKILLS_MAX_POINTS:
+            continue
+        valid[offer_id] = {**entry, "score": int(round(score))}
+    return valid, [i for i in dict.fromkeys(expected_ids) if i not in valid]
+
+
+def validate_match(result, expected_ids: list, experience_indexes: list) -> tuple[dict, list]:
+    """Return ({id: entry} for well-formed entries, [ids missing or malformed])."""
+    expected = set(expected_ids)
+    indexes = set(experience_indexes)
+    valid = {}
+    for entry in _entries(result, "match"):
+        offer_id = entry.get("id")
+        skills = entry.get("skills")
+        letter = entry.get("cover_letter")
+        if not isinstance(offer_id, str) or offer_id not in expected or offer_id in valid:
+            continue
+        if (not isinstance(skills, list) or not skills
+                or any(isinstance(s, bool) or not isinstance(s, int) or s not in indexes for s in skills)):
+            continue
+        if not isinstance(letter, str) or not letter.strip():
+            continue
+        valid[offer_id] = entry
+    return valid, [i for i in dict.fromkeys(expected_ids) if i not in valid]
+
+
+def validate_prestige(result, expected_companies: list) -> tuple[dict, list]:
+    """Return ({company: tier} for well-formed entries, [companies missing or malformed])."""
+    expected = set(expected_companies)
+    valid = {}
+    for entry in _entries(result, "companies"):
+        company = entry.get("company")
+        tier = entry.get("tier")
+        if isinstance(company, str) and company in expected and isinstance(tier, str) and tier in TIERS:
+            valid.setdefault(company, entry["tier"])
+    return valid, [c for c in dict.fromkeys(expected_companies) if c not in valid]
+
+
+def parse_json_response(raw_text: str):
+    """Parse a model answer, tolerating extra text around the JSON block."""
+    try:
+        return json.loads(raw_text)
+    except json.JSONDecodeError:
+        pass
+
+    # Try to find JSON between { and }
+    start = raw_text.find("{")
+    end = raw_text.rfind("}") + 1
+    if start != -1 and end > start:
+        try:
+            return json.loads(raw_text[start:end])
+        except json.JSONDecodeError:
+            pass
+
+    # Try to find JSON between ```json and ```
+    if "```json" in raw_text:
+        json_block = raw_text.split("```json")[1].split("```")[0].strip()
+        try:
+            return json.loads(json_block)
+        except json.JSONDecodeError:
+            pass
+
+    return _salvage_items(raw_text)
+
+
+def _salvage_items(raw_text: str) -> dict | None:
+    """
+    Recover the complete items of a truncated answer, e.g. when generation
+    stopped at num_predict: '{"scoring": [{...}, {...}, {"id": "x", "sc'.
+    """
+    header = re.search(r'"(\w+)"\s*:\s*\[', raw_text)
+    if header is None:
+        return None
+
+    decoder = json.JSONDecoder()
+    items = []
+    position = header.end()
+    while True:
+        position = raw_text.find("{", position)
+        if position == -1:
+            break
+        try:
+            item, position = decoder.raw_decode(raw_text, position)
+        except json.JSONDecodeError:
+            break
+        items.append(item)
+    return {header.group(1): items} if items else None
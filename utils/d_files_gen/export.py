@@ -0,0 +1,62 @@
+import os
+import time
+import zipfile
+from utils.d_files_gen.pdf_generator import get_renderer
+from utils.c_ia.offer_tags import load_tags
+from utils.d_files_gen.files_gen_launcher import (
+    load_run_inputs, plan_applications, DEFAULT_CV_PATH, DEFAULT_PHOTO_PATH,
+)
+
+# Export of a run's applications as a single ZIP, rendered straight into the
+# archive: every PDF is built in memory and written to its ZIP entry, with no
+# file in the run folder. Each offer gives either its CV and cover letter
+# (CV_*.pdf, LM_*.pdf) or one merged PDF holding both (merged=True).
+
+
+def export_applications(date: str, output=None, merged: bool = False,
+                        cv_path: str = DEFAULT_CV_PATH, photo_path: str = DEFAULT_PHOTO_PATH) -> bool:
+    """
+    Write the applications of run `date` into a ZIP at `output` (a path or a
+    writable, possibly unseekable, file object). Defaults to
+    outputs/data[{date}]/applications[_merged].zip.
+    """
+    print("=" * 60)
+    print(f"[EXPORT] Bundling the applications of run {date}...")
+    print("=" * 60)
+
+    inputs = load_run_inputs(date, cv_path, photo_path)
+    if inputs is None:
+        return False
+    cv_data, photo_path, matches = inputs
+    renderer = get_renderer(cv_data, photo_path)
+
+    if output is None:
+        output = os.path.join("outputs", f"data[{date}]", f"applications{'_merged' if merged else ''}.zip")
+    path = output if isinstance(output, str) else None
+
+    start = time.perf_counter()
+    count = 0
+    # PDF streams are already compressed: store them as they are
+    with zipfile.ZipFile(f"{path}.tmp" if path else output, "w", zipfile.ZIP_STORED) as archive:
+        for application in plan_applications(cv_data, matches, load_tags(date)):
+            stem = application["file_stem"]
+            selected = application["selected_experiences"]
+            match = application["match"]
+            is_supply_chain = application["is_supply_chain"]
+            if merged:
+                with archive.open(f"{stem}.pdf", "w") as entry:
+                    renderer.render_application(entry, selected, match, is_supply_chain, date)
+                count += 1
+            else:
+                with archive.open(f"CV_{stem}.pdf", "w") as entry:
+                    renderer.render_cv(entry, selected, is_supply_chain)
+                with archive.open(f"LM_{stem}.pdf", "w") as entry:
+                    renderer.render_cover_letter(entry, match, is_supply_chain, date)
+                count += 2
+    if path:
+        os.replace(f"{path}.tmp", path)
+
+    size = os.path.getsize(path) if path else None
+    print(f"[EXPORT] {count} PDFs for {len(matches)} offers in {time.perf_counter() - start:.1f}s"
+          + (f" → {path} ({size / 1024:.0f} KB)" if path else ""))
+    return True
@@ -1,12 +1,37 @@
 import os
 import json
-from utils.d_files_gen.pdf_generator import generate_cv_pdf, generate_cover_letter_pdf
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.offer_ids import index_offers
+from utils.tracing import span, traced, record
+from utils.d_files_gen.pdf_generator import CVRenderer
+from utils.d_files_gen import pdf_cache
+from utils.d_files_gen.pdf_assets import prepare_photo
+from utils.c_ia.offer_tags import load_tags, offer_domain
 
+DEFAULT_CV_PATH = os.path.join("inputs", "cv.json")
+DEFAULT_PHOTO_PATH = os.path.join("inputs", "photo.jpeg")
 
-def run_pdf_generation(date: str):
+# Processes rendering PDFs in parallel (1 = render in this process)
+PDF_WORKERS = int(os.environ.get("JOBOT_PDF_WORKERS", os.cpu_count() or 1))
+
+# Keywords of a supply chain offer title (otherwise a data offer), for offers
+# the tag stage could not classify
+SC_KEYWORDS = [
+    "supply chain", "logistique", "logisticien", "approvisionnement",
+    "entrepôt", "warehouse", "flux", "gestionnaire logistique",
+    "s&op", "planification", "inventory", "stock"
+]
+
+
+def run_pdf_generation(date: str, workers: int = PDF_WORKERS, use_cache: bool = True,
+                       cv_path: str = DEFAULT_CV_PATH, photo_path: str = DEFAULT_PHOTO_PATH) -> bool:
     """
     Main entry point for PDF generation.
-    Reads match.json and cv.json, generates 1 CV + 1 cover letter per matched offer.
+    Reads match.json and the CV, generates 1 CV + 1 cover letter per matched offer,
+    rendered in parallel by `workers` processes. PDFs whose inputs were already
+    rendered in an earlier run are taken from the artifact cache (`use_cache`).
     Outputs go into outputs/data[{date}]/pdf/
     """
 
@@ -14,89 +39,218 @@ def run_pdf_generation(date: str):
     print("[D_PDF] Starting PDF generation...")
     print("=" * 60)
 
-    # ─── Load input files ────────────────────────────────────────
-    cv_path = os.path.join("inputs", "cv.json")
-    photo_path = os.path.join("inputs", "photo.jpeg")
-    match_path = os.path.join("outputs", f"data[{date}]", "match.json")
+    inputs = load_run_inputs(date, cv_path, photo_path)
+    if inputs is None:
+        return False
+    cv_data, photo_path, matches = inputs
+    # Resampled once here, before the worker processes start
+    with span("prepare photo"):
+        photo_path = prepare_photo(photo_path)
+    print(f"  [INFO] Found {len(matches)} matched offers to generate PDFs for\n")
+
+    # Create pdf output dir if it doesn't exist
     pdf_output_dir = os.path.join("outputs", f"data[{date}]", "pdf")
+    os.makedirs(pdf_output_dir, exist_ok=True)
+
+    # ─── Prepare one CV job + one cover letter job per offer ─────
+    jobs = []
+    for i, application in enumerate(plan_applications(cv_data, matches, load_tags(date))):
+        jobs.append((i, application["label"], "CV", {
+            "output_path": os.path.join(pdf_output_dir, f"CV_{application['file_stem']}.pdf"),
+            "selected_experiences": application["selected_experiences"],
+            "is_supply_chain": application["is_supply_chain"],
+        }))
+        jobs.append((i, application["label"], "LM", {
+            "output_path": os.path.join(pdf_output_dir, f"LM_{application['file_stem']}.pdf"),
+            "match": application["match"],
+            "is_supply_chain": application["is_supply_chain"],
+            "date": date,
+        }))
+
+    # ─── Reuse PDFs rendered by earlier runs ─────────────────────
+    start = time.perf_counter()
+    results = {}
+    cached = set()
+    keys = {}
+    with span("cache lookup"):
+        for i, _, kind, kwargs in jobs:
+            if use_cache:
+                keys[(i, kind)] = pdf_cache.render_key(kind, kwargs, cv_data, photo_path)
+                if pdf_cache.fetch(keys[(i, kind)], kwargs["output_path"]):
+                    results[(i, kind)] = (None, 0.0, 0.0, None)
+                    cached.add((i, kind))
+                    continue
+            # Never render through a hard link: it would overwrite the cached copy
+            if os.path.exists(kwargs["output_path"]):
+                os.remove(kwargs["output_path"])
+    to_render = [job for job in jobs if (job[0], job[2]) not in cached]
+    if use_cache:
+        print(f"  [INFO] PDF cache: {len(cached)} hits, {len(to_render)} misses")
+
+    # ─── Render (ReportLab is CPU-bound: one process per core) ───
+    # Each process builds the renderer (styles, photo, experience blocks) once
+    workers = max(1, min(workers, len(to_render)))
+    if to_render:
+        print(f"  [INFO] Rendering {len(to_render)} PDFs with {workers} worker(s)\n")
+    with span("render", workers=workers):
+        if workers == 1:
+            if to_render:
+                _init_renderer(cv_data, photo_path)
+            for job in to_render:
+                results[(job[0], job[2])] = _render(job[2], job[3])
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_renderer,
+                                     initargs=(cv_data, photo_path)) as pool:
+                futures = {pool.submit(_render, job[2], job[3]): (job[0], job[2]) for job in to_render}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        # Timed in the worker processes
+        for i, _, kind, kwargs in to_render:
+            _, seconds, cpu_seconds, _ = results[(i, kind)]
+            record(f"doc.build {kind}", "call", seconds, cpu_seconds, file=os.path.basename(kwargs["output_path"]))
+    elapsed = time.perf_counter() - start
+
+    if use_cache:
+        with span("cache store"):
+            for i, _, kind, kwargs in to_render:
+                if results[(i, kind)][0] is None:
+                    pdf_cache.store(keys[(i, kind)], kwargs["output_path"])
+            removed, freed = pdf_cache.evict()
+        if removed:
+            print(f"  [INFO] PDF cache: evicted {removed} files ({freed / 1024 / 1024:.1f} MB)\n")
+
+    # ─── Report per offer, in match order ────────────────────────
+    failed_offers = []
+    total_bytes = 0
+    for i, label, kind, kwargs in jobs:
+        if kind == "CV":
+            print(f"  [{i+1}/{len(matches)}] {label}")
+            print(f"    Type: {'Supply Chain' if kwargs['is_supply_chain'] else 'Data'}")
+        error, seconds, _, note = results[(i, kind)]
+        if error is None:
+            size = os.path.getsize(kwargs["output_path"])
+            total_bytes += size
+        if (i, kind) in cached:
+            print(f"    ♻️  {kind}  → {kwargs['output_path']} (cached, {size / 1024:.0f} KB)")
+        elif error is None:
+            print(f"    ✅ {kind}  → {kwargs['output_path']} ({seconds:.2f}s, {size / 1024:.0f} KB)")
+            if note:
+                print(f"       Fitted to one page: {note}")
+        else:
+            print(f"    ❌ {kind}  failed: {error}")
+            if i not in failed_offers:
+                failed_offers.append(i)
+        if kind == "LM":
+            print()
+
+    generated = sum(error is None for error, _, _, _ in results.values())
+    print("=" * 60)
+    print(f"[D_PDF] Generated {generated} PDFs for {len(matches)} offers in {elapsed:.1f}s "
+          f"({len(cached)} from cache, {total_bytes / 1024:.0f} KB total)")
+    if failed_offers:
+        print(f"  [WARN] {len(failed_offers)} offers have missing PDFs: {[i + 1 for i in failed_offers]}")
+    print("=" * 60)
+    return not failed_offers
+
+
+@traced("load inputs")
+def load_run_inputs(date: str, cv_path: str = DEFAULT_CV_PATH,
+                    photo_path: str = DEFAULT_PHOTO_PATH) -> tuple[dict, str | None, list] | None:
+    """
+    (CV, photo path or None, matches joined back to their scraped offer) of a
+    run, or None if a required file is missing.
+    """
+    match_path = os.path.join("outputs", f"data[{date}]", "match.json")
+    internships_path = os.path.join("outputs", f"data[{date}]", "internships.json")
 
     if not os.path.exists(cv_path):
         print(f"  [ERROR] CV file not found: {cv_path}")
-        return
+        return None
     if not os.path.exists(match_path):
         print(f"  [ERROR] Match file not found: {match_path}")
-        return
-    if not os.path.exists(photo_path):
+        return None
+    if not photo_path or not os.path.exists(photo_path):
         print(f"  [WARN] Photo not found: {photo_path} — CVs will be generated without photo")
         photo_path = None
 
-    # Create pdf output dir if it doesn't exist
-    os.makedirs(pdf_output_dir, exist_ok=True)
-
     with open(cv_path, "r", encoding="utf-8") as f:
         cv_data = json.load(f)
     with open(match_path, "r", encoding="utf-8") as f:
         match_data = json.load(f)
+    offers_by_id = {}
+    if os.path.exists(internships_path):
+        with open(internships_path, "r", encoding="utf-8") as f:
+            offers_by_id = index_offers(json.load(f))
 
-    matches = match_data.get("match", [])
-    print(f"  [INFO] Found {len(matches)} matched offers to generate PDFs for\n")
+    # Join back to the scraped offer by ID (older match.json files have no ID)
+    matches = [{**offers_by_id.get(match.get("id"), {}), **match} for match in match_data.get("match", [])]
+    return cv_data, photo_path, matches
 
-    # ─── Determine offer type (supply_chain or data) ─────────────
-    # Keywords that indicate a supply chain offer
-    sc_keywords = [
-        "supply chain", "logistique", "logisticien", "approvisionnement",
-        "entrepôt", "warehouse", "flux", "gestionnaire logistique",
-        "s&op", "planification", "inventory", "stock"
-    ]
 
+def plan_applications(cv_data: dict, matches: list, tags: dict | None = None) -> list:
+    """
+    One entry per matched offer: label, file stem, offer type, the CV
+    experiences the AI selected, and the match itself. The offer type comes
+    from the domain hits of its `tags` (tags.json), else from its title.
+    """
+    applications = []
     for i, match in enumerate(matches):
         offer_name = match.get("name", f"offer_{i+1}")
         company = match.get("company", "Unknown")
         safe_name = _sanitize_filename(f"{company}_{offer_name}")
+        if match.get("id"):
+            # Two offers can share a company and a title
+            safe_name = f"{safe_name}_{match['id']}"
 
         # Detect if supply chain offer
-        name_lower = offer_name.lower()
-        content_check = f"{offer_name} {company}".lower()
-        is_supply_chain = any(kw in content_check for kw in sc_keywords)
-
-        print(f"  [{i+1}/{len(matches)}] {company} — {offer_name}")
-        print(f"    Type: {'Supply Chain' if is_supply_chain else 'Data'}")
+        domain = offer_domain((tags or {}).get(match.get("id")))
+        if domain is None:
+            content_check = f"{offer_name} {company}".lower()
+            is_supply_chain = any(kw in content_check for kw in SC_KEYWORDS)
+        else:
+            is_supply_chain = domain == "supply_chain"
 
         # Get the experience indexes the AI selected for this offer
-        skill_indexes = match.get("skills", [])
-
-        # Filter experiences from cv.json based on those indexes
-        selected_experiences = [
-            exp for exp in cv_data.get("experiences", [])
-            if exp.get("index") in skill_indexes
-        ]
-
-        # ─── Generate CV PDF ─────────────────────────────────────
-        cv_filename = os.path.join(pdf_output_dir, f"CV_{safe_name}.pdf")
-        generate_cv_pdf(
-            output_path=cv_filename,
-            cv_data=cv_data,
-            selected_experiences=selected_experiences,
-            is_supply_chain=is_supply_chain,
-            photo_path=photo_path
-        )
-        print(f"    ✅ CV  → {cv_filename}")
-
-        # ─── Generate Cover Letter PDF ───────────────────────────
-        cl_filename = os.path.join(pdf_output_dir, f"LM_{safe_name}.pdf")
-        generate_cover_letter_pdf(
-            output_path=cl_filename,
-            cv_data=cv_data,
-            match=match,
-            is_supply_chain=is_supply_chain,
-            date=date
-        )
-        print(f"    ✅ LM  → {cl_filename}")
-        print()
+        skill_indexes = set(match.get("skills", []))
 
-    print("=" * 60)
-    print(f"[D_PDF] Generated {len(matches) * 2} PDFs ({len(matches)} CVs + {len(matches)} cover letters)")
-    print("=" * 60)
+        applications.append({
+            "label": f"{company} — {offer_name}",
+            "file_stem": safe_name,
+            "is_supply_chain": is_supply_chain,
+            # Filter experiences from cv.json based on those indexes
+            "selected_experiences": [
+                exp for exp in cv_data.get("experiences", [])
+                if exp.get("index") in skill_indexes
+            ],
+            "match": match,
+        })
+    return applications
+
+
+# One renderer per thread: its cached flowables are changed by every build,
+# and the service renders the PDF stages of several jobs in threads
+_local = threading.local()
+
+
+def _init_renderer(cv_data: dict, photo_path: str | None):
+    _local.renderer = CVRenderer(cv_data, photo_path)
+
+
+def _render(kind: str, kwargs: dict) -> tuple[str | None, float, float, str | None]:
+    """
+    Run one PDF build; returns (error message or None, seconds, CPU seconds,
+    one-page fitting note or None). Runs in a worker process.
+    """
+    start, cpu = time.perf_counter(), time.process_time()
+    note = None
+    try:
+        if kind == "CV":
+            note = _local.renderer.render_cv(**kwargs)
+        else:
+            _local.renderer.render_cover_letter(**kwargs)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", time.perf_counter() - start, time.process_time() - cpu, None
+    return None, time.perf_counter() - start, time.process_time() - cpu, note
 
 
 def _sanitize_filename(name: str) -> str:
@@ -0,0 +1,108 @@
+import io
+import os
+import hashlib
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Assets shared by every PDF of a run, prepared once:
+# - the photo, resampled to the resolution it is printed at (cached on disk)
+# - the contact / link icons. Helvetica has no such glyphs (the emoji used
+#   before were silently dropped); they come from ZapfDingbats, a base-14
+#   font every PDF reader provides, so nothing is embedded. JOBOT_ICON_FONT
+#   may point to a TTF to draw them instead: ReportLab then embeds a subset
+#   holding only the icon glyphs.
+
+ASSETS_DIR = os.path.join("outputs", "cache", "assets")
+
+# The photo is drawn in a PHOTO_SIZE_MM square on the CV
+PHOTO_SIZE_MM = 30
+PHOTO_DPI = int(os.environ.get("JOBOT_PHOTO_DPI", "300"))
+PHOTO_JPEG_QUALITY = 85
+
+ICON_FONT = "ZapfDingbats"
+ICON_TTF_NAME = "JobotIcons"
+ICON_TTF_PATH = os.environ.get("JOBOT_ICON_FONT", "")
+# Icon glyphs (all in ZapfDingbats)
+ICONS = {
+    "mail": "✉",
+    "phone": "☎",
+    "link": "➚",
+}
+
+_icon_font = None
+
+
+# ═══════════════════════════════════════════════════════════════
+#  PHOTO
+# ═══════════════════════════════════════════════════════════════
+
+def prepare_photo(photo_path: str | None) -> str | None:
+    """
+    Path of `photo_path` resampled to PHOTO_DPI for its printed size and
+    recompressed, cached in outputs/cache/assets/. The original is returned
+    when Pillow is not installed or the photo is already small enough.
+    """
+    if not photo_path or not os.path.exists(photo_path):
+        return photo_path
+    try:
+        from PIL import Image
+    except ImportError:
+        print("  [WARN] 'Pillow' package not installed — the photo is embedded at full size")
+        return photo_path
+
+    pixels = round(PHOTO_SIZE_MM / 25.4 * PHOTO_DPI)
+    with open(photo_path, "rb") as f:
+        source = f.read()
+    key = hashlib.sha1(source + f"{pixels}:{PHOTO_JPEG_QUALITY}".encode("ascii")).hexdigest()[:16]
+    prepared_path = os.path.join(ASSETS_DIR, f"photo_{key}.jpg")
+    if os.path.exists(prepared_path):
+        return prepared_path
+
+    try:
+        with Image.open(io.BytesIO(source)) as image:
+            if max(image.size) <= pixels:
+                return photo_path
+            # Same square box as on the CV, without upscaling
+            image = image.convert("RGB").resize((pixels, pixels), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=PHOTO_JPEG_QUALITY, optimize=True)
+    except OSError as e:
+        print(f"  [WARN] Could not resample {photo_path}: {e}")
+        return photo_path
+    if buffer.tell() >= len(source):
+        return photo_path
+
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    with open(prepared_path + ".tmp", "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(prepared_path + ".tmp", prepared_path)
+    print(f"  [INFO] Photo resampled to {pixels}px ({len(source) // 1024} KB → {buffer.tell() // 1024} KB)")
+    return prepared_path
+
+
+# ═══════════════════════════════════════════════════════════════
+#  ICONS
+# ═══════════════════════════════════════════════════════════════
+
+def _register_icon_ttf() -> TTFont | None:
+    """Register the JOBOT_ICON_FONT TrueType font (once per process)."""
+    global _icon_font
+    if _icon_font is None:
+        _icon_font = False
+        if ICON_TTF_PATH:
+            try:
+                _icon_font = TTFont(ICON_TTF_NAME, ICON_TTF_PATH)
+                pdfmetrics.registerFont(_icon_font)
+            except Exception as e:
+                print(f"  [WARN] Could not load icon font {ICON_TTF_PATH}: {e} — using {ICON_FONT}")
+                _icon_font = False
+    return _icon_font or None
+
+
+def icon(name: str) -> str:
+    """Paragraph markup of an icon."""
+    glyph = ICONS[name]
+    font = _register_icon_ttf()
+    if font is not None and ord(glyph) in font.face.charToGlyph:
+        return f'<font name="{ICON_TTF_NAME}">{glyph}</font>'
+    return f'<font name="{ICON_FONT}">{glyph}</font>'
@@ -0,0 +1,116 @@
+import os
+import time
+import json
+import shutil
+import hashlib
+from utils.manifest import file_hash
+from utils.d_files_gen.pdf_assets import ICON_TTF_PATH
+
+# Content-addressed store of generated PDFs (outputs/cache/pdf/<key>.pdf).
+# The key hashes everything a render depends on: the kind of document, its
+# inputs (offer, selected experiences, letter text...), the CV, the photo, the
+# icon font and the generator code. A hit is hard-linked (or copied) into the run folder
+# instead of being rendered again.
+
+PDF_CACHE_DIR = os.path.join("outputs", "cache", "pdf")
+# Eviction limits: total size of the store, and age since an entry was last used
+MAX_CACHE_MB = float(os.environ.get("JOBOT_PDF_CACHE_MB", "500"))
+MAX_AGE_DAYS = float(os.environ.get("JOBOT_PDF_CACHE_DAYS", "30"))
+
+# Code whose changes invalidate every cached PDF
+GENERATOR_PATHS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ("pdf_generator.py", "pdf_assets.py")
+]
+
+
+def render_key(kind: str, kwargs: dict, cv_data: dict, photo_path: str | None) -> str:
+    """Hash of the full input of one render (the output path excluded)."""
+    inputs = {name: value for name, value in kwargs.items() if name != "output_path"}
+    if "date" in inputs:
+        # Letters only print the day
+        inputs["date"] = inputs["date"][:10]
+    canonical = json.dumps({
+        "kind": kind,
+        "inputs": inputs,
+        "cv": cv_data,
+        "photo": file_hash(photo_path) if photo_path else None,
+        "icon_font": file_hash(ICON_TTF_PATH) if ICON_TTF_PATH else None,
+        "generator": [file_hash(path) for path in GENERATOR_PATHS],
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, f"{key}.pdf")
+
+
+def _place(source: str, destination: str):
+    """Hard-link `source` to `destination` (copy across filesystems), replacing it atomically."""
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        # Already linked (rename() between two links of one file is a no-op)
+        return
+    temporary = f"{destination}.tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    try:
+        os.link(source, temporary)
+    except OSError:
+        shutil.copy2(source, temporary)
+    os.replace(temporary, destination)
+
+
+def fetch(key: str, output_path: str) -> bool:
+    """Put the cached PDF for `key` at `output_path`; False on a miss."""
+    entry = _entry_path(key)
+    if not os.path.exists(entry):
+        return False
+    try:
+        _place(entry, output_path)
+        # Last use time, read by evict()
+        os.utime(entry)
+    except OSError as e:
+        print(f"  [WARN] Could not reuse cached PDF {entry}: {e}")
+        return False
+    return True
+
+
+def store(key: str, output_path: str):
+    """Add a freshly rendered PDF to the store."""
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    try:
+        _place(output_path, _entry_path(key))
+    except OSError as e:
+        print(f"  [WARN] Could not cache {output_path}: {e}")
+
+
+def evict(max_mb: float = MAX_CACHE_MB, max_age_days: float = MAX_AGE_DAYS) -> tuple[int, int]:
+    """
+    Drop entries unused for `max_age_days`, then the least recently used ones
+    until the store fits in `max_mb`. Returns (files removed, bytes freed).
+    Run folders keep their own link or copy of every PDF.
+    """
+    if not os.path.isdir(PDF_CACHE_DIR):
+        return 0, 0
+    entries = []
+    for name in os.listdir(PDF_CACHE_DIR):
+        path = os.path.join(PDF_CACHE_DIR, name)
+        if name.endswith(".pdf") and os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()
+
+    oldest_kept = time.time() - max_age_days * 86400
+    total = sum(size for _, size, _ in entries)
+    removed, freed = 0, 0
+    for mtime, size, path in entries:
+        if mtime >= oldest_kept and total <= max_mb * 1024 * 1024:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        freed += size
+    return removed, freed
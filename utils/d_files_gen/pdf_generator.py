@@ -1,5 +1,8 @@
+import io
 import os
+import json
 import datetime
+import threading
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm, cm
 from reportlab.lib.colors import HexColor
@@ -7,10 +10,12 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    Image, HRFlowable, Frame, PageTemplate, BaseDocTemplate
+    Image, HRFlowable, Frame, PageTemplate, BaseDocTemplate,
+    NextPageTemplate, PageBreak
 )
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from utils.d_files_gen.pdf_assets import PHOTO_SIZE_MM, icon, prepare_photo
 
 
 # ─── Color palette ────────────────────────────────────────────
@@ -22,273 +27,484 @@ COLOR_BG_SECTION = HexColor("#ECF0F1")  # Light gray background
 COLOR_WHITE = HexColor("#FFFFFF")
 
 
+# CV sections, in display order
+CATEGORIES_ORDER = [
+    ("experiences_pro", "Expériences Professionnelles"),
+    ("etudes", "Formation"),
+    ("certifications", "Certifications & Formations"),
+    ("projets_perso", "Projets Personnels"),
+    ("benevolat", "Bénévolat & Associations"),
+]
+
+
+# Page margins of each document
+CV_MARGINS = {"topMargin": 15 * mm, "bottomMargin": 15 * mm, "leftMargin": 15 * mm, "rightMargin": 15 * mm}
+CL_MARGINS = {"topMargin": 20 * mm, "bottomMargin": 20 * mm, "leftMargin": 25 * mm, "rightMargin": 25 * mm}
+
+# One-page fitting: fonts shrink down to MIN_SCALE (vertical spacing shrinks
+# as scale², so it goes first), then optional content is dropped
+MIN_SCALE = 0.80
+
+
 # ═══════════════════════════════════════════════════════════════
-#  CV PDF GENERATION
+#  RENDERER (cached parts shared by every document of a run)
 # ═══════════════════════════════════════════════════════════════
 
-def generate_cv_pdf(
-    output_path: str,
-    cv_data: dict,
-    selected_experiences: list,
-    is_supply_chain: bool,
-    photo_path: str | None
-):
-    """Generate a clean, professional one-page CV as PDF."""
-
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=A4,
-        topMargin=15 * mm,
-        bottomMargin=15 * mm,
-        leftMargin=15 * mm,
-        rightMargin=15 * mm,
-    )
-
-    styles = _get_cv_styles()
-    elements = []
-
-    perso = cv_data.get("Perso", [{}])[0]
-    all_experiences = cv_data.get("experiences", [])
-    skills_data = cv_data.get("skills", [{}])[0] if cv_data.get("skills") else {}
-
-    nom = perso.get("nom", "Hugo MANIPOUD")
-    numero = perso.get("numero", "")
-    mail = perso.get("mail", "")
-    phrase_intro = perso.get("phrase_intro", {})
-    intro = phrase_intro.get("supply_chain", "") if is_supply_chain else phrase_intro.get("data", "")
-
-    # ─── HEADER: Photo + Name + Contact ──────────────────────────
-    header_elements = []
-
-    # Name and contact info (right side)
-    name_block = []
-    name_block.append(Paragraph(nom, styles["name"]))
-    name_block.append(Spacer(1, 2 * mm))
-    name_block.append(Paragraph(f"📧 {mail}  |  📱 {numero}", styles["contact"]))
-    name_block.append(Spacer(1, 3 * mm))
-    name_block.append(Paragraph(intro, styles["intro"]))
-
-    if photo_path and os.path.exists(photo_path):
-        # Table with photo on the left, info on the right
-        photo = Image(photo_path, width=30 * mm, height=30 * mm)
-        photo.hAlign = "LEFT"
-
-        header_table = Table(
-            [[photo, name_block]],
-            colWidths=[35 * mm, 145 * mm],
+class CVRenderer:
+    """
+    Builds the CVs and cover letters of one candidate. Styles, the photo
+    bytes, the header and the flowables of each experience are built once
+    and reused by every document; only the selection and the letter change.
+    """
+
+    def __init__(self, cv_data: dict, photo_path: str | None = None):
+        self.cv_data = cv_data
+        self.cv_styles = _get_cv_styles()
+        self.cl_styles = _get_cl_styles()
+        self.perso = cv_data.get("Perso", [{}])[0]
+        self.experiences = {exp.get("index"): exp for exp in cv_data.get("experiences", [])}
+
+        self.photo_bytes = None
+        if photo_path and os.path.exists(photo_path):
+            with open(photo_path, "rb") as f:
+                self.photo_bytes = f.read()
+
+        self._scaled_styles = {1.0: self.cv_styles}
+        self._headers = {}
+        self._experience_blocks = {}
+        self._section_titles = {}
+        self._skills_blocks = {}
+        # Wrapped height of each cached flowable, keyed by (id, frame width)
+        self._wrapped_heights = {}
+
+    # ─── Cached blocks (per layout scale) ────────────────────────
+
+    def styles(self, scale: float = 1.0) -> dict:
+        if scale not in self._scaled_styles:
+            self._scaled_styles[scale] = _scale_styles(self.cv_styles, scale)
+        return self._scaled_styles[scale]
+
+    def header(self, is_supply_chain: bool, scale: float = 1.0) -> list:
+        """Photo + name + contact + intro (the intro depends on the offer type)."""
+        key = (is_supply_chain, scale)
+        if key in self._headers:
+            return self._headers[key]
+
+        styles = self.styles(scale)
+        space = scale ** 2
+        nom = self.perso.get("nom", "Hugo MANIPOUD")
+        numero = self.perso.get("numero", "")
+        mail = self.perso.get("mail", "")
+        phrase_intro = self.perso.get("phrase_intro", {})
+        intro = phrase_intro.get("supply_chain", "") if is_supply_chain else phrase_intro.get("data", "")
+
+        # Name and contact info (right side)
+        name_block = []
+        name_block.append(Paragraph(nom, styles["name"]))
+        name_block.append(Spacer(1, 2 * mm * space))
+        name_block.append(Paragraph(f"{icon('mail')} {mail}  |  {icon('phone')} {numero}", styles["contact"]))
+        name_block.append(Spacer(1, 3 * mm * space))
+        name_block.append(Paragraph(intro, styles["intro"]))
+
+        elements = []
+        if self.photo_bytes:
+            # Table with photo on the left, info on the right
+            photo = Image(io.BytesIO(self.photo_bytes), width=PHOTO_SIZE_MM * mm, height=PHOTO_SIZE_MM * mm)
+            photo.hAlign = "LEFT"
+
+            header_table = Table(
+                [[photo, name_block]],
+                colWidths=[35 * mm, 145 * mm],
+            )
+            header_table.setStyle(TableStyle([
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 0),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+                ("TOPPADDING", (0, 0), (-1, -1), 0),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ]))
+            elements.append(header_table)
+        else:
+            for block in name_block:
+                elements.append(block)
+
+        elements.append(Spacer(1, 4 * mm * space))
+        elements.append(HRFlowable(
+            width="100%", thickness=1, color=COLOR_ACCENT,
+            spaceAfter=4 * mm * space, spaceBefore=0
+        ))
+        self._headers[key] = elements
+        return elements
+
+    def section_title(self, title: str, scale: float = 1.0) -> list:
+        key = (title, scale)
+        if key not in self._section_titles:
+            self._section_titles[key] = [
+                Paragraph(title.upper(), self.styles(scale)["section_title"]),
+                Spacer(1, 2 * mm * scale ** 2),
+            ]
+        return self._section_titles[key]
+
+    def experience_block(self, index: int, scale: float = 1.0, with_link: bool = True) -> list:
+        """Flowables of one experience, keyed by its index."""
+        key = (index, scale, with_link)
+        if key in self._experience_blocks:
+            return self._experience_blocks[key]
+
+        styles = self.styles(scale)
+        exp = self.experiences[index]
+        exp_name = exp.get("name", "")
+        exp_period = exp.get("period", "")
+        exp_desc = exp.get("description", "")
+        exp_skills = exp.get("skills", [])
+        exp_link = exp.get("link", "")
+
+        elements = []
+        # Title line: name on left, period on right
+        title_table = Table(
+            [[
+                Paragraph(f"<b>{exp_name}</b>", styles["exp_title"]),
+                Paragraph(exp_period, styles["exp_period"]),
+            ]],
+            colWidths=[130 * mm, 50 * mm],
         )
-        header_table.setStyle(TableStyle([
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        title_table.setStyle(TableStyle([
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
             ("LEFTPADDING", (0, 0), (-1, -1), 0),
             ("RIGHTPADDING", (0, 0), (-1, -1), 0),
             ("TOPPADDING", (0, 0), (-1, -1), 0),
             ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
         ]))
-        elements.append(header_table)
-    else:
-        for block in name_block:
-            elements.append(block)
-
-    elements.append(Spacer(1, 4 * mm))
-    elements.append(HRFlowable(
-        width="100%", thickness=1, color=COLOR_ACCENT,
-        spaceAfter=4 * mm, spaceBefore=0
-    ))
-
-    # ─── EXPERIENCES SECTION ─────────────────────────────────────
-    # Group selected experiences by categorization
-    categories_order = [
-        ("experiences_pro", "Expériences Professionnelles"),
-        ("etudes", "Formation"),
-        ("certifications", "Certifications & Formations"),
-        ("projets_perso", "Projets Personnels"),
-        ("benevolat", "Bénévolat & Associations"),
-    ]
+        elements.append(title_table)
 
-    selected_indexes = {exp["index"] for exp in selected_experiences}
+        # Description
+        if exp_desc:
+            elements.append(Paragraph(exp_desc, styles["exp_desc"]))
 
-    for cat_key, cat_title in categories_order:
-        cat_experiences = [
-            exp for exp in all_experiences
-            if exp.get("categorization") == cat_key and exp.get("index") in selected_indexes
-        ]
-        if not cat_experiences:
-            continue
-
-        # Section title
-        elements.append(Paragraph(cat_title.upper(), styles["section_title"]))
-        elements.append(Spacer(1, 2 * mm))
-
-        for exp in cat_experiences:
-            # Experience name + period
-            exp_name = exp.get("name", "")
-            exp_period = exp.get("period", "")
-            exp_desc = exp.get("description", "")
-            exp_skills = exp.get("skills", [])
-            exp_link = exp.get("link", "")
-
-            # Title line: name on left, period on right
-            title_table = Table(
-                [[
-                    Paragraph(f"<b>{exp_name}</b>", styles["exp_title"]),
-                    Paragraph(exp_period, styles["exp_period"]),
-                ]],
-                colWidths=[130 * mm, 50 * mm],
-            )
-            title_table.setStyle(TableStyle([
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 0),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-                ("TOPPADDING", (0, 0), (-1, -1), 0),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-            ]))
-            elements.append(title_table)
+        # Skills as bullet points
+        if exp_skills:
+            for skill in exp_skills:
+                elements.append(Paragraph(f"• {skill}", styles["exp_skill"]))
 
-            # Description
-            if exp_desc:
-                elements.append(Paragraph(exp_desc, styles["exp_desc"]))
+        # Link
+        if exp_link and with_link:
+            elements.append(Paragraph(
+                f'{icon("link")} <a href="{exp_link}" color="#2980B9">{exp_link}</a>',
+                styles["exp_link"]
+            ))
+
+        elements.append(Spacer(1, 3 * mm * scale ** 2))
+        self._experience_blocks[key] = elements
+        return elements
+
+    def skills_block(self, is_supply_chain: bool, scale: float = 1.0, with_bonus: bool = True) -> list:
+        """COMPÉTENCES section for the offer type."""
+        key = (is_supply_chain, scale, with_bonus)
+        if key in self._skills_blocks:
+            return self._skills_blocks[key]
+
+        styles = self.styles(scale)
+        skills_data = self.cv_data.get("skills", [{}])[0] if self.cv_data.get("skills") else {}
+        elements = []
+        elements.append(Paragraph("COMPÉTENCES", styles["section_title"]))
+        elements.append(Spacer(1, 2 * mm * scale ** 2))
+
+        # Choose which skill set to display based on offer type
+        if is_supply_chain and "supply_chain" in skills_data:
+            skill_set = skills_data["supply_chain"]
+            skill_label = "Supply Chain"
+        elif "data" in skills_data:
+            skill_set = skills_data["data"]
+            skill_label = "Data"
+        else:
+            skill_set = {}
+            skill_label = ""
 
-            # Skills as bullet points
-            if exp_skills:
-                for skill in exp_skills:
-                    elements.append(Paragraph(f"• {skill}", styles["exp_skill"]))
+        if skill_set:
+            # Top priority skills
+            t_prio = skill_set.get("t_prio", [])
+            prio = skill_set.get("prio", [])
+            bonus = skill_set.get("bonus", [])
 
-            # Link
-            if exp_link:
+            if t_prio:
+                skills_text = " · ".join(t_prio[:12])  # Limit to avoid overflow
                 elements.append(Paragraph(
-                    f'🔗 <a href="{exp_link}" color="#2980B9">{exp_link}</a>',
-                    styles["exp_link"]
+                    f"<b>{skill_label} :</b> {skills_text}",
+                    styles["skill_line"]
                 ))
 
-            elements.append(Spacer(1, 3 * mm))
-
-    # ─── SKILLS SECTION ──────────────────────────────────────────
-    elements.append(Paragraph("COMPÉTENCES", styles["section_title"]))
-    elements.append(Spacer(1, 2 * mm))
-
-    # Choose which skill set to display based on offer type
-    if is_supply_chain and "supply_chain" in skills_data:
-        skill_set = skills_data["supply_chain"]
-        skill_label = "Supply Chain"
-    elif "data" in skills_data:
-        skill_set = skills_data["data"]
-        skill_label = "Data"
-    else:
-        skill_set = {}
-        skill_label = ""
-
-    if skill_set:
-        # Top priority skills
-        t_prio = skill_set.get("t_prio", [])
-        prio = skill_set.get("prio", [])
-        bonus = skill_set.get("bonus", [])
-
-        if t_prio:
-            skills_text = " · ".join(t_prio[:12])  # Limit to avoid overflow
-            elements.append(Paragraph(
-                f"<b>{skill_label} :</b> {skills_text}",
-                styles["skill_line"]
-            ))
+            if prio:
+                skills_text = " · ".join(prio[:8])
+                elements.append(Paragraph(
+                    f"<b>Complémentaires :</b> {skills_text}",
+                    styles["skill_line"]
+                ))
 
-        if prio:
-            skills_text = " · ".join(prio[:8])
-            elements.append(Paragraph(
-                f"<b>Complémentaires :</b> {skills_text}",
-                styles["skill_line"]
-            ))
+            if bonus and with_bonus:
+                skills_text = " · ".join(bonus[:8])
+                elements.append(Paragraph(
+                    f"<b>Bonus :</b> {skills_text}",
+                    styles["skill_line"]
+                ))
 
-        if bonus:
-            skills_text = " · ".join(bonus[:8])
-            elements.append(Paragraph(
-                f"<b>Bonus :</b> {skills_text}",
-                styles["skill_line"]
-            ))
+        self._skills_blocks[key] = elements
+        return elements
+
+    # ─── One-page layout ─────────────────────────────────────────
+
+    def cv_elements(self, indexes: list, is_supply_chain: bool, scale: float = 1.0,
+                    with_links: bool = True, with_bonus: bool = True) -> list:
+        """Flowables of a CV showing the experiences `indexes` (in display order)."""
+        elements = list(self.header(is_supply_chain, scale))
+
+        # ─── EXPERIENCES SECTION ─────────────────────────────────
+        for cat_key, cat_title in CATEGORIES_ORDER:
+            cat_indexes = [index for index in indexes if self.experiences[index].get("categorization") == cat_key]
+            if not cat_indexes:
+                continue
+            elements.extend(self.section_title(cat_title, scale))
+            for index in cat_indexes:
+                elements.extend(self.experience_block(index, scale, with_links))
+
+        # ─── SKILLS SECTION ──────────────────────────────────────
+        elements.extend(self.skills_block(is_supply_chain, scale, with_bonus))
+        return elements
+
+    def fit_cv(self, selected_experiences: list, is_supply_chain: bool,
+               frame_size: tuple) -> tuple[list, str | None]:
+        """
+        Flowables of the largest layout that fits one page, measured in memory
+        with wrap() (no PDF build). Content levels, in order: full content, no
+        links, no bonus skills, then fewer experiences (the last ones
+        displayed). Binary-searches the first level that fits at MIN_SCALE,
+        then searches the largest font scale that fits at that level.
+        Returns (flowables, description of what was changed or None).
+        """
+        # Group selected experiences by categorization, in CV order
+        selected_indexes = {exp["index"] for exp in selected_experiences}
+        indexes = [
+            index
+            for cat_key, _ in CATEGORIES_ORDER
+            for index, exp in self.experiences.items()
+            if exp.get("categorization") == cat_key and index in selected_indexes
+        ]
 
-    # ─── BUILD PDF ───────────────────────────────────────────────
-    doc.build(elements)
+        def layout(level, percent):
+            with_links, with_bonus, dropped = level
+            kept = indexes[:len(indexes) - dropped]
+            return self.cv_elements(kept, is_supply_chain, percent / 100, with_links, with_bonus)
+
+        def height(level, percent):
+            return _measure(layout(level, percent), *frame_size, self._wrapped_heights)
+
+        def fits(level, percent):
+            return height(level, percent) <= frame_size[1]
+
+        # Each level is shorter than the previous one
+        levels = [(True, True, 0), (False, True, 0), (False, False, 0)]
+        levels += [(False, False, dropped) for dropped in range(1, len(indexes))]
+        min_percent = round(MIN_SCALE * 100)
+        if fits(levels[0], 100):
+            return layout(levels[0], 100), None
+
+        # First level that fits at the smallest scale
+        low, high = 0, len(levels) - 1
+        if not fits(levels[high], min_percent):
+            # Even the smallest layout overflows: render it on two pages
+            return layout(levels[high], min_percent), _fit_note(levels[high], min_percent) + ", still over one page"
+        while low < high:
+            middle = (low + high) // 2
+            low, high = (low, middle) if fits(levels[middle], min_percent) else (middle + 1, high)
+        level = levels[low]
+
+        # Largest scale that fits at this level, in whole percents. The height
+        # grows almost linearly with the scale: interpolate between the bounds,
+        # and bisect when the same bound moved twice in a row
+        low, low_height = min_percent, height(level, min_percent)
+        high, high_height = 100, height(level, 100)
+        if high_height <= frame_size[1]:
+            return layout(level, 100), _fit_note(level, 100)
+        last_moved = None
+        while high - low > 1:
+            if last_moved == "low_twice":
+                guess = (low + high) // 2
+            else:
+                guess = low + int((frame_size[1] - low_height) / (high_height - low_height) * (high - low))
+                guess = min(max(guess, low + 1), high - 1)
+            guess_height = height(level, guess)
+            if guess_height <= frame_size[1]:
+                last_moved = "low_twice" if last_moved == "low" else "low"
+                low, low_height = guess, guess_height
+            else:
+                last_moved = "high"
+                high, high_height = guess, guess_height
+        return layout(level, low), _fit_note(level, low)
+
+    # ─── Documents ───────────────────────────────────────────────
+
+    def render_cv(self, output_path, selected_experiences: list, is_supply_chain: bool) -> str | None:
+        """
+        Generate a clean, professional one-page CV as PDF into `output_path`
+        (a path or a writable file object). The layout is fitted in memory,
+        then built once; returns what fitting changed, if anything.
+        """
+        doc = SimpleDocTemplate(output_path, pagesize=A4, pageCompression=1, **CV_MARGINS)
+        elements, note = self.fit_cv(selected_experiences, is_supply_chain, _frame_size(CV_MARGINS))
+
+        # ─── BUILD PDF ───────────────────────────────────────────
+        _build_shared(doc, elements)
+        return note
+
+    def render_cover_letter(self, output_path, match: dict, is_supply_chain: bool, date: str):
+        """Generate a clean French-format cover letter as PDF into `output_path` (a path or a file object)."""
+        doc = SimpleDocTemplate(output_path, pagesize=A4, pageCompression=1, **CL_MARGINS)
+        doc.build(self.cover_letter_elements(match, is_supply_chain, date))
+
+    def render_application(self, output_path, selected_experiences: list, match: dict,
+                           is_supply_chain: bool, date: str) -> str | None:
+        """
+        CV then cover letter in a single PDF, each on its own page layout.
+        Returns what CV fitting changed, if anything.
+        """
+        doc = BaseDocTemplate(output_path, pagesize=A4, pageCompression=1, pageTemplates=[
+            PageTemplate(id="cv", frames=[_page_frame(CV_MARGINS, "cv")]),
+            PageTemplate(id="letter", frames=[_page_frame(CL_MARGINS, "letter")]),
+        ])
+        elements, note = self.fit_cv(selected_experiences, is_supply_chain, _frame_size(CV_MARGINS))
+        elements = elements + [NextPageTemplate("letter"), PageBreak()]
+        elements += self.cover_letter_elements(match, is_supply_chain, date)
+        _build_shared(doc, elements)
+        return note
+
+    def cover_letter_elements(self, match: dict, is_supply_chain: bool, date: str) -> list:
+        """Flowables of the cover letter for `match`."""
+        styles = self.cl_styles
+        elements = []
+
+        nom = self.perso.get("nom", "Hugo MANIPOUD")
+        numero = self.perso.get("numero", "")
+        mail = self.perso.get("mail", "")
+
+        company = match.get("company", "")
+        location = match.get("location", "")
+        offer_name = match.get("name", "")
+        cover_letter_text = match.get("cover_letter", "")
+
+        # Parse the date string to get a nice French date
+        try:
+            dt = datetime.datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+            french_date = _format_french_date(dt)
+        except ValueError:
+            french_date = date
+
+        # ─── SENDER (top-left) ───────────────────────────────────
+        elements.append(Paragraph(f"<b>{nom}</b>", styles["sender"]))
+        elements.append(Paragraph(mail, styles["sender"]))
+        elements.append(Paragraph(numero, styles["sender"]))
+
+        elements.append(Spacer(1, 10 * mm))
+
+        # ─── RECIPIENT (right-aligned) ───────────────────────────
+        elements.append(Paragraph(f"<b>{company}</b>", styles["recipient"]))
+        elements.append(Paragraph(location, styles["recipient"]))
+
+        elements.append(Spacer(1, 8 * mm))
+
+        # ─── DATE (right-aligned) ────────────────────────────────
+        elements.append(Paragraph(f"Le {french_date}", styles["date"]))
+
+        elements.append(Spacer(1, 10 * mm))
+
+        # ─── OBJECT LINE ─────────────────────────────────────────
+        elements.append(Paragraph(
+            f"<b>Objet :</b> Candidature — {offer_name}",
+            styles["object"]
+        ))
+
+        elements.append(Spacer(1, 8 * mm))
+
+        # ─── LETTER BODY ─────────────────────────────────────────
+        # Split the cover letter by \n and create paragraphs
+        paragraphs = cover_letter_text.split("\n")
+        for para_text in paragraphs:
+            para_text = para_text.strip()
+            if not para_text:
+                elements.append(Spacer(1, 3 * mm))
+            else:
+                elements.append(Paragraph(para_text, styles["body"]))
+                elements.append(Spacer(1, 2 * mm))
+        return elements
+
+
+# Renderers are not shared between threads: building a PDF changes their cached flowables
+_local = threading.local()
+
+
+def get_renderer(cv_data: dict, photo_path: str | None) -> CVRenderer:
+    """Renderer for this CV and photo, created on first use (one per thread)."""
+    renderers = getattr(_local, "renderers", None)
+    if renderers is None:
+        renderers = _local.renderers = {}
+    key = (json.dumps(cv_data, sort_keys=True), photo_path)
+    if key not in renderers:
+        renderers[key] = CVRenderer(cv_data, prepare_photo(photo_path))
+    return renderers[key]
 
 
 # ═══════════════════════════════════════════════════════════════
-#  COVER LETTER PDF GENERATION
-# ═════════════════════════════��═════════════════════════════════
+#  CV PDF GENERATION
+# ═══════════════════════════════════════════════════════════════
 
-def generate_cover_letter_pdf(
-    output_path: str,
+def generate_cv_pdf(
+    output_path,
     cv_data: dict,
-    match: dict,
+    selected_experiences: list,
     is_supply_chain: bool,
-    date: str,
+    photo_path: str | None
 ):
-    """Generate a clean French-format cover letter as PDF."""
-
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=A4,
-        topMargin=20 * mm,
-        bottomMargin=20 * mm,
-        leftMargin=25 * mm,
-        rightMargin=25 * mm,
-    )
+    """Generate a clean, professional one-page CV as PDF (`output_path`: path or writable file object)."""
+    return get_renderer(cv_data, photo_path).render_cv(output_path, selected_experiences, is_supply_chain)
 
-    styles = _get_cl_styles()
-    elements = []
 
-    perso = cv_data.get("Perso", [{}])[0]
-    nom = perso.get("nom", "Hugo MANIPOUD")
-    numero = perso.get("numero", "")
-    mail = perso.get("mail", "")
+def cv_pdf_bytes(cv_data: dict, selected_experiences: list, is_supply_chain: bool, photo_path: str | None) -> bytes:
+    """The CV as PDF bytes, rendered in memory."""
+    buffer = io.BytesIO()
+    generate_cv_pdf(buffer, cv_data, selected_experiences, is_supply_chain, photo_path)
+    return buffer.getvalue()
 
-    company = match.get("company", "")
-    location = match.get("location", "")
-    offer_name = match.get("name", "")
-    cover_letter_text = match.get("cover_letter", "")
 
-    # Parse the date string to get a nice French date
-    try:
-        dt = datetime.datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
-        french_date = _format_french_date(dt)
-    except ValueError:
-        french_date = date
-
-    # ─── SENDER (top-left) ───────────────────────────────────────
-    elements.append(Paragraph(f"<b>{nom}</b>", styles["sender"]))
-    elements.append(Paragraph(mail, styles["sender"]))
-    elements.append(Paragraph(numero, styles["sender"]))
-
-    elements.append(Spacer(1, 10 * mm))
-
-    # ─── RECIPIENT (right-aligned) ───────────────────────────────
-    elements.append(Paragraph(f"<b>{company}</b>", styles["recipient"]))
-    elements.append(Paragraph(location, styles["recipient"]))
-
-    elements.append(Spacer(1, 8 * mm))
+# ═══════════════════════════════════════════════════════════════
+#  COVER LETTER PDF GENERATION
+# ═══════════════════════════════════════════════════════════════
 
-    # ─── DATE (right-aligned) ────────────────────────────────────
-    elements.append(Paragraph(f"Le {french_date}", styles["date"]))
+def generate_cover_letter_pdf(
+    output_path,
+    cv_data: dict,
+    match: dict,
+    is_supply_chain: bool,
+    date: str,
+):
+    """Generate a clean French-format cover letter as PDF (`output_path`: path or writable file object)."""
+    get_renderer(cv_data, None).render_cover_letter(output_path, match, is_supply_chain, date)
 
-    elements.append(Spacer(1, 10 * mm))
 
-    # ─── OBJECT LINE ─────────────────────────────────────────────
-    elements.append(Paragraph(
-        f"<b>Objet :</b> Candidature — {offer_name}",
-        styles["object"]
-    ))
+def cover_letter_pdf_bytes(cv_data: dict, match: dict, is_supply_chain: bool, date: str) -> bytes:
+    """The cover letter as PDF bytes, rendered in memory."""
+    buffer = io.BytesIO()
+    generate_cover_letter_pdf(buffer, cv_data, match, is_supply_chain, date)
+    return buffer.getvalue()
 
-    elements.append(Spacer(1, 8 * mm))
 
-    # ─── LETTER BODY ─────────────────────────────────────────────
-    # Split the cover letter by \n and create paragraphs
-    paragraphs = cover_letter_text.split("\n")
-    for para_text in paragraphs:
-        para_text = para_text.strip()
-        if not para_text:
-            elements.append(Spacer(1, 3 * mm))
-        else:
-            elements.append(Paragraph(para_text, styles["body"]))
-            elements.append(Spacer(1, 2 * mm))
+# ═══════════════════════════════════════════════════════════════
+#  APPLICATION (CV + COVER LETTER) PDF GENERATION
+# ═══════════════════════════════════════════════════════════════
 
-    # ─── BUILD PDF ───────────────────────────────────────────────
-    doc.build(elements)
+def application_pdf_bytes(cv_data: dict, selected_experiences: list, match: dict, is_supply_chain: bool,
+                          date: str, photo_path: str | None) -> bytes:
+    """CV and cover letter merged in one PDF, as bytes rendered in memory."""
+    buffer = io.BytesIO()
+    get_renderer(cv_data, photo_path).render_application(buffer, selected_experiences, match, is_supply_chain, date)
+    return buffer.getvalue()
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -440,10 +656,97 @@ def _get_cl_styles():
     }
 
 
+def _scale_styles(styles: dict, scale: float) -> dict:
+    """Copies of `styles` with font sizes scaled by `scale` and vertical spacing by scale²."""
+    return {
+        name: ParagraphStyle(
+            f"{style.name}_{scale:.2f}",
+            parent=style,
+            fontSize=style.fontSize * scale,
+            leading=style.leading * scale,
+            spaceBefore=style.spaceBefore * scale ** 2,
+            spaceAfter=style.spaceAfter * scale ** 2,
+        )
+        for name, style in styles.items()
+    }
+
+
 # ═══════════════════════════════════════════════════════════════
 #  UTILS
 # ═══════════════════════════════════════════════════════════════
 
+def _page_frame(margins: dict, frame_id: str) -> Frame:
+    """Frame of an A4 page with `margins` (the one SimpleDocTemplate builds)."""
+    width, height = A4
+    return Frame(
+        margins["leftMargin"], margins["bottomMargin"],
+        width - margins["leftMargin"] - margins["rightMargin"],
+        height - margins["topMargin"] - margins["bottomMargin"],
+        id=frame_id,
+    )
+
+
+def _frame_size(margins: dict) -> tuple[float, float]:
+    """Space the flowables get inside the frame of a page with `margins`."""
+    frame = _page_frame(margins, "measure")
+    width, height = A4
+    return (
+        width - margins["leftMargin"] - margins["rightMargin"] - frame.leftPadding - frame.rightPadding,
+        height - margins["topMargin"] - margins["bottomMargin"] - frame.topPadding - frame.bottomPadding,
+    )
+
+
+def _measure(elements: list, width: float, height: float, wrapped_heights: dict | None = None) -> float:
+    """
+    Height `elements` take in a frame, following Frame._add: no space before
+    the first flowable, and space before overlapping the previous space after.
+    `wrapped_heights` memoizes wrap() for flowables that outlive the call.
+    """
+    used = 0.0
+    space_after = 0.0
+    for position, flowable in enumerate(elements):
+        space_before = max(flowable.getSpaceBefore() - space_after, 0) if position else 0
+        if wrapped_heights is None:
+            _, flowable_height = flowable.wrap(width, height)
+        else:
+            key = (id(flowable), width)
+            if key not in wrapped_heights:
+                wrapped_heights[key] = flowable.wrap(width, height)[1]
+            flowable_height = wrapped_heights[key]
+        # The last flowable's space after may fall below the frame
+        used += space_after + space_before + flowable_height
+        space_after = flowable.getSpaceAfter()
+    return used
+
+
+def _build_shared(doc, elements: list):
+    """
+    doc.build() with cached flowables: build() consumes its list, and marks a
+    flowable pushed to the next page as postponed (a second postponement of
+    the same object, in any later document, raises LayoutError).
+    """
+    try:
+        doc.build(list(elements))
+    finally:
+        for flowable in elements:
+            if hasattr(flowable, "_postponed"):
+                del flowable._postponed
+
+
+def _fit_note(level: tuple, percent: int) -> str | None:
+    with_links, with_bonus, dropped = level
+    changes = []
+    if percent < 100:
+        changes.append(f"scaled to {percent}%")
+    if not with_links:
+        changes.append("links hidden")
+    if not with_bonus:
+        changes.append("bonus skills hidden")
+    if dropped:
+        changes.append(f"{dropped} experience(s) dropped")
+    return ", ".join(changes) or None
+
+
 def _format_french_date(dt: datetime.datetime) -> str:
     """Format a datetime as a French date string like '25 février 2026'."""
     months_fr = [
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import traceback
+import subprocess
+from utils.manifest import run_dir
+from utils.pipeline import STAGES, BATCH_STAGES, batch_mode, run_stage, run_pipeline
+from utils.b_scraper.search_stats import read_links, plan_crawl, record_crawl, crawl_summary
+
+# Long-running mode (python main.py --daemon): scrape → score → match → pdf
+# cycles on a jittered schedule. Startup costs are paid once: a crawl worker
+# subprocess keeps Chromium open between cycles, the model stays loaded
+# (keep_alive outlasts the interval) and the imports are done. Each cycle only
+# scrapes offers no earlier cycle has seen, spending the crawl on the searches
+# whose offers scored best (b_scraper/search_stats.py). Cycles run one after
+# the other, and a lock file stops a second daemon from starting.
+
+INTERVAL_MIN = 60
+JITTER_MIN = 10
+LOCK_PATH = os.path.join("outputs", "cache", "daemon.lock")
+SEEN_PATH = os.path.join("outputs", "cache", "seen_offers.json")
+# Offers first scraped this long ago are scraped again (e.g. reposted). This
+# list alone decides: the worker forgets what it exported at every cycle
+SEEN_TTL_DAYS = 60
+WORKER_COMMAND = [sys.executable, "-m", "utils.b_scraper.worker"]
+
+
+# ═══════════════════════════════════════════════════════════════
+#  CRAWL WORKER
+# ═══════════════════════════════════════════════════════════════
+
+class CrawlWorkerClient:
+    """Daemon side of the crawl worker subprocess (utils/b_scraper/worker.py)."""
+
+    def __init__(self, command: list = WORKER_COMMAND):
+        self.command = command
+        self.process = None
+
+    def _start(self):
+        start = time.time()
+        self.process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding="utf-8", bufsize=1,
+        )
+        reply = self._read()
+        if reply is None or reply.get("event") != "ready":
+            self.process = None
+            raise RuntimeError("the crawl worker did not start")
+        print(f"[DAEMON] Crawl worker started in {time.time() - start:.1f}s (pid {self.process.pid})")
+
+    def _read(self) -> dict | None:
+        """Next reply of the worker; None if it exited."""
+        for line in self.process.stdout:
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                continue
+        return None
+
+    def crawl(self, output: str, seen: list, links: list | None = None) -> dict:
+        """
+        Crawl the search URLs `links` (default: links.txt), skipping `seen`
+        offer URLs; returns the "done" reply.
+        """
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+        command = {"cmd": "crawl", "output": output, "seen": seen}
+        if links is not None:
+            command["links"] = links
+        self.process.stdin.write(json.dumps(command) + "\n")
+        self.process.stdin.flush()
+        reply = self._read()
+        if reply is None:
+            # Started again on the next cycle
+            self.process = None
+            raise RuntimeError("the crawl worker exited during the crawl")
+        if reply.get("event") != "done":
+            raise RuntimeError(f"crawl worker: {reply.get('message', reply)}")
+        return reply
+
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        try:
+            self.process.stdin.write(json.dumps({"cmd": "stop"}) + "\n")
+            self.process.stdin.close()
+            self.process.wait(timeout=60)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+# ═══════════════════════════════════════════════════════════════
+#  CYCLES
+# ═══════════════════════════════════════════════════════════════
+
+def _load_seen() -> dict:
+    """{offer URL: time first scraped} of the offers scraped less than SEEN_TTL_DAYS ago."""
+    if not os.path.exists(SEEN_PATH):
+        return {}
+    try:
+        with open(SEEN_PATH, "r", encoding="utf-8") as f:
+            seen = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"  [WARN] Ignoring unreadable seen offers: {SEEN_PATH}")
+        return {}
+    oldest = time.time() - SEEN_TTL_DAYS * 86400
+    return {url: first_seen for url, first_seen in seen.items() if first_seen >= oldest}
+
+
+def _save_seen(seen: dict):
+    os.makedirs(os.path.dirname(SEEN_PATH), exist_ok=True)
+    with open(SEEN_PATH + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(seen, f)
+    os.replace(SEEN_PATH + ".tmp", SEEN_PATH)
+
+
+def run_cycle(worker: CrawlWorkerClient) -> bool:
+    """One cycle: crawl the new offers into a new run, then score, match and generate its PDFs."""
+    from utils.a_init.init import init
+    date = init()
+    seen = _load_seen()
+    crawl = {}
+
+    def crawl_new_offers(date: str) -> bool:
+        links = read_links()
+        plan = plan_crawl(links) if links else None
+        crawl.update(worker.crawl(os.path.join(run_dir(date), "internships.json"), sorted(seen), plan))
+        record_crawl(date, crawl.get("searches", {}))
+        print(f"[DAEMON] {crawl_summary(crawl.get('searches', {}))}")
+        print(f"[DAEMON] Crawl: {crawl['offers']} new offers, {crawl['skipped']} already seen "
+              f"({crawl['seconds']:.0f}s)")
+        return True
+
+    if not run_stage(date, "scrape", crawl_new_offers):
+        return False
+    now = time.time()
+    seen.update({url: now for url in crawl["new_urls"]})
+    _save_seen(seen)
+
+    if not crawl["offers"]:
+        print("[DAEMON] No new offer: run folder removed")
+        shutil.rmtree(run_dir(date), ignore_errors=True)
+        return True
+    stages = BATCH_STAGES if batch_mode() else STAGES
+    return run_pipeline(date, stages.index("scrape") + 1, stages)
+
+
+def _acquire_lock():
+    """Open and lock LOCK_PATH; None if another daemon holds it. Released when the process exits."""
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    handle = open(LOCK_PATH, "a")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def run_daemon(interval_min: float = INTERVAL_MIN, jitter_min: float = JITTER_MIN,
+               cycles: int | None = None, worker: CrawlWorkerClient | None = None) -> bool:
+    """
+    Run a cycle every `interval_min` minutes plus a random 0-`jitter_min`
+    delay, counted from the start of the previous cycle (right after it when
+    a cycle overruns), until interrupted or after `cycles` cycles.
+    """
+    from utils.c_ia.ollama_client import set_keep_alive, start_warm_up
+
+    lock = _acquire_lock()
+    if lock is None:
+        print(f"[DAEMON] Another daemon is already running ({LOCK_PATH})")
+        return False
+
+    # Keep the model loaded until the next cycle, and load it during the first crawl
+    set_keep_alive(f"{int(interval_min + jitter_min) + 10}m")
+    start_warm_up()
+    worker = worker or CrawlWorkerClient()
+
+    number = 0
+    ok = True
+    try:
+        while cycles is None or number < cycles:
+            number += 1
+            start = time.time()
+            print("=" * 60)
+            print(f"[DAEMON] Cycle {number} — {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            print("=" * 60)
+            try:
+                ok = run_cycle(worker)
+            except Exception:
+                traceback.print_exc()
+                ok = False
+            print(f"[DAEMON] Cycle {number} {'done' if ok else 'failed'} in {time.time() - start:.0f}s")
+            if cycles is not None and number >= cycles:
+                break
+
+            wait = interval_min * 60 + random.uniform(0, jitter_min * 60) - (time.time() - start)
+            if wait > 0:
+                print(f"[DAEMON] Next cycle at {time.strftime('%H:%M:%S', time.localtime(time.time() + wait))}")
+                time.sleep(wait)
+    except KeyboardInterrupt:
+        print("\n[DAEMON] Stopping...")
+    finally:
+        worker.stop()
+        lock.close()
+    return ok
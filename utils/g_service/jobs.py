@@ -0,0 +1,360 @@
+import io
+import os
+import sys
+import json
+import uuid
+import queue
+import datetime
+import threading
+import traceback
+import contextvars
+from contextlib import contextmanager
+from utils.manifest import run_dir
+from utils.pipeline import run_stage
+from utils.daemon import CrawlWorkerClient, WORKER_COMMAND
+from utils.b_scraper.search_stats import record_crawl, record_scores, crawl_summary
+from utils.c_ia.ia_launcher import run_scoring, run_match, DEFAULT_CV_PATH, DEFAULT_USER_PROMPT
+from utils.c_ia.local_features import DEFAULT_TARGETS
+from utils.c_ia.offer_tags import run_tagging
+from utils.c_ia.ollama_client import get_pool, OLLAMA_BACKENDS
+from utils.d_files_gen.files_gen_launcher import run_pdf_generation, DEFAULT_PHOTO_PATH
+from utils.d_files_gen.export import export_applications
+
+# Job queue of the HTTP service (utils/g_service/server.py). Each job is a run
+# of its own (outputs/data[...]/) with its own search links, CV and prompt,
+# executed stage by stage in a thread. Every stage needs a slot of its kind:
+# a browser (crawl worker) for scrape, an Ollama request for score and match,
+# a PDF build for pdf (tagging is quick and needs none). Jobs therefore
+# overlap: one job is scored while the next one is crawled and the previous
+# one renders its PDFs, instead of whole runs waiting for each other.
+
+BROWSER_SLOTS = int(os.environ.get("JOBOT_BROWSER_SLOTS", "1"))
+# Match the number of requests the Ollama servers run in parallel
+LLM_SLOTS = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")) * len(OLLAMA_BACKENDS)
+PDF_SLOTS = int(os.environ.get("JOBOT_PDF_SLOTS", "1"))
+
+JOB_STAGES = ["scrape", "tag", "score", "match", "pdf"]
+SLOT_BY_STAGE = {"scrape": "browser", "tag": None, "score": "llm", "match": "llm", "pdf": "pdf"}
+INPUTS_DIR = "inputs"
+
+# Log file of the job the current thread works for; the threads a job starts
+# get it through utils.threads.in_context()
+_job_log = contextvars.ContextVar("job_log", default=None)
+
+
+class _RoutedStream:
+    """Stand-in for sys.stdout: what a job thread prints goes to that job's log."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def _target(self):
+        log = _job_log.get()
+        return self.stream if log is None or log.closed else log
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SUBMISSIONS
+# ═══════════════════════════════════════════════════════════════
+
+def _input_path(path: str, field: str) -> str:
+    """A file of inputs/ named by a submission; ValueError for anything else."""
+    real = os.path.realpath(path)
+    if os.path.commonpath([real, os.path.realpath(INPUTS_DIR)]) != os.path.realpath(INPUTS_DIR):
+        raise ValueError(f"{field} must be a file of {INPUTS_DIR}/")
+    if not os.path.isfile(real):
+        raise ValueError(f"{field} not found: {path}")
+    return path
+
+
+def parse_submission(body: dict) -> dict:
+    """
+    Job settings from a POST /jobs body:
+      {"name": str, "links": [search URL, ...], "cv": CV dict or path in inputs/,
+       "photo": path in inputs/, "user_prompt": str, "targets": {...}}
+    Every field is optional (links.txt, inputs/cv.json, the default prompt...).
+    Raises ValueError when a field is invalid.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("the body must be a JSON object")
+
+    links = body.get("links")
+    if links is not None:
+        if (not isinstance(links, list) or not links
+                or not all(isinstance(url, str) and url.startswith(("http://", "https://")) for url in links)):
+            raise ValueError("links must be a non-empty list of http(s) URLs")
+
+    cv = body.get("cv", DEFAULT_CV_PATH)
+    if isinstance(cv, str):
+        with open(_input_path(cv, "cv"), "r", encoding="utf-8") as f:
+            cv = json.load(f)
+    if not isinstance(cv, dict):
+        raise ValueError("cv must be a CV object or the path of a CV in inputs/")
+
+    photo = body.get("photo")
+    if photo is not None:
+        if not isinstance(photo, str):
+            raise ValueError("photo must be the path of an image in inputs/")
+        photo = _input_path(photo, "photo")
+
+    user_prompt = body.get("user_prompt", DEFAULT_USER_PROMPT)
+    targets = body.get("targets", {})
+    if not isinstance(user_prompt, str) or not isinstance(targets, dict):
+        raise ValueError("user_prompt must be a string and targets an object")
+    name = body.get("name", "job")
+    if not isinstance(name, str):
+        raise ValueError("name must be a string")
+
+    return {
+        "name": name[:80],
+        "links": links,
+        "cv": cv,
+        "photo": photo or DEFAULT_PHOTO_PATH,
+        "user_prompt": user_prompt,
+        "targets": {**DEFAULT_TARGETS, **targets},
+    }
+
+
+def _create_run() -> str:
+    """New run folder; jobs submitted in the same second get the next free second."""
+    moment = datetime.datetime.now().replace(microsecond=0)
+    os.makedirs("outputs", exist_ok=True)
+    while True:
+        date = moment.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            os.mkdir(run_dir(date))
+        except FileExistsError:
+            moment += datetime.timedelta(seconds=1)
+            continue
+        os.mkdir(os.path.join(run_dir(date), "pdf"))
+        return date
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+# ═══════════════════════════════════════════════════════════════
+#  QUEUE
+# ═══════════════════════════════════════════════════════════════
+
+class JobQueue:
+    """Runs submitted jobs, each stage waiting for a slot of its kind."""
+
+    def __init__(self, browser_slots: int = BROWSER_SLOTS, llm_slots: int = LLM_SLOTS,
+                 pdf_slots: int = PDF_SLOTS, crawl_command: list = WORKER_COMMAND):
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.specs = {}
+        sizes = {"browser": browser_slots, "llm": llm_slots, "pdf": pdf_slots}
+        self.slots = {kind: threading.Semaphore(max(1, size)) for kind, size in sizes.items()}
+        self.usage = {kind: {"size": max(1, size), "busy": 0, "waiting": 0} for kind, size in sizes.items()}
+        # One crawl worker (and browser) per browser slot
+        self.crawlers = queue.Queue()
+        for _ in range(self.usage["browser"]["size"]):
+            self.crawlers.put(CrawlWorkerClient(crawl_command))
+        if not isinstance(sys.stdout, _RoutedStream):
+            sys.stdout = _RoutedStream(sys.stdout)
+
+    # ─── API ─────────────────────────────────────────────────────
+
+    def submit(self, body: dict) -> dict:
+        """Queue a job (ValueError if the body is invalid); returns its status."""
+        spec = parse_submission(body)
+        date = _create_run()
+        folder = run_dir(date)
+        with open(os.path.join(folder, "cv.json"), "w", encoding="utf-8") as f:
+            json.dump(spec["cv"], f, ensure_ascii=False, indent=4)
+        with open(os.path.join(folder, "job.json"), "w", encoding="utf-8") as f:
+            json.dump({key: value for key, value in spec.items() if key != "cv"}, f, ensure_ascii=False, indent=4)
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "name": spec["name"],
+            "date": date,
+            "state": "queued",
+            "stage": None,
+            "progress": 0.0,
+            "stages": {stage: {"state": "pending", "waited_s": None, "seconds": None} for stage in JOB_STAGES},
+            "submitted": _now(),
+            "finished": None,
+            "error": None,
+            "cancel_requested": False,
+        }
+        with self.lock:
+            self.jobs[job["id"]] = job
+            self.specs[job["id"]] = spec
+        threading.Thread(target=self._run, args=(job, spec), name=f"job-{job['id']}", daemon=True).start()
+        print(f"[SERVICE] Job {job['id']} ({spec['name']}) queued → {folder}")
+        return self.status(job["id"])
+
+    def status(self, job_id: str) -> dict | None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def list_jobs(self) -> list:
+        with self.lock:
+            return [
+                {key: job[key] for key in ("id", "name", "date", "state", "stage", "progress", "submitted")}
+                for job in self.jobs.values()
+            ]
+
+    def cancel(self, job_id: str) -> dict | None:
+        """Stop a job before its next stage (a running stage is not interrupted)."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job and job["state"] in ("queued", "running"):
+                job["cancel_requested"] = True
+        return self.status(job_id)
+
+    def health(self) -> dict:
+        with self.lock:
+            states = {}
+            for job in self.jobs.values():
+                states[job["state"]] = states.get(job["state"], 0) + 1
+            usage = json.loads(json.dumps(self.usage))
+        return {"slots": usage, "jobs": states, "backends": get_pool().status()}
+
+    def artifacts(self, job_id: str) -> list | None:
+        """[{"path", "bytes"}] of the files of a job's run folder."""
+        job = self.status(job_id)
+        if job is None:
+            return None
+        folder = run_dir(job["date"])
+        files = []
+        for root, _, names in os.walk(folder):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                files.append({"path": os.path.relpath(path, folder).replace(os.sep, "/"),
+                              "bytes": os.path.getsize(path)})
+        return files
+
+    def artifact_path(self, job_id: str, relative: str) -> str | None:
+        """Path of one file of a job's run folder; None if missing or outside it."""
+        job = self.status(job_id)
+        if job is None:
+            return None
+        folder = os.path.realpath(run_dir(job["date"]))
+        path = os.path.realpath(os.path.join(folder, relative))
+        if os.path.commonpath([path, folder]) != folder or not os.path.isfile(path):
+            return None
+        return path
+
+    def export(self, job_id: str, merged: bool = False) -> bytes | None:
+        """ZIP of a matched job's applications, rendered in memory; None if not matched yet."""
+        job = self.status(job_id)
+        if job is None or job["stages"]["match"]["state"] != "done":
+            return None
+        buffer = io.BytesIO()
+        with self.slot("pdf"):
+            ok = export_applications(job["date"], buffer, merged, os.path.join(run_dir(job["date"]), "cv.json"),
+                                     self.specs[job_id]["photo"])
+        return buffer.getvalue() if ok else None
+
+    @contextmanager
+    def slot(self, kind: str):
+        """Hold one slot of `kind` ("browser", "llm" or "pdf"; None: no slot)."""
+        if kind is None:
+            yield
+            return
+        with self.lock:
+            self.usage[kind]["waiting"] += 1
+        self.slots[kind].acquire()
+        with self.lock:
+            self.usage[kind]["waiting"] -= 1
+            self.usage[kind]["busy"] += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.usage[kind]["busy"] -= 1
+            self.slots[kind].release()
+
+    def shutdown(self):
+        while not self.crawlers.empty():
+            self.crawlers.get().stop()
+
+    # ─── Job threads ─────────────────────────────────────────────
+
+    def _update(self, job: dict, **fields):
+        with self.lock:
+            job.update(fields)
+
+    def _update_stage(self, job: dict, stage: str, **fields):
+        with self.lock:
+            job["stages"][stage].update(fields)
+            done = sum(entry["state"] == "done" for entry in job["stages"].values())
+            job["progress"] = round(done / len(JOB_STAGES), 2)
+
+    def _run(self, job: dict, spec: dict):
+        date = job["date"]
+        log = open(os.path.join(run_dir(date), "log.txt"), "a", encoding="utf-8", buffering=1)
+        _job_log.set(log)
+        cv_path = os.path.join(run_dir(date), "cv.json")
+        runners = {
+            "scrape": lambda date: self._crawl(date, spec["links"]),
+            "tag": lambda date: run_tagging(date, [cv_path]),
+            "score": lambda date: self._score(date, cv_path, spec),
+            "match": lambda date: run_match(date, cv_path, spec["user_prompt"]),
+            "pdf": lambda date: run_pdf_generation(date, cv_path=cv_path, photo_path=spec["photo"]),
+        }
+        try:
+            for stage in JOB_STAGES:
+                if job["cancel_requested"]:
+                    self._update(job, state="cancelled", stage=None)
+                    return
+                self._update_stage(job, stage, state="waiting")
+                self._update(job, stage=stage)
+                waiting = datetime.datetime.now()
+                with self.slot(SLOT_BY_STAGE[stage]):
+                    started = datetime.datetime.now()
+                    self._update_stage(job, stage, state="running",
+                                       waited_s=round((started - waiting).total_seconds(), 1))
+                    self._update(job, state="running")
+                    ok = run_stage(date, stage, runners[stage])
+                seconds = round((datetime.datetime.now() - started).total_seconds(), 1)
+                self._update_stage(job, stage, state="done" if ok else "failed", seconds=seconds)
+                if not ok:
+                    self._update(job, state="failed", error=f"stage {stage} failed (see the log)")
+                    return
+            self._update(job, state="done", stage=None)
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job, state="failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            self._update(job, finished=_now())
+            _job_log.set(None)
+            log.close()
+            print(f"[SERVICE] Job {job['id']} {job['state']}")
+
+    def _crawl(self, date: str, links: list | None) -> bool:
+        # Holding the browser slot guarantees a free crawler. A job crawls all
+        # of its searches (no crawl plan) but its yield still feeds the stats
+        crawler = self.crawlers.get()
+        try:
+            reply = crawler.crawl(os.path.join(run_dir(date), "internships.json"), [], links)
+        finally:
+            self.crawlers.put(crawler)
+        record_crawl(date, reply.get("searches", {}))
+        print(f"  [INFO] Crawled {reply['offers']} offers in {reply['seconds']:.0f}s — "
+              f"{crawl_summary(reply.get('searches', {}))}")
+        if not reply["offers"]:
+            print("  [ERROR] The scraper found no internship")
+            return False
+        return True
+
+    def _score(self, date: str, cv_path: str, spec: dict) -> bool:
+        if not run_scoring(date, cv_path, spec["user_prompt"], spec["targets"]):
+            return False
+        record_scores(date, [os.path.join(run_dir(date), "scoring.json")])
+        return True
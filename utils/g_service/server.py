@@ -0,0 +1,153 @@
+import re
+import sys
+import json
+import mimetypes
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.g_service.jobs import JobQueue
+
+# Local HTTP API over the job queue (python main.py serve):
+#   POST   /jobs                        submit a job (see jobs.parse_submission) → 202 + status
+#   GET    /jobs                        every job, newest last
+#   GET    /jobs/{id}                   status: state, current stage, progress, per-stage times
+#   DELETE /jobs/{id}                   cancel before its next stage
+#   GET    /jobs/{id}/log               what the job printed
+#   GET    /jobs/{id}/artifacts         files of its run folder
+#   GET    /jobs/{id}/artifacts/{path}  one of them
+#   GET    /jobs/{id}/export[?merged=1] its applications as one ZIP
+#   GET    /health                      slot usage and job counts
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+_JOB_PATH = re.compile(r"^/jobs/(?P<id>[0-9a-f]+)(?:/(?P<action>log|artifacts|export)(?:/(?P<file>.+))?)?$")
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, jobs: JobQueue):
+        super().__init__(address, _ServiceHandler)
+        self.jobs = jobs
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients closing idle keep-alive connections are not errors
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: ServiceServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, data: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, body):
+        self._send(status, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        jobs = self.server.jobs
+        if url.path == "/health":
+            self._send_json(200, jobs.health())
+            return
+        if url.path == "/jobs":
+            self._send_json(200, jobs.list_jobs())
+            return
+        match = _JOB_PATH.match(url.path)
+        status = jobs.status(match["id"]) if match else None
+        if status is None:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        action = match["action"]
+        if action is None:
+            self._send_json(200, status)
+        elif action == "log":
+            # No log.txt until the job starts printing
+            path = jobs.artifact_path(match["id"], "log.txt")
+            data = b""
+            if path:
+                with open(path, "rb") as f:
+                    data = f.read()
+            self._send(200, data, "text/plain; charset=utf-8")
+        elif action == "artifacts" and match["file"] is None:
+            self._send_json(200, jobs.artifacts(match["id"]))
+        elif action == "artifacts":
+            path = jobs.artifact_path(match["id"], unquote(match["file"]))
+            if path is None:
+                self._send_json(404, {"error": "no such artifact"})
+                return
+            with open(path, "rb") as f:
+                self._send(200, f.read(), mimetypes.guess_type(path)[0] or "application/octet-stream")
+        else:
+            merged = parse_qs(url.query).get("merged", ["0"])[0] in ("1", "true")
+            data = jobs.export(match["id"], merged)
+            if data is None:
+                self._send_json(409, {"error": "the job has no matched offers yet"})
+                return
+            name = f"applications_{status['id']}{'_merged' if merged else ''}.zip"
+            self._send(200, data, "application/zip", {"Content-Disposition": f'attachment; filename="{name}"'})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+        body = self._read_json()
+        try:
+            status = self.server.jobs.submit(body)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(202, status)
+
+    def do_DELETE(self):
+        match = _JOB_PATH.match(urlsplit(self.path).path)
+        status = self.server.jobs.cancel(match["id"]) if match and match["action"] is None else None
+        if status is None:
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, status)
+
+
+def run_server(host: str = HOST, port: int = PORT, jobs: JobQueue | None = None) -> bool:
+    """Serve the API until interrupted."""
+    from utils.c_ia.ollama_client import start_warm_up
+
+    jobs = jobs or JobQueue()
+    server = ServiceServer((host, port), jobs)
+    sizes = {kind: usage["size"] for kind, usage in jobs.health()["slots"].items()}
+    print(f"[SERVICE] Listening on {server.url} — slots: {sizes}")
+    # Load the model before the first job needs it
+    start_warm_up()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[SERVICE] Stopping...")
+    finally:
+        server.server_close()
+        jobs.shutdown()
+    return True
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import hashlib
+
+# Per-run manifest (outputs/data[{date}]/manifest.json): for every stage, its
+# status, the hashes of the files it read and wrote, and its timings. A stage
+# is reusable on --resume when it finished and none of these files changed.
+
+MANIFEST_NAME = "manifest.json"
+
+
+def run_dir(date: str) -> str:
+    return os.path.join("outputs", f"data[{date}]")
+
+
+def file_hash(path: str) -> str | None:
+    """sha1 of a file, or of every file of a directory (names included); None if missing or empty."""
+    if os.path.isdir(path):
+        digest = hashlib.sha1()
+        found = False
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                full_path = os.path.join(root, name)
+                digest.update(os.path.relpath(full_path, path).encode("utf-8"))
+                digest.update(file_hash(full_path).encode("ascii"))
+                found = True
+        return digest.hexdigest() if found else None
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(date: str) -> dict:
+    path = os.path.join(run_dir(date), MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"run": date, "stages": {}}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"  [WARN] Ignoring unreadable manifest: {path}")
+        return {"run": date, "stages": {}}
+
+
+def _save_manifest(date: str, manifest: dict):
+    path = os.path.join(run_dir(date), MANIFEST_NAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so an interrupted run never leaves a truncated manifest
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    os.replace(path + ".tmp", path)
+
+
+def start_stage(date: str, stage: str, inputs: dict):
+    """Mark `stage` as running and record the hashes of its input files ({name: path})."""
+    manifest = load_manifest(date)
+    manifest["stages"][stage] = {
+        "status": "running",
+        "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "inputs": {name: file_hash(path) for name, path in inputs.items()},
+    }
+    _save_manifest(date, manifest)
+
+
+def finish_stage(date: str, stage: str, ok: bool, outputs: dict, duration: float):
+    """Record the outcome of `stage` and the hashes of its output files ({name: path})."""
+    manifest = load_manifest(date)
+    entry = manifest["stages"].setdefault(stage, {"inputs": {}})
+    entry.update({
+        "status": "done" if ok else "failed",
+        "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "duration_s": round(duration, 2),
+        "outputs": {name: file_hash(path) for name, path in outputs.items()},
+    })
+    _save_manifest(date, manifest)
+
+
+def stage_is_valid(date: str, stage: str, inputs: dict, outputs: dict) -> tuple[bool, str]:
+    """Can the recorded result of `stage` be reused? Returns (valid, reason)."""
+    entry = load_manifest(date)["stages"].get(stage)
+    if entry is None:
+        # Runs made before manifests existed: trust the files that are there
+        if outputs and all(file_hash(path) is not None for path in outputs.values()):
+            return True, "no manifest entry, existing outputs kept"
+        return False, "never ran"
+    if entry.get("status") != "done":
+        return False, f"status is {entry.get('status')}"
+    for name, path in inputs.items():
+        if entry["inputs"].get(name) != file_hash(path):
+            return False, f"{name} changed"
+    for name, path in outputs.items():
+        current = file_hash(path)
+        if current is None:
+            return False, f"{name} is missing"
+        if entry.get("outputs", {}).get(name) != current:
+            return False, f"{name} was modified"
+    return True, "unchanged"
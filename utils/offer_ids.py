@@ -0,0 +1,39 @@
+import hashlib
+from urllib.parse import urlsplit
+
+# Stable offer IDs shared by every stage (scrape → score → match → pdf).
+# The ID is derived from the offer URL (query string and trailing slash
+# ignored) so the same offer keeps its ID across searches and runs; offers
+# without URL fall back to their name, company and content.
+
+ID_LENGTH = 8
+
+
+def offer_id(offer: dict) -> str:
+    """Return the short, content-derived ID of an offer."""
+    url = (offer.get("URL") or "").strip()
+    if url:
+        parts = urlsplit(url)
+        raw = f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+    else:
+        raw = "\x00".join(
+            " ".join((offer.get(field) or "").split()).lower()
+            for field in ("name", "company", "content")
+        )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:ID_LENGTH]
+
+
+def ensure_offer_ids(offers: list) -> list:
+    """Add the `id` field to offers scraped before IDs existed (in place)."""
+    for offer in offers:
+        if not offer.get("id"):
+            offer["id"] = offer_id(offer)
+    return offers
+
+
+def index_offers(offers: list) -> dict:
+    """Map offer ID → offer; the first occurrence wins for duplicates."""
+    index = {}
+    for offer in ensure_offer_ids(offers):
+        index.setdefault(offer["id"], offer)
+    return index
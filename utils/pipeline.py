@@ -0,0 +1,194 @@
+import os
+import glob
+import json
+import time
+import traceback
+from utils.manifest import run_dir, start_stage, finish_stage, stage_is_valid
+from utils.tracing import trace_stage
+from utils.b_scraper.search_stats import record_scores
+
+# Stage runner behind main.py: runs scrape → tag → score → match → pdf for one run
+# folder, records each stage in the run manifest and its timings in perf.json
+# (utils/tracing.py) and, on --resume, skips the stages whose inputs and
+# outputs are unchanged. Stage modules are imported lazily so that resuming at
+# the PDF stage does not load Scrapy or Playwright.
+
+STAGES = ["scrape", "tag", "score", "match", "pdf"]
+# Batch mode scores and matches every candidate profile in one stage
+BATCH_STAGES = ["scrape", "tag", "batch"]
+
+CV_PATH = os.path.join("inputs", "cv.json")
+PHOTO_PATH = os.path.join("inputs", "photo.jpeg")
+LINKS_PATH = os.path.join("utils", "b_scraper", "links.txt")
+PROFILES_DIR = os.path.join("inputs", "profiles")
+KEYWORDS_PATH = os.path.join("utils", "c_ia", "data", "domain_keywords.json")
+
+
+def _stage_files(date: str, stage: str) -> tuple[dict, dict]:
+    """({input name: path}, {output name: path}) of a stage."""
+    folder = run_dir(date)
+    internships = os.path.join(folder, "internships.json")
+    scoring = os.path.join(folder, "scoring.json")
+    match = os.path.join(folder, "match.json")
+    tags = os.path.join(folder, "tags.json")
+    return {
+        "scrape": ({"links": LINKS_PATH}, {"internships": internships}),
+        "tag": ({"internships": internships, "cv": CV_PATH, "profiles": PROFILES_DIR, "keywords": KEYWORDS_PATH},
+                {"tags": tags}),
+        "score": ({"internships": internships, "cv": CV_PATH, "tags": tags}, {"scoring": scoring}),
+        "match": ({"internships": internships, "cv": CV_PATH, "scoring": scoring}, {"match": match}),
+        "pdf": ({"match": match, "cv": CV_PATH, "photo": PHOTO_PATH, "tags": tags},
+                {"pdf": os.path.join(folder, "pdf")}),
+        "batch": ({"internships": internships, "profiles": PROFILES_DIR, "tags": tags},
+                  {"candidates": os.path.join(folder, "candidates")}),
+    }[stage]
+
+
+# ═══════════════════════════════════════════════════════════════
+#  STAGES
+# ═══════════════════════════════════════════════════════════════
+
+def _run_scrape(date: str) -> bool:
+    from utils.b_scraper.launcher import run_scraper
+    run_scraper(date)
+    internships_path = os.path.join(run_dir(date), "internships.json")
+    try:
+        with open(internships_path, "r", encoding="utf-8") as f:
+            offers = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"  [ERROR] The scraper did not write a valid {internships_path}")
+        return False
+    if not offers:
+        print("  [ERROR] The scraper found no internship")
+        return False
+    return True
+
+
+def _run_tag(date: str) -> bool:
+    from utils.c_ia.offer_tags import run_tagging
+    cvs = [CV_PATH]
+    if batch_mode():
+        # Tag for the skills of every candidate
+        from utils.c_ia.ia_launcher import load_profiles
+        cvs = [profile["cv"] for profile in load_profiles(PROFILES_DIR)]
+    return run_tagging(date, cvs)
+
+
+def _run_score(date: str) -> bool:
+    from utils.c_ia.ia_launcher import run_scoring
+    if not run_scoring(date):
+        return False
+    # How well the offers of each search scored steers the next crawls
+    record_scores(date, [os.path.join(run_dir(date), "scoring.json")])
+    return True
+
+
+def _run_match(date: str) -> bool:
+    from utils.c_ia.ia_launcher import run_match
+    return run_match(date)
+
+
+def _run_pdf(date: str) -> bool:
+    from utils.d_files_gen.files_gen_launcher import run_pdf_generation
+    return run_pdf_generation(date)
+
+
+def _run_batch(date: str) -> bool:
+    from utils.c_ia.ia_launcher import run_ia_batch
+    if not run_ia_batch(date):
+        return False
+    record_scores(date, glob.glob(os.path.join(glob.escape(run_dir(date)), "candidates", "*", "scoring.json")))
+    return True
+
+
+_RUNNERS = {"scrape": _run_scrape, "tag": _run_tag, "score": _run_score, "match": _run_match, "pdf": _run_pdf,
+            "batch": _run_batch}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  RUNS
+# ═══════════════════════════════════════════════════════════════
+
+def batch_mode() -> bool:
+    """Batch mode when inputs/profiles/ holds candidate profiles."""
+    return bool(glob.glob(os.path.join(PROFILES_DIR, "*.json")))
+
+
+def find_run(name: str) -> str | None:
+    """Date of an existing run from "last", a date or a "data[...]" folder name."""
+    if name == "last":
+        runs = sorted(glob.glob(os.path.join(glob.escape("outputs"), "data[[]*[]]")))
+        if not runs:
+            return None
+        name = os.path.basename(runs[-1])
+    name = os.path.basename(name.rstrip("/\\"))
+    if name.startswith("data[") and name.endswith("]"):
+        name = name[5:-1]
+    return name if os.path.isdir(run_dir(name)) else None
+
+
+def plan_stages(date: str, stages: list, from_stage: str | None = None) -> int:
+    """
+    Index of the first stage to run in an existing run: `from_stage`, or
+    earlier if an upstream stage cannot be reused.
+    """
+    first = stages.index(from_stage) if from_stage else len(stages)
+    for position, stage in enumerate(stages[:first]):
+        valid, reason = stage_is_valid(date, stage, *_stage_files(date, stage))
+        if not valid:
+            print(f"[RESUME] Stage '{stage}' must run again: {reason}")
+            return position
+        print(f"[RESUME] Reusing stage '{stage}' ({reason})")
+    return first
+
+
+def run_stage(date: str, stage: str, runner=None) -> bool:
+    """
+    Run one stage (with `runner(date)` instead of the default one), record it
+    in the manifest and trace it into perf.json.
+    """
+    inputs, outputs = _stage_files(date, stage)
+    start_stage(date, stage, inputs)
+    start = time.time()
+    with trace_stage(date, stage) as result:
+        try:
+            ok = (runner or _RUNNERS[stage])(date)
+        except Exception:
+            traceback.print_exc()
+            ok = False
+        result["ok"] = ok
+    finish_stage(date, stage, ok, outputs, time.time() - start)
+    return ok
+
+
+def run_pipeline(date: str, first_stage: int = 0, stages: list | None = None) -> bool:
+    """Run `stages[first_stage:]` in order, stopping at the first failure."""
+    stages = stages or (BATCH_STAGES if batch_mode() else STAGES)
+    to_run = stages[first_stage:]
+    if not to_run:
+        print(f"[RUN] Nothing to do: every stage of run {date} is up to date")
+        return True
+
+    # Load the model (and the static start of the scoring prompt) while the scraper runs
+    warm_up = None
+    if any(stage in ("score", "match", "batch") for stage in to_run):
+        from utils.c_ia.ollama_client import start_warm_up
+        from utils.c_ia.ia_launcher import warm_up_prefix
+        warm_up = start_warm_up(warm_up_prefix() if "score" in to_run else "")
+
+    crawl_end = None
+    for stage in to_run:
+        if stage != "scrape" and warm_up is not None and crawl_end is None:
+            crawl_end = time.time()
+            warm_up.join()
+
+        ok = run_stage(date, stage)
+        if not ok:
+            print(f"\n[RUN] Stage '{stage}' failed. Fix the cause, then resume with:")
+            print(f'      python main.py --resume "{date}"')
+            return False
+
+    if warm_up is not None and "scrape" in to_run:
+        from utils.c_ia.ollama_client import warm_up_report
+        print(f"[RUN] {warm_up_report(crawl_end)}")
+    return True
@@ -0,0 +1,14 @@
+import re
+import unicodedata
+
+# Text normalization shared by the stages that match keywords and places in
+# offers (scoring features, tag stage, card filter): both the text and the
+# terms looked up in it go through normalize_text().
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and turn separators into single spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r"[-'’_]", " ", text)
+    return " ".join(text.split())
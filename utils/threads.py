@@ -0,0 +1,16 @@
+import contextvars
+
+# Work handed to other threads (thread pools, helper threads) runs with the
+# context variables of the thread that handed it over: the job whose log it
+# prints to (g_service/jobs.py) and the stage and span it is traced under
+# (tracing.py). A new thread otherwise starts with an empty context.
+
+
+def in_context(function):
+    """`function`, callable from any thread, run with the context variables of the caller."""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # A context cannot be entered by two threads at once: one copy per call
+        return context.copy().run(function, *args, **kwargs)
+    return run
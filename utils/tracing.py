@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import datetime
+import threading
+import contextvars
+import tracemalloc
+from functools import wraps
+from contextlib import contextmanager
+from utils.manifest import run_dir
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Tracing of a run: each stage is traced by run_stage() (wall and CPU time,
+# peak resident memory of the process), and code inside the stage adds spans
+# for its sub-steps and external calls (Ollama requests, page downloads, PDF
+# builds) with their own times and attributes such as token counts. The
+# results go to outputs/data[{date}]/perf.json, one entry per stage: a
+# resumed run only replaces the stages it ran again. Optionally, each stage
+# also records its own peak of Python allocations with tracemalloc, or runs
+# under cProfile (dumped to profile_{stage}.prof).
+
+PERF_FILE = "perf.json"
+# tracemalloc makes PDF rendering about 10x slower: off unless JOBOT_TRACE_MEMORY=1
+TRACE_MEMORY = os.environ.get("JOBOT_TRACE_MEMORY", "0") == "1"
+PROFILE = os.environ.get("JOBOT_PROFILE", "0") == "1"
+
+_lock = threading.Lock()
+# The stage traced and the open spans (innermost last). Context variables:
+# work a stage hands to a thread pool through utils.threads.in_context()
+# is traced under the span that submitted it, even with several stages running
+_trace = contextvars.ContextVar("trace", default=None)
+_spans = contextvars.ContextVar("spans", default=())
+# Stages being traced: {"stage": name, "start": perf_counter, "spans": [...]}
+_active = []
+
+
+def set_profiling(enabled: bool):
+    """Run the next stages under cProfile (same as JOBOT_PROFILE=1)."""
+    global PROFILE
+    PROFILE = enabled
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SPANS
+# ═══════════════════════════════════════════════════════════════
+
+def _current_trace() -> dict | None:
+    """Stage traced in this context, else the only running stage (threads started without it)."""
+    trace = _trace.get()
+    if trace is None and len(_active) == 1:
+        trace = _active[0]
+    return trace
+
+
+def _parent(trace: dict) -> str:
+    """Innermost open span, else the stage."""
+    spans = _spans.get()
+    return spans[-1]["name"] if spans else trace["stage"]
+
+
+@contextmanager
+def span(name: str, kind: str = "step", **attrs):
+    """
+    Time the block as a span of the running stage; yields its record, to
+    which attributes can be added. Does nothing outside a traced stage.
+    """
+    trace = _current_trace()
+    if trace is None:
+        yield {}
+        return
+    record = {"name": name, "kind": kind, "parent": _parent(trace),
+              "start_s": round(time.perf_counter() - trace["start"], 4), **attrs}
+    token = _spans.set(_spans.get() + (record,))
+    start, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield record
+    finally:
+        _spans.reset(token)
+        record["wall_s"] = round(time.perf_counter() - start, 4)
+        record["cpu_s"] = round(time.thread_time() - cpu, 4)
+        with _lock:
+            trace["spans"].append(record)
+
+
+def traced(name: str, kind: str = "step"):
+    """Decorator: trace every call of the function as a span."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**attrs):
+    """Add attributes (e.g. token counts) to the innermost open span."""
+    spans = _spans.get()
+    if spans:
+        spans[-1].update(attrs)
+
+
+def record(name: str, kind: str, wall_s: float, cpu_s: float | None = None, **attrs):
+    """Add a span timed elsewhere (another process, an asynchronous download)."""
+    trace = _current_trace()
+    if trace is None:
+        return
+    entry = {"name": name, "kind": kind, "parent": _parent(trace),
+             "start_s": round(time.perf_counter() - trace["start"] - wall_s, 4), **attrs,
+             "wall_s": round(wall_s, 4), "cpu_s": None if cpu_s is None else round(cpu_s, 4)}
+    with _lock:
+        trace["spans"].append(entry)
+
+
+# ═══════════════════════════════════════════════════════════════
+#  STAGES
+# ═══════════════════════════════════════════════════════════════
+
+def _max_rss_mb() -> float | None:
+    """Peak resident memory of this process so far (None where not reported)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _children_cpu() -> float:
+    """CPU time of the finished child processes (PDF workers); 0 where not reported."""
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+@contextmanager
+def trace_stage(date: str, stage: str):
+    """
+    Trace one stage and save it to perf.json; the caller sets result["ok"] on
+    the yielded dict. The CPU time includes the child processes it waited for;
+    it is measured for the whole process, so stages running at the same time
+    (HTTP service) are each charged for all of it.
+    """
+    trace = {"stage": stage, "start": time.perf_counter(), "spans": []}
+    token = _trace.set(trace)
+    with _lock:
+        _active.append(trace)
+    result = {"ok": False}
+    started = datetime.datetime.now().isoformat(timespec="seconds")
+    cpu, children_cpu = time.process_time(), _children_cpu()
+    memory = TRACE_MEMORY and not tracemalloc.is_tracing()
+    if memory:
+        tracemalloc.start()
+    profiler = None
+    if PROFILE:
+        # cProfile only sees the thread that enables it (the stage's own code)
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield result
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profile_path = os.path.join(run_dir(date), f"profile_{stage}.prof")
+            profiler.dump_stats(profile_path)
+            print(f"  [INFO] Profile of {stage} → {profile_path} (python -m pstats, snakeviz or flameprof)")
+        entry = {
+            "ok": result["ok"],
+            "started": started,
+            "wall_s": round(time.perf_counter() - trace["start"], 3),
+            "cpu_s": round(time.process_time() - cpu + _children_cpu() - children_cpu, 3),
+            "max_rss_mb": _max_rss_mb(),
+            "peak_mb": None,
+            "spans": trace["spans"],
+        }
+        if memory:
+            entry["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+            tracemalloc.stop()
+        _trace.reset(token)
+        with _lock:
+            _active.remove(trace)
+        _save_stage(date, stage, entry)
+        print(f"[PERF] {stage}: {_stage_line(entry)}")
+
+
+def _save_stage(date: str, stage: str, entry: dict):
+    perf = load_perf(date) or {"date": date, "stages": {}}
+    perf["stages"][stage] = entry
+    path = os.path.join(run_dir(date), PERF_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(perf, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def load_perf(date: str) -> dict | None:
+    path = os.path.join(run_dir(date), PERF_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"  [WARN] Ignoring unreadable {path}")
+        return None
+
+
+# ═══════════════════════════════════════════════════════════════
+#  REPORTS
+# ═══════════════════════════════════════════════════════════════
+
+def span_totals(entry: dict) -> dict:
+    """{span name: {"count", "wall_s", "prompt_tokens", "output_tokens"}} of a stage."""
+    totals = {}
+    for record in entry["spans"]:
+        total = totals.setdefault(record["name"], {"count": 0, "wall_s": 0.0, "prompt_tokens": 0, "output_tokens": 0})
+        total["count"] += 1
+        total["wall_s"] += record["wall_s"]
+        total["prompt_tokens"] += record.get("prompt_tokens") or 0
+        total["output_tokens"] += record.get("output_tokens") or 0
+    return totals
+
+
+def _stage_line(entry: dict) -> str:
+    line = f"{entry['wall_s']:.1f}s wall, {entry['cpu_s']:.1f}s CPU"
+    if entry.get("max_rss_mb") is not None:
+        line += f", RSS {entry['max_rss_mb']:.0f} MB"
+    if entry.get("peak_mb") is not None:
+        line += f", traced peak {entry['peak_mb']:.0f} MB"
+    top = sorted(span_totals(entry).items(), key=lambda item: item[1]["wall_s"], reverse=True)[:3]
+    if top:
+        line += " | " + ", ".join(f"{name} ×{total['count']} {total['wall_s']:.1f}s" for name, total in top)
+    return line
+
+
+def _delta(before: float | None, after: float | None) -> str:
+    if before is None or after is None:
+        return ""
+    if not before:
+        return f"{after - before:+.2f}"
+    return f"{after - before:+.2f} ({(after - before) / before:+.0%})"
+
+
+def _cell(entry: dict | None, key: str, width: int, unit: str = "") -> str:
+    if not entry or entry.get(key) is None:
+        return f"{'-':>{width}s}"
+    return f"{entry[key]:.1f}{unit}".rjust(width)
+
+
+def compare_runs(date_a: str, date_b: str) -> bool:
+    """Print the stage and span times of run B against run A."""
+    perf_a, perf_b = load_perf(date_a), load_perf(date_b)
+    for date, perf in ((date_a, perf_a), (date_b, perf_b)):
+        if perf is None:
+            print(f"  [ERROR] No {PERF_FILE} in run {date}")
+            return False
+
+    print("=" * 60)
+    print(f"[PERF] {date_a}  →  {date_b}")
+    print("=" * 60)
+    print(f"  {'stage':10s} {'wall A':>9s} {'wall B':>9s}  {'Δ wall':18s} {'CPU A':>8s} {'CPU B':>8s} {'RSS A':>7s} {'RSS B':>7s}")
+    # In the order they ran
+    stages = sorted(set(perf_a["stages"]) | set(perf_b["stages"]),
+                    key=lambda stage: (perf_b["stages"].get(stage) or perf_a["stages"][stage])["started"])
+    for stage in stages:
+        a, b = perf_a["stages"].get(stage), perf_b["stages"].get(stage)
+        print(f"  {stage:10s} {_cell(a, 'wall_s', 9, 's')} {_cell(b, 'wall_s', 9, 's')}  "
+              f"{_delta(a and a['wall_s'], b and b['wall_s']):18s} "
+              f"{_cell(a, 'cpu_s', 8, 's')} {_cell(b, 'cpu_s', 8, 's')} "
+              f"{_cell(a, 'max_rss_mb', 7)} {_cell(b, 'max_rss_mb', 7)}")
+
+    print(f"\n  {'span':38s} {'count':>9s} {'wall A':>9s} {'wall B':>9s}  {'Δ wall':18s} tokens (in/out)")
+    for stage in stages:
+        totals_a = span_totals(perf_a["stages"][stage]) if stage in perf_a["stages"] else {}
+        totals_b = span_totals(perf_b["stages"][stage]) if stage in perf_b["stages"] else {}
+        for name in dict.fromkeys(list(totals_a) + list(totals_b)):
+            a, b = totals_a.get(name), totals_b.get(name)
+            count = f"{a['count'] if a else 0}→{b['count'] if b else 0}"
+            tokens = ""
+            if any(total and (total["prompt_tokens"] or total["output_tokens"]) for total in (a, b)):
+                tokens = " → ".join(f"{t['prompt_tokens']}/{t['output_tokens']}" if t else "-" for t in (a, b))
+            print(f"  {f'{stage} > {name}'[:38]:38s} {count:>9s} {_cell(a, 'wall_s', 9, 's')} "
+                  f"{_cell(b, 'wall_s', 9, 's')}  "
+                  f"{_delta(a and a['wall_s'], b and b['wall_s']):18s} {tokens}")
+    return True